@@ -2,8 +2,9 @@
 from datamodel import OrderDepth, TradingState, Order
 from typing import Dict, List
 import numpy as np
-import jsonpickle
 import math
+from codec import Codec, FloatArray
+from history import History
 
 # === Constants ===
 STRIKE_MAP = {
@@ -46,22 +47,21 @@ def approximate_iv(C_market, S, K, T):
 
 # === Main Trader Class ===
 class Trader:
+    def __init__(self):
+        # built here rather than at import so the history length follows MAX_HISTORY
+        # as it is when the Trader is made
+        self.trader_data = Codec({
+            'historical_data': History(MAX_HISTORY, {'m': 'f8', 'iv': 'f8', 'strike': 'i4', 'S': 'f8', 'T': 'i2', 'V': 'f8'}),
+            'rock_prices': FloatArray(),
+        })
 
     def run(self, state: TradingState):
         result: Dict[str, List[Order]] = {}
-        traderDataOut = {}
-
-        if state.traderData:
-            try:
-                traderDataOut = jsonpickle.decode(state.traderData)
-            except:
-                traderDataOut = {}
-
-        # Initialize trader state memory
-        if 'historical_data' not in traderDataOut:
-            traderDataOut['historical_data'] = []
-        if 'rock_prices' not in traderDataOut:
-            traderDataOut['rock_prices'] = []
+        try:
+            traderDataOut = self.trader_data.decode(state.traderData)
+        except ValueError:
+            traderDataOut = self.trader_data.defaults()
+        history = traderDataOut['historical_data']
 
         orders_to_place = []
         rock_price = None
@@ -107,24 +107,10 @@ class Trader:
                     iv = approximate_iv(market_price, rock_price, strike, TTE)
                     if iv is None:
                         continue
-                    traderDataOut['historical_data'].append({
-                        'product': product,
-                        'm': moneyness,
-                        'iv': iv,
-                        'strike': strike,
-                        'S': rock_price,
-                        'T': TTE,
-                        'V': market_price
-                    })
-
-        if len(traderDataOut['historical_data']) > MAX_HISTORY:
-            traderDataOut['historical_data'] = traderDataOut['historical_data'][-MAX_HISTORY:]
-
-        data = traderDataOut['historical_data']
-        if len(data) >= 20:
-            m_vals = np.array([x['m'] for x in data])
-            iv_vals = np.array([x['iv'] for x in data])
-            coeffs = np.polyfit(m_vals, iv_vals, 2)
+                    history.append(m=moneyness, iv=iv, strike=strike, S=rock_price, T=TTE, V=market_price)
+
+        if len(history) >= 20:
+            coeffs = np.polyfit(history['m'], history['iv'], 2)
 
             def fitted_iv(m):
                 return coeffs[0]*m**2 + coeffs[1]*m + coeffs[2]
@@ -163,4 +149,4 @@ class Trader:
                 result[order.symbol] = []
             result[order.symbol].append(order)
 
-        return result, 0, jsonpickle.encode(traderDataOut)
+        return result, 0, self.trader_data.encode(traderDataOut)
@@ -2,8 +2,11 @@
 from datamodel import OrderDepth, TradingState, Order
 from typing import Dict, List
 import numpy as np
-import jsonpickle
 import math
+from codec import Codec, Float, FloatArray, Int, Mapping, Records
+from history import History
+from options import IVCache, bs_call
+from rolling import RollingLinearFit, RollingQuadraticFit
 
 STRIKE_MAP = {
     "VOLCANIC_ROCK_VOUCHER_9500": 9500,
@@ -14,6 +17,7 @@ STRIKE_MAP = {
 }
 
 MAX_HISTORY = 60
+SMILE_DECAY = 0.925   # 0.01 ** (1 / 59): oldest sample weighted 1/100 of the newest, as polyfit's w=linspace(0.1, 1) was
 MIN_CONFIDENCE = 0.06
 MAX_UNREALIZED_LOSS = 750
 MAX_HOLD_TICKS = 4000
@@ -22,51 +26,34 @@ ROCK_HISTORY = 30
 ROCK_TRADE_QTY = 10
 ROCK_LIMIT = 30
 
-def normal_cdf(x):
-    return (1.0 + math.erf(x / math.sqrt(2.0))) / 2.0
-
-def black_scholes_call(S, K, T, sigma):
-    if T <= 0 or sigma <= 0:
-        return max(S - K, 0)
-    d1 = (math.log(S / K) + 0.5 * sigma ** 2 * T) / (sigma * math.sqrt(T))
-    d2 = d1 - sigma * math.sqrt(T)
-    return S * normal_cdf(d1) - K * normal_cdf(d2)
-
-def approximate_iv(C_market, S, K, T):
-    if T <= 0 or C_market < max(S - K, 0):
-        return None
-    low, high = 0.01, 2.0
-    for _ in range(20):
-        mid = (low + high) / 2
-        price = black_scholes_call(S, K, T, mid)
-        if price > C_market:
-            high = mid
-        else:
-            low = mid
-    return (low + high) / 2
-
-def compute_rock_momentum(prices):
-    if len(prices) < 5:
-        return 0
-    x = np.arange(len(prices))
-    y = np.array(prices)
-    slope, _ = np.polyfit(x, y, 1)
-    return slope
-
 class Trader:
+    def __init__(self):
+        # Built here rather than at import so the history length follows MAX_HISTORY as it is
+        # when the Trader is made.  The voucher's product name is implied by its strike, so it isn't stored
+        self.trader_data = Codec({
+            "historical_data": History(MAX_HISTORY, {"m": "f8", "iv": "f8", "strike": "i4", "S": "f8", "T": "i2", "V": "f8"}),
+            "rock_prices": FloatArray(),
+            "entry_book": Mapping(Records({"price": Float(), "timestamp": Int()})),
+        })
+        self.iv_cache = IVCache()
+        self.smile = RollingQuadraticFit(MAX_HISTORY, SMILE_DECAY)
+        self.rock_trend = RollingLinearFit(ROCK_HISTORY)
+
     def run(self, state: TradingState):
         result: Dict[str, List[Order]] = {}
-        traderDataOut = {}
-
-        if state.traderData:
-            try:
-                traderDataOut = jsonpickle.decode(state.traderData)
-            except:
-                traderDataOut = {}
-
-        traderDataOut.setdefault("historical_data", [])
-        traderDataOut.setdefault("rock_prices", [])
-        traderDataOut.setdefault("entry_book", {})
+        try:
+            traderDataOut = self.trader_data.decode(state.traderData)
+        except ValueError:
+            traderDataOut = self.trader_data.defaults()
+        history = traderDataOut["historical_data"]
+
+        # A fresh Trader instance re-seeds the rolling fits from the persisted history
+        if not len(self.smile):
+            for m, iv in zip(history["m"].tolist(), history["iv"].tolist()):
+                self.smile.push(m, iv)
+        if not len(self.rock_trend):
+            for price in traderDataOut["rock_prices"][-ROCK_HISTORY:]:
+                self.rock_trend.push(price)
 
         orders_to_place = []
         rock_price = None
@@ -80,68 +67,54 @@ class Trader:
                 traderDataOut["rock_prices"].append(rock_price)
                 if len(traderDataOut["rock_prices"]) > ROCK_HISTORY:
                     traderDataOut["rock_prices"] = traderDataOut["rock_prices"][-ROCK_HISTORY:]
+                self.rock_trend.push(rock_price)
 
-                rock_ma = np.mean(traderDataOut["rock_prices"])
+                rock_ma = self.rock_trend.mean
                 rock_pos = state.position.get("VOLCANIC_ROCK", 0)
                 if rock_price < 0.985 * rock_ma and rock_pos + ROCK_TRADE_QTY <= ROCK_LIMIT:
                     orders_to_place.append(Order("VOLCANIC_ROCK", best_ask, ROCK_TRADE_QTY))
                 elif rock_price > 1.015 * rock_ma and rock_pos - ROCK_TRADE_QTY >= -ROCK_LIMIT:
                     orders_to_place.append(Order("VOLCANIC_ROCK", best_bid, -ROCK_TRADE_QTY))
 
-        momentum = compute_rock_momentum(traderDataOut["rock_prices"]) if traderDataOut["rock_prices"] else 0
+        momentum = self.rock_trend.slope if len(self.rock_trend) >= 5 else 0
 
-        if rock_price is not None:
+        TTE = max(1, 7 - state.timestamp // 1000)
+        if rock_price is not None and TTE > 2:
+            quotes = []
             for product, strike in STRIKE_MAP.items():
                 if product not in state.order_depths:
                     continue
                 depth = state.order_depths[product]
                 if depth.buy_orders and depth.sell_orders:
-                    best_bid = max(depth.buy_orders)
-                    best_ask = min(depth.sell_orders)
-                    market_price = (best_bid + best_ask) / 2
-                    TTE = max(1, 7 - state.timestamp // 1000)
-                    if TTE <= 2:
-                        continue
+                    quotes.append((product, strike, (max(depth.buy_orders) + min(depth.sell_orders)) / 2))
+
+            # Solve every strike's IV in one call, reusing last tick's solutions
+            solved = self.iv_cache.solve([q[2] for q in quotes], rock_price, [q[1] for q in quotes], TTE)
+            for (product, strike, market_price), iv, ok in zip(quotes, solved.iv.tolist(), solved.converged.tolist()):
+                if ok:
                     m = math.log(strike / rock_price) / math.sqrt(TTE)
-                    iv = approximate_iv(market_price, rock_price, strike, TTE)
-                    if iv is None:
-                        continue
-                    traderDataOut["historical_data"].append({
-                        "product": product,
-                        "m": m,
-                        "iv": iv,
-                        "strike": strike,
-                        "S": rock_price,
-                        "T": TTE,
-                        "V": market_price
-                    })
-
-        if len(traderDataOut["historical_data"]) > MAX_HISTORY:
-            traderDataOut["historical_data"] = traderDataOut["historical_data"][-MAX_HISTORY:]
-
-        data = traderDataOut["historical_data"]
-        if len(data) >= 20:
-            m_vals = np.array([x["m"] for x in data])
-            iv_vals = np.array([x["iv"] for x in data])
-            weights = np.linspace(0.1, 1.0, len(iv_vals))
-            coeffs = np.polyfit(m_vals, iv_vals, 2, w=weights)
-
-            def fitted_iv(m):
-                return coeffs[0] * m ** 2 + coeffs[1] * m + coeffs[2]
+                    history.append(m=m, iv=iv, strike=strike, S=rock_price, T=TTE, V=market_price)
+                    self.smile.push(m, iv)
 
+        coeffs = self.smile.coeffs() if len(self.smile) >= 20 else None
+        if coeffs is not None and rock_price is not None:
+            quotes = []
             for product, strike in STRIKE_MAP.items():
                 if product not in state.order_depths:
                     continue
                 depth = state.order_depths[product]
+                if depth.buy_orders and depth.sell_orders:
+                    quotes.append((product, strike, max(depth.buy_orders), min(depth.sell_orders)))
+
+            # Price every quoted strike in one pass
+            strikes = np.array([q[1] for q in quotes], dtype=float)
+            m = np.log(strikes / rock_price) / math.sqrt(TTE)
+            theo_prices = bs_call(rock_price, strikes, TTE, np.polyval(coeffs, m))
+
+            for (product, strike, best_bid, best_ask), theo_price in zip(quotes, theo_prices):
                 position = state.position.get(product, 0)
                 position_limit = 200
-                best_bid = max(depth.buy_orders)
-                best_ask = min(depth.sell_orders)
                 market_price = (best_bid + best_ask) / 2
-                TTE = max(1, 7 - state.timestamp // 1000)
-                m = math.log(strike / rock_price) / math.sqrt(TTE)
-                theo_iv = fitted_iv(m)
-                theo_price = black_scholes_call(rock_price, strike, TTE, theo_iv)
                 mispricing = theo_price - market_price
                 confidence = abs(mispricing) / theo_price if theo_price > 0 else 0
 
@@ -164,4 +137,4 @@ class Trader:
                 result[order.symbol] = []
             result[order.symbol].append(order)
 
-        return result, 0, jsonpickle.encode(traderDataOut)
+        return result, 0, self.trader_data.encode(traderDataOut)
@@ -2,8 +2,7 @@ from datamodel import OrderDepth, TradingState, Order
 from typing import Dict, List
 import numpy as np
 import jsonpickle
-from scipy.stats import norm
-from scipy.optimize import minimize_scalar
+from options import bs_call, implied_vol
 
 # Set strike prices
 STRIKE_MAP = {
@@ -14,25 +13,6 @@ STRIKE_MAP = {
     "VOLCANIC_ROCK_VOUCHER_10500": 10500,
 }
 
-def black_scholes_call_price(S, K, T, sigma, r=0):
-    if T <= 0 or sigma <= 0:
-        return max(S - K, 0)
-    d1 = (np.log(S / K) + 0.5 * sigma ** 2 * T) / (sigma * np.sqrt(T))
-    d2 = d1 - sigma * np.sqrt(T)
-    return S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
-
-def implied_volatility(C_market, S, K, T):
-    if C_market < max(S - K, 0):
-        return None
-    try:
-        result = minimize_scalar(
-            lambda sigma: (black_scholes_call_price(S, K, T, sigma) - C_market) ** 2,
-            bounds=(0.01, 2.0), method='bounded'
-        )
-        return result.x if result.success else None
-    except:
-        return None
-
 class Trader:
 
     def run(self, state: TradingState):
@@ -61,8 +41,10 @@ class Trader:
                 best_ask = min(rock_depth.sell_orders)
                 rock_price = (best_bid + best_ask) / 2
 
+        TTE = max(1, 7 - state.timestamp // 1000)  # Rough approximation
         if rock_price is not None:
             # Gather voucher data and record
+            quotes = []
             for product, strike in STRIKE_MAP.items():
                 if product not in state.order_depths:
                     continue
@@ -70,20 +52,21 @@ class Trader:
                 if depth.buy_orders and depth.sell_orders:
                     best_bid = max(depth.buy_orders)
                     best_ask = min(depth.sell_orders)
-                    market_price = (best_bid + best_ask) / 2
-                    TTE = max(1, 7 - state.timestamp // 1000)  # Rough approximation
+                    quotes.append((product, strike, (best_bid + best_ask) / 2))
+
+            solved = implied_vol([q[2] for q in quotes], rock_price, [q[1] for q in quotes], TTE)
+            for (product, strike, market_price), iv, ok in zip(quotes, solved.iv.tolist(), solved.converged.tolist()):
+                if ok:
                     moneyness = np.log(strike / rock_price) / np.sqrt(TTE)
-                    iv = implied_volatility(market_price, rock_price, strike, TTE)
-                    if iv is not None:
-                        traderDataOut['historical_data'].append({
-                            'product': product,
-                            'm': moneyness,
-                            'iv': iv,
-                            'strike': strike,
-                            'S': rock_price,
-                            'T': TTE,
-                            'V': market_price
-                        })
+                    traderDataOut['historical_data'].append({
+                        'product': product,
+                        'm': moneyness,
+                        'iv': iv,
+                        'strike': strike,
+                        'S': rock_price,
+                        'T': TTE,
+                        'V': market_price
+                    })
 
         # Only act when we have enough data
         data = traderDataOut['historical_data']
@@ -107,10 +90,9 @@ class Trader:
                     best_bid = max(depth.buy_orders)
                     best_ask = min(depth.sell_orders)
                     market_price = (best_bid + best_ask) / 2
-                    TTE = max(1, 7 - state.timestamp // 1000)
                     m = np.log(strike / rock_price) / np.sqrt(TTE)
                     theo_iv = fitted_iv(m)
-                    theo_price = black_scholes_call_price(rock_price, strike, TTE, theo_iv)
+                    theo_price = bs_call(rock_price, strike, TTE, theo_iv)
 
                     # Buy if underpriced
                     if market_price < 0.95 * theo_price and position < position_limit:
@@ -4,6 +4,7 @@ from typing import Dict, List
 import numpy as np
 import jsonpickle
 import math
+from rolling import RollingQuadraticFit
 
 STRIKE_MAP = {
     "VOLCANIC_ROCK_VOUCHER_9500": 9500,
@@ -14,6 +15,7 @@ STRIKE_MAP = {
 }
 
 MAX_HISTORY = 50
+SMILE_DECAY = 0.91    # 0.01 ** (1 / 49): oldest sample weighted 1/100 of the newest, as polyfit's w=linspace(0.1, 1) was
 MIN_CONFIDENCE = 0.06  # balanced
 MAX_UNREALIZED_LOSS = 750
 MAX_HOLD_TICKS = 4000
@@ -46,6 +48,9 @@ def approximate_iv(C_market, S, K, T):
     return (low + high) / 2
 
 class Trader:
+    def __init__(self):
+        self.smile = RollingQuadraticFit(MAX_HISTORY, SMILE_DECAY)
+
     def run(self, state: TradingState):
         result: Dict[str, List[Order]] = {}
         traderDataOut = {}
@@ -61,6 +66,11 @@ class Trader:
         traderDataOut.setdefault("pnl", 0)
         traderDataOut.setdefault("entry_book", {})
 
+        # A fresh Trader instance re-seeds the smile fit from the persisted history
+        if not len(self.smile):
+            for x in traderDataOut["historical_data"][-MAX_HISTORY:]:
+                self.smile.push(x["m"], x["iv"])
+
         orders_to_place = []
         rock_price = None
 
@@ -108,17 +118,13 @@ class Trader:
                         "T": TTE,
                         "V": market_price
                     })
+                    self.smile.push(m, iv)
 
         if len(traderDataOut["historical_data"]) > MAX_HISTORY:
             traderDataOut["historical_data"] = traderDataOut["historical_data"][-MAX_HISTORY:]
 
-        data = traderDataOut["historical_data"]
-        if len(data) >= 20:
-            m_vals = np.array([x["m"] for x in data])
-            iv_vals = np.array([x["iv"] for x in data])
-            weights = np.linspace(0.1, 1.0, len(iv_vals))
-            coeffs = np.polyfit(m_vals, iv_vals, 2, w=weights)
-
+        coeffs = self.smile.coeffs() if len(self.smile) >= 20 else None
+        if coeffs is not None:
             def fitted_iv(m):
                 return coeffs[0] * m ** 2 + coeffs[1] * m + coeffs[2]
 
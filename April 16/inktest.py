@@ -2,6 +2,7 @@ from datamodel import Order, OrderDepth, TradingState
 from typing import List, Dict
 import jsonpickle
 import numpy as np
+from indicators import BollingerBands
 
 class Trader:
     def __init__(self):
@@ -10,6 +11,7 @@ class Trader:
         self.momentum_threshold = 2.0
         self.exit_threshold = 0.25  # exit when z-score returns near 0
         self.trade_size = 5
+        self.squid_bands = BollingerBands(self.squid_window_size, eps=0.0)
 
     def run(self, state: TradingState):
         result: Dict[str, List[Order]] = {}
@@ -26,6 +28,11 @@ class Trader:
             except Exception:
                 squid_price_history = []
 
+        # A fresh Trader instance re-seeds the bands from the persisted history
+        if not len(self.squid_bands):
+            for price in squid_price_history:
+                self.squid_bands.update(price)
+
         squid_depth: OrderDepth = state.order_depths.get("SQUID_INK", OrderDepth())
         squid_position = state.position.get("SQUID_INK", 0)
 
@@ -36,14 +43,12 @@ class Trader:
             squid_mid_price = (squid_best_bid + squid_best_ask) / 2
             squid_price_history.append(squid_mid_price)
             squid_price_history = squid_price_history[-self.squid_window_size:]
+            self.squid_bands.update(squid_mid_price)
 
-        if len(squid_price_history) >= self.squid_window_size:
-            short_term_mean = np.mean(squid_price_history)
-            price_now = squid_price_history[-1]
-            recent_volatility = np.std(squid_price_history)
-
-            if recent_volatility > 0:
-                z_score = (price_now - short_term_mean) / recent_volatility
+        if len(self.squid_bands) >= self.squid_window_size:
+            # a flat window can leave rounding residue in the running variance
+            if self.squid_bands.std > 1e-9:
+                z_score = self.squid_bands.zscore()
             else:
                 z_score = 0
 
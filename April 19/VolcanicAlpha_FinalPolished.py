@@ -59,7 +59,7 @@ class Trader:
         time_now = state.timestamp
         TTE = max(0.1, 7 - time_now / 100_000)
         rock_vol = np.std(rock_history[-10:])
-        rock_momentum = np.mean(np.diff(rock_history[-5:]))  # Simple trend
+        rock_momentum = (rock_history[-1] - rock_history[-5]) / 4  # Simple trend: mean of the last 4 diffs
 
         # === Volatility Cutoff ===
         if rock_vol > 250:
@@ -1,6 +1,7 @@
 from typing import Dict, List
 from datamodel import OrderDepth, TradingState, Order
 import numpy as np
+from rolling import RollingMoments
 #19.5k profit
 class Trader:
     def __init__(self):
@@ -13,8 +14,8 @@ class Trader:
         }
         self.voucher_limit = 200
         self.rock_limit = 400
-        self.vol_window = []
         self.vol_window_size = 20
+        self.vol_window = RollingMoments(self.vol_window_size)
         self.bollinger_alpha = 2.5
         self.last_trade_time = {}
         self.cooldown_ticks = 2000
@@ -22,11 +23,9 @@ class Trader:
         self.max_loss = 3300
 
     def calculate_rolling_vol(self, new_price):
-        self.vol_window.append(new_price)
-        if len(self.vol_window) > self.vol_window_size:
-            self.vol_window.pop(0)
+        self.vol_window.push(new_price)
         if len(self.vol_window) >= 2:
-            return np.std(self.vol_window)
+            return self.vol_window.std
         return 1.0
 
     def dynamic_trade_size(self, price_diff, rolling_vol):
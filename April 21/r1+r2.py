@@ -3,8 +3,12 @@ from datamodel import Order, OrderDepth, TradingState
 from typing import List, Dict
 import jsonpickle
 import numpy as np
+from indicators import BollingerBands
 
 class Trader:
+    def __init__(self):
+        self.kelp_bands = BollingerBands(20, eps=1e-6, default_std=0.0)
+
     def run(self, state: TradingState):
         result: Dict[str, List[Order]] = {}
         trader_data_out = {}
@@ -17,6 +21,11 @@ class Trader:
             except:
                 kelp_history = []
 
+        # A fresh Trader instance re-seeds the bands from the persisted history
+        if not len(self.kelp_bands):
+            for price in kelp_history:
+                self.kelp_bands.update(price)
+
         def average_price(depth: OrderDepth):
             if depth.buy_orders and depth.sell_orders:
                 best_bid = max(depth.buy_orders)
@@ -61,11 +70,10 @@ class Trader:
                     kelp_history.append(mid_price)
                     if len(kelp_history) > 20:
                         kelp_history.pop(0)
+                    self.kelp_bands.update(mid_price)
 
-                    mean_price = np.mean(kelp_history)
-                    std_price = np.std(kelp_history) + 1e-6
-                    z_ask = (mean_price - best_ask) / std_price
-                    z_bid = (best_bid - mean_price) / std_price
+                    z_ask = -self.kelp_bands.zscore(best_ask)
+                    z_bid = self.kelp_bands.zscore(best_bid)
 
                     def get_trade_size(z):
                         if z > 3: return 30
@@ -3,13 +3,14 @@ from typing import List, Dict
 import jsonpickle
 import numpy as np
 import math
+from rolling import RollingMoments
 
 class Trader:
     def __init__(self):
         # Round 3 - Volcanic Rock Strategy State
         self.rock_limit = 400
-        self.vol_window = []
         self.vol_window_size = 20
+        self.vol_window = RollingMoments(self.vol_window_size)
         self.bollinger_alpha = 2.0
         self.last_trade_time = 0
         self.cooldown_ticks = 1000
@@ -29,11 +30,9 @@ class Trader:
         self.kelp_history = []
 
     def calculate_rolling_vol(self, new_price):
-        self.vol_window.append(new_price)
-        if len(self.vol_window) > self.vol_window_size:
-            self.vol_window.pop(0)
+        self.vol_window.push(new_price)
         if len(self.vol_window) >= 2:
-            return np.std(self.vol_window)
+            return self.vol_window.std
         return 1.0
 
     def dynamic_trade_size(self, price_diff, rolling_vol):
@@ -99,7 +98,7 @@ class Trader:
                 if rolling_vol > self.vol_cap:
                     continue
 
-                fair_value = np.mean(self.vol_window) if self.vol_window else mid_price
+                fair_value = self.vol_window.mean if self.vol_window else mid_price
                 z_score = self.calculate_z_score(fair_value, mid_price)
                 if abs(z_score) < 1.0:
                     continue
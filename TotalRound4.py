@@ -1,7 +1,21 @@
-from datamodel import Order, OrderDepth, TradingState
+from datamodel import Order, TradingState
 from typing import List, Dict
-import jsonpickle
 import numpy as np
+from book import snapshots
+from codec import Codec, Float, FloatArray, Int, Mapping, Records, Str
+from rolling import RollingMoments
+from state import StateManager
+
+STATE_CODECS = {
+    "products": Codec({"kelp_history": FloatArray("f")}),  # half-tick mids, exact in float32
+    "macarons": Codec({
+        "open_trades": Records({
+            "dir": Str(), "entry": Float(), "qty": Int("i"), "entry_ts": Int("i"),
+            "peak_pnl": Float(), "signal_key": Str(),
+        }),
+        "cooldowns": Mapping(Int("i")),
+    }),
+}
 
 class Trader:
     def __init__(self):
@@ -14,20 +28,19 @@ class Trader:
         }
         self.voucher_limit = 200
         self.rock_limit = 400
-        self.vol_window = []
         self.vol_window_size = 20
+        self.vol_window = RollingMoments(self.vol_window_size)
         self.bollinger_alpha = 2.5
         self.last_trade_time = {}
         self.cooldown_ticks = 2000
         self.entry_price = {}
         self.max_loss = 3300
+        self.state = StateManager(STATE_CODECS)
 
     def calculate_rolling_vol(self, new_price):
-        self.vol_window.append(new_price)
-        if len(self.vol_window) > self.vol_window_size:
-            self.vol_window.pop(0)
+        self.vol_window.push(new_price)
         if len(self.vol_window) >= 2:
-            return np.std(self.vol_window)
+            return self.vol_window.std
         return 1.0
 
     def dynamic_trade_size(self, price_diff, rolling_vol):
@@ -44,15 +57,8 @@ class Trader:
     def run(self, state: TradingState):
         result: Dict[str, List[Order]] = {}
         conversions = 0
-        trader_data_out = {}
-
-        kelp_history = []
-        if state.traderData:
-            try:
-                prior_data = jsonpickle.decode(state.traderData)
-                kelp_history = prior_data.get("kelp_history", [])
-            except:
-                pass
+        self.state.load(state.traderData)
+        books = snapshots(state.order_depths)
 
         available = set(state.order_depths.keys())
         pos = state.position
@@ -60,12 +66,11 @@ class Trader:
         timestamp = state.timestamp
 
         rock_price = None
-        if "VOLCANIC_ROCK" in state.order_depths:
-            rock_order_depth = state.order_depths["VOLCANIC_ROCK"]
-            rock_best_ask = min(rock_order_depth.sell_orders.keys(), default=None)
-            rock_best_bid = max(rock_order_depth.buy_orders.keys(), default=None)
-            if rock_best_ask is not None and rock_best_bid is not None:
-                rock_price = (rock_best_ask + rock_best_bid) / 2
+        if "VOLCANIC_ROCK" in books:
+            rock_book = books["VOLCANIC_ROCK"]
+            rock_best_ask = rock_book.best_ask
+            rock_best_bid = rock_book.best_bid
+            rock_price = rock_book.mid
 
         rolling_vol = self.calculate_rolling_vol(rock_price) if rock_price else 1.0
 
@@ -78,9 +83,9 @@ class Trader:
                 if timestamp - last_time < self.cooldown_ticks:
                     continue
 
-                order_depth = state.order_depths[product]
-                best_ask = min(order_depth.sell_orders.keys(), default=None)
-                best_bid = max(order_depth.buy_orders.keys(), default=None)
+                book = books[product]
+                best_ask = book.best_ask
+                best_bid = book.best_bid
 
                 orders: List[Order] = []
                 TTE = max(1, 7 - state.timestamp // 100000)
@@ -110,7 +115,7 @@ class Trader:
                 if best_bid is not None and best_bid > sell_threshold and position > -self.voucher_limit:
                     price_diff = best_bid - fair_vt
                     trade_size = self.dynamic_trade_size(price_diff, rolling_vol)
-                    qty = min(order_depth.buy_orders[best_bid], trade_size, self.voucher_limit + position)
+                    qty = min(book.best_bid_volume, trade_size, self.voucher_limit + position)
                     result[product] = [Order(product, best_bid, -qty)]
                     self.last_trade_time[product] = timestamp
                     self.entry_price[product] = best_bid
@@ -121,7 +126,7 @@ class Trader:
                 elif best_ask is not None and best_ask < buy_threshold and position < self.voucher_limit:
                     price_diff = fair_vt - best_ask
                     trade_size = self.dynamic_trade_size(price_diff, rolling_vol)
-                    qty = min(-order_depth.sell_orders[best_ask], trade_size, self.voucher_limit - position)
+                    qty = min(book.best_ask_volume, trade_size, self.voucher_limit - position)
                     result[product] = [Order(product, best_ask, qty)]
                     self.last_trade_time[product] = timestamp
                     self.entry_price[product] = best_ask
@@ -133,106 +138,101 @@ class Trader:
             if product in self.voucher_strikes or product == "VOLCANIC_ROCK":
                 continue  
 
-            order_depth: OrderDepth = state.order_depths[product]
+            book = books[product]
             orders: List[Order] = []
             current_pos = pos.get(product, 0)
 
             if product == "RAINFOREST_RESIN":
                 fair_price = 10000
-                for ask, qty in sorted(order_depth.sell_orders.items()):
-                    if ask < fair_price and current_pos + abs(qty) <= 50:
-                        orders.append(Order(product, ask, abs(qty)))
-                        current_pos += abs(qty)
-                for bid, qty in sorted(order_depth.buy_orders.items(), reverse=True):
-                    if bid > fair_price and current_pos - abs(qty) >= -50:
-                        orders.append(Order(product, bid, -abs(qty)))
-                        current_pos -= abs(qty)
+                for ask, qty in book.asks:
+                    if ask < fair_price and current_pos + qty <= 50:
+                        orders.append(Order(product, ask, qty))
+                        current_pos += qty
+                for bid, qty in book.bids:
+                    if bid > fair_price and current_pos - qty >= -50:
+                        orders.append(Order(product, bid, -qty))
+                        current_pos -= qty
 
             elif product == "KELP":
                 window = 6
-                best_ask = min(order_depth.sell_orders) if order_depth.sell_orders else None
-                best_bid = max(order_depth.buy_orders) if order_depth.buy_orders else None
+                best_ask = book.best_ask
+                best_bid = book.best_bid
                 if best_ask and best_bid:
                     mid_price = (best_ask + best_bid) / 2
+                    kelp_history = self.state.namespace("products")["kelp_history"]
                     kelp_history.append(mid_price)
                     if len(kelp_history) > window:
                         kelp_history.pop(0)
                     fair_price = np.mean(kelp_history)
-                    if best_ask < fair_price and current_pos + order_depth.sell_orders[best_ask] <= 50:
-                        orders.append(Order(product, best_ask, abs(order_depth.sell_orders[best_ask])))
-                    if best_bid > fair_price and current_pos - order_depth.buy_orders[best_bid] >= -50:
-                        orders.append(Order(product, best_bid, -abs(order_depth.buy_orders[best_bid])))
+                    if best_ask < fair_price and current_pos - book.best_ask_volume <= 50:
+                        orders.append(Order(product, best_ask, book.best_ask_volume))
+                    if best_bid > fair_price and current_pos - book.best_bid_volume >= -50:
+                        orders.append(Order(product, best_bid, -book.best_bid_volume))
 
             elif product == "SQUID_INK":
                 fair_price = 7000
-                for ask, qty in sorted(order_depth.sell_orders.items()):
-                    if ask < fair_price - 300 and current_pos + abs(qty) <= 50:
-                        orders.append(Order(product, ask, abs(qty)))
-                        current_pos += abs(qty)
-                for bid, qty in sorted(order_depth.buy_orders.items(), reverse=True):
-                    if bid > fair_price + 300 and current_pos - abs(qty) >= -50:
-                        orders.append(Order(product, bid, -abs(qty)))
-                        current_pos -= abs(qty)
+                for ask, qty in book.asks:
+                    if ask < fair_price - 300 and current_pos + qty <= 50:
+                        orders.append(Order(product, ask, qty))
+                        current_pos += qty
+                for bid, qty in book.bids:
+                    if bid > fair_price + 300 and current_pos - qty >= -50:
+                        orders.append(Order(product, bid, -qty))
+                        current_pos -= qty
 
             elif product == "PICNIC_BASKET1":
                 fair_price = 6 * 300 + 3 * 400 + 1 * 800
-                for ask, qty in sorted(order_depth.sell_orders.items()):
-                    if ask < fair_price - 200 and current_pos + abs(qty) <= 60:
-                        orders.append(Order(product, ask, abs(qty)))
-                        current_pos += abs(qty)
-                for bid, qty in sorted(order_depth.buy_orders.items(), reverse=True):
-                    if bid > fair_price + 200 and current_pos - abs(qty) >= -60:
-                        orders.append(Order(product, bid, -abs(qty)))
-                        current_pos -= abs(qty)
+                for ask, qty in book.asks:
+                    if ask < fair_price - 200 and current_pos + qty <= 60:
+                        orders.append(Order(product, ask, qty))
+                        current_pos += qty
+                for bid, qty in book.bids:
+                    if bid > fair_price + 200 and current_pos - qty >= -60:
+                        orders.append(Order(product, bid, -qty))
+                        current_pos -= qty
 
             elif product == "PICNIC_BASKET2":
                 fair_price = 4 * 300 + 2 * 400
-                for ask, qty in sorted(order_depth.sell_orders.items()):
-                    if ask < fair_price - 150 and current_pos + abs(qty) <= 100:
-                        orders.append(Order(product, ask, abs(qty)))
-                        current_pos += abs(qty)
-                for bid, qty in sorted(order_depth.buy_orders.items(), reverse=True):
-                    if bid > fair_price + 150 and current_pos - abs(qty) >= -100:
-                        orders.append(Order(product, bid, -abs(qty)))
-                        current_pos -= abs(qty)
+                for ask, qty in book.asks:
+                    if ask < fair_price - 150 and current_pos + qty <= 100:
+                        orders.append(Order(product, ask, qty))
+                        current_pos += qty
+                for bid, qty in book.bids:
+                    if bid > fair_price + 150 and current_pos - qty >= -100:
+                        orders.append(Order(product, bid, -qty))
+                        current_pos -= qty
 
             elif product in ["CROISSANTS", "JAMS", "DJEMBES"]:
                 base_price = {"CROISSANTS": 300, "JAMS": 400, "DJEMBES": 800}[product]
                 limit = {"CROISSANTS": 250, "JAMS": 350, "DJEMBES": 60}[product]
-                for ask, qty in sorted(order_depth.sell_orders.items()):
-                    if ask < base_price - 20 and current_pos + abs(qty) <= limit:
-                        orders.append(Order(product, ask, abs(qty)))
-                        current_pos += abs(qty)
-                for bid, qty in sorted(order_depth.buy_orders.items(), reverse=True):
-                    if bid > base_price + 20 and current_pos - abs(qty) >= -limit:
-                        orders.append(Order(product, bid, -abs(qty)))
-                        current_pos -= abs(qty)
+                for ask, qty in book.asks:
+                    if ask < base_price - 20 and current_pos + qty <= limit:
+                        orders.append(Order(product, ask, qty))
+                        current_pos += qty
+                for bid, qty in book.bids:
+                    if bid > base_price + 20 and current_pos - qty >= -limit:
+                        orders.append(Order(product, bid, -qty))
+                        current_pos -= qty
 
             result[product] = orders
 
-        trader_data_out["kelp_history"] = kelp_history
-        traderData = jsonpickle.encode(trader_data_out)
-                # Macaron Strategy Integration
+        # Macaron Strategy Integration
         product = "MAGNIFICENT_MACARONS"
         orders_macaron: List[Order] = []
         conversions_macaron = 0
-        open_trades = []
-        cooldowns = {}
-        if state.traderData:
-            try:
-                prior_data = jsonpickle.decode(state.traderData)
-                open_trades = prior_data.get("open_trades", [])
-                cooldowns = prior_data.get("cooldowns", {})
-            except:
-                open_trades = []
-                cooldowns = {}
+        macaron_data = self.state.view("macarons")
+        open_trades = macaron_data["open_trades"]
+        cooldowns = macaron_data["cooldowns"]
         cooldowns = {k: v for k, v in cooldowns.items() if v > state.timestamp}
+        # as with the old jsonpickle state, open trades and cooldowns only carry over
+        # from ticks where the strategy below runs and writes them back
+        self.state.clear("macarons")
 
-        order_depth = state.order_depths.get(product, OrderDepth())
+        book = books[product] if product in books else None
         position = state.position.get(product, 0)
         obs = state.observations.conversionObservations.get(product)
 
-        if obs and order_depth.sell_orders and order_depth.buy_orders:
+        if obs and book is not None and book.two_sided:
             sugar = obs.sugarPrice
             sunlight = obs.sunlightIndex
             panic = 1 if sunlight <= 50 else 0
@@ -260,12 +260,12 @@ class Trader:
                 - 2.622453 * sunlight * panic - 169.2709
             )
 
-            best_ask = min(order_depth.sell_orders.keys(), default=None)
-            best_bid = max(order_depth.buy_orders.keys(), default=None)
+            best_ask = book.best_ask
+            best_bid = book.best_bid
 
             if best_ask is not None and best_bid is not None:
-                ask_vol = order_depth.sell_orders[best_ask]
-                bid_vol = order_depth.buy_orders[best_bid]
+                ask_vol = -book.best_ask_volume  # sell_orders volumes are negative
+                bid_vol = book.best_bid_volume
                 stats = {
                     "market_long": {"mean": -30.876, "std": 454.717},
                     "market_short": {"mean": -62.253, "std": 898.244},
@@ -360,8 +360,8 @@ class Trader:
 
                 result[product] = orders_macaron
                 conversions += conversions_macaron
-                trader_data_out["open_trades"] = new_open_trades
-                trader_data_out["cooldowns"] = cooldowns
+                macaron_data = self.state.namespace("macarons")
+                macaron_data["open_trades"] = new_open_trades
+                macaron_data["cooldowns"] = cooldowns
 
-        traderData = jsonpickle.encode(trader_data_out)
-        return result, conversions, traderData
\ No newline at end of file
+        return result, conversions, self.state.dump()
\ No newline at end of file
@@ -0,0 +1,286 @@
+"""Replay Prosperity round data through a Trader, tick by tick.
+
+    python backtest.py TotalRound4.py prices_round_4_day_1.csv [trades_round_4_day_1.csv]
+                       [observations_round_4_day_1.csv]
+    python backtest.py TotalRound4.py data/r4d1        # a tickstore directory
+    python backtest.py TotalRound4.py data/r4d1.delta  # or a deltas.py recording
+
+Each tick the engine builds a TradingState from the prices file, calls
+`trader.run(state)`, hands the returned traderData string back on the next
+tick exactly as the exchange does, matches the orders (see matching.py) and
+marks positions to the mid.  The time spent inside run() and the engine's
+own overhead are reported separately.
+"""
+import csv
+import importlib.util
+import sys
+import time
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from datamodel import ConversionObservation, Listing, Observation, OrderDepth, Trade, TradingState
+from matching import SUBMISSION, match_all
+
+POSITION_LIMITS = {
+    "RAINFOREST_RESIN": 50,
+    "KELP": 50,
+    "SQUID_INK": 50,
+    "CROISSANTS": 250,
+    "JAMS": 350,
+    "DJEMBES": 60,
+    "PICNIC_BASKET1": 60,
+    "PICNIC_BASKET2": 100,
+    "VOLCANIC_ROCK": 400,
+    "VOLCANIC_ROCK_VOUCHER_9500": 200,
+    "VOLCANIC_ROCK_VOUCHER_9750": 200,
+    "VOLCANIC_ROCK_VOUCHER_10000": 200,
+    "VOLCANIC_ROCK_VOUCHER_10250": 200,
+    "VOLCANIC_ROCK_VOUCHER_10500": 200,
+    "MAGNIFICENT_MACARONS": 75,
+}
+CONVERSION_LIMIT = 10
+
+
+class Tick(NamedTuple):
+    day: int
+    timestamp: int
+    order_depths: Dict[str, OrderDepth]
+    mids: Dict[str, float]
+
+
+def _rows(path) -> Iterator[List[str]]:
+    with open(path, newline="") as f:
+        reader = csv.reader(f, delimiter=";")
+        next(reader, None)
+        yield from reader
+
+
+def read_prices(path) -> Iterator[Tick]:
+    """Ticks from a prices CSV, one per timestamp, read lazily."""
+    for (day, ts), rows in groupby(_rows(path), key=lambda r: (r[0], r[1])):
+        depths = {}
+        mids = {}
+        for row in rows:
+            depths[row[2]] = OrderDepth.from_row(row[3:15])
+            if row[15] and float(row[15]):
+                mids[row[2]] = float(row[15])
+        yield Tick(int(day), int(ts), depths, mids)
+
+
+def read_trades(path) -> Iterator[Tuple[int, List[Trade]]]:
+    """(timestamp, market trades) from a trades CSV, one pair per timestamp."""
+    for ts, rows in groupby(_rows(path), key=lambda r: r[0]):
+        yield int(ts), [Trade.from_row(r) for r in rows]
+
+
+def read_observations(path) -> Iterator[Tuple[int, ConversionObservation]]:
+    """(timestamp, MAGNIFICENT_MACARONS conversion observation) from an observations CSV."""
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield int(row["timestamp"]), ConversionObservation(
+                float(row["bidPrice"]), float(row["askPrice"]), float(row["transportFees"]),
+                float(row["exportTariff"]), float(row["importTariff"]), float(row["sugarPrice"]),
+                float(row["sunlightIndex"]))
+
+
+class _Feed:
+    """Yields the items of a timestamped stream up to and including a timestamp."""
+
+    def __init__(self, stream):
+        self._stream = iter(stream) if stream is not None else iter(())
+        self._next = next(self._stream, None)
+
+    def until(self, ts: int) -> list:
+        items = []
+        while self._next is not None and self._next[0] <= ts:
+            items.append(self._next[1])
+            self._next = next(self._stream, None)
+        return items
+
+
+class BacktestResult:
+    def __init__(self):
+        self.timestamps: List[int] = []
+        self.pnl: List[float] = []
+        self.product_pnl: Dict[str, float] = {}
+        self.positions: Dict[str, int] = {}
+        self.fills: List[Trade] = []
+        self.rejected: Dict[str, int] = {}
+        self.conversions = 0
+        self.run_time = 0.0
+        self.engine_time = 0.0
+
+    @property
+    def ticks(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def final_pnl(self) -> float:
+        return self.pnl[-1] if self.pnl else 0.0
+
+    def summary(self) -> str:
+        lines = ["%-28s %12s %6s" % ("product", "pnl", "pos")]
+        for product in sorted(self.product_pnl):
+            lines.append("%-28s %12.1f %6d" % (product, self.product_pnl[product],
+                                               self.positions.get(product, 0)))
+        lines.append("%-28s %12.1f" % ("total", self.final_pnl))
+        ticks = max(1, self.ticks)
+        lines.append("%d ticks, %d fills, %d conversions" % (self.ticks, len(self.fills), self.conversions))
+        if self.rejected:
+            lines.append("rejected for position limit: " + ", ".join(
+                "%s x%d" % item for item in sorted(self.rejected.items())))
+        lines.append("run() %.3fs (%.1fus/tick), engine %.3fs (%.1fus/tick)" % (
+            self.run_time, self.run_time / ticks * 1e6, self.engine_time, self.engine_time / ticks * 1e6))
+        return "\n".join(lines)
+
+
+class Backtest:
+    """One simulated day.  `prices`, `trades` and `observations` are the round's
+    CSV paths (trades and observations optional) or already-parsed streams."""
+
+    def __init__(self, trader, prices, trades=None, observations=None,
+                 limits: Optional[Dict[str, int]] = None):
+        self.trader = trader
+        self.prices = prices
+        self.trades = trades
+        self.observations = observations
+        self.limits = POSITION_LIMITS if limits is None else limits
+
+    def _stream(self, source, reader):
+        if source is None or not isinstance(source, (str, Path)):
+            return source
+        return reader(source)
+
+    def run(self) -> BacktestResult:
+        result = BacktestResult()
+        trades = _Feed(self._stream(self.trades, read_trades))
+        observations = _Feed(self._stream(self.observations, read_observations))
+        position: Dict[str, int] = {}
+        cash: Dict[str, float] = {}
+        last_mid: Dict[str, float] = {}
+        listings: Dict[str, Listing] = {}
+        own_trades: Dict[str, List[Trade]] = {}
+        market_trades: Dict[str, List[Trade]] = {}
+        conversion_obs: Dict[str, ConversionObservation] = {}
+        trader_data = ""
+        run = self.trader.run
+        run_time = 0.0
+
+        start = time.perf_counter()
+        for tick in self._stream(self.prices, read_prices):
+            ts = tick.timestamp
+            for product in tick.order_depths:
+                if product not in listings:
+                    listings[product] = Listing(product, product, "SEASHELLS")
+            for obs in observations.until(ts):
+                conversion_obs["MAGNIFICENT_MACARONS"] = obs
+
+            # the trader gets copies: it may edit the books it is handed, and the
+            # ticks may be replayed again (see sweep.py)
+            books = tick.order_depths
+            state = TradingState(trader_data, ts, listings, _copy_depths(books), own_trades, market_trades,
+                                 dict(position), Observation({}, dict(conversion_obs)))
+
+            t0 = time.perf_counter()
+            orders, conversions, trader_data = run(state)
+            run_time += time.perf_counter() - t0
+            if not isinstance(trader_data, str):
+                raise TypeError("traderData must be a str, got %s" % type(trader_data).__name__)
+
+            # market trades printed at this tick fill resting orders now and are
+            # shown to the trader on the next tick
+            market_trades = {}
+            for trade in (t for batch in trades.until(ts) for t in batch):
+                market_trades.setdefault(trade.symbol, []).append(trade)
+
+            own_trades, rejected = match_all(orders or {}, books, market_trades, position, self.limits, ts)
+            for product in rejected:
+                result.rejected[product] = result.rejected.get(product, 0) + 1
+            for product, fills in own_trades.items():
+                for fill in fills:
+                    signed = fill.quantity if fill.buyer == SUBMISSION else -fill.quantity
+                    position[product] = position.get(product, 0) + signed
+                    cash[product] = cash.get(product, 0.0) - signed * fill.price
+                result.fills.extend(fills)
+
+            if conversions:
+                self._convert(conversions, conversion_obs.get("MAGNIFICENT_MACARONS"), position, cash, result)
+
+            last_mid.update(tick.mids)
+            total = 0.0
+            for product, c in cash.items():
+                value = c + position.get(product, 0) * last_mid.get(product, 0.0)
+                result.product_pnl[product] = value
+                total += value
+            result.timestamps.append(ts)
+            result.pnl.append(total)
+
+        result.positions = position
+        result.run_time = run_time
+        result.engine_time = time.perf_counter() - start - run_time
+        return result
+
+    @staticmethod
+    def _convert(conversions: int, obs: Optional[ConversionObservation], position: Dict[str, int],
+                 cash: Dict[str, float], result: BacktestResult) -> None:
+        """Conversions can only reduce the current position, at most CONVERSION_LIMIT per tick."""
+        product = "MAGNIFICENT_MACARONS"
+        held = position.get(product, 0)
+        if obs is None or conversions * held >= 0 or abs(conversions) > min(CONVERSION_LIMIT, abs(held)):
+            return
+        if conversions > 0:
+            price = obs.askPrice + obs.transportFees + obs.importTariff
+        else:
+            price = obs.bidPrice - obs.transportFees - obs.exportTariff
+        position[product] = held + conversions
+        cash[product] = cash.get(product, 0.0) - conversions * price
+        result.conversions += abs(conversions)
+
+
+def _copy_depths(depths) -> Dict[str, OrderDepth]:
+    if not isinstance(depths, dict):
+        # tickstore.LazyDepths: a copy builds its own OrderDepths on lookup
+        return depths.copy()
+    copies = {}
+    for product, depth in depths.items():
+        copy = copies[product] = OrderDepth()
+        copy.buy_orders = dict(depth.buy_orders)
+        copy.sell_orders = dict(depth.sell_orders)
+    return copies
+
+
+def load_module(path):
+    """A freshly executed copy of a strategy file anywhere in the repo."""
+    path = Path(path).resolve()
+    root = str(Path(__file__).resolve().parent)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    spec = importlib.util.spec_from_file_location("trader_" + path.stem.replace(" ", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_trader(path, **kwargs):
+    """A fresh Trader from a strategy file; `kwargs` go to Trader()."""
+    return load_module(path).Trader(**kwargs)
+
+
+def main(argv: List[str]) -> None:
+    if len(argv) < 2:
+        sys.exit(__doc__)
+    trader = load_trader(argv[0])
+    if Path(argv[1]).is_dir():
+        from deltas import DeltaDay, is_delta_dir
+        from tickstore import TickStore
+        store = DeltaDay(argv[1]) if is_delta_dir(argv[1]) else TickStore(argv[1])
+        result = Backtest(trader, store.ticks(), store.trades(), store.observations()).run()
+    else:
+        result = Backtest(trader, argv[1], argv[2] if len(argv) > 2 else None,
+                          argv[3] if len(argv) > 3 else None).run()
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,318 @@
+"""Whole-day backtests of stateless band rules, vectorized over the book arrays.
+
+    python bands.py data/r4d1                                   # the rules below, one pass
+    python bands.py prices_round_2_day_1.csv --product SQUID_INK \\
+        --buy-below 6600:7000:25 --sell-above 7000:7400:25 --limit 50
+
+Many branches of the strategies are a pure function of the current book and a
+constant: walk the asks from the best and buy each level priced below
+`buy_below`, walk the bids and sell each level above `sell_above`, skipping a
+level whenever it would take the position past the strategy's limit.  The
+traders that go through book.take_orders (round3.py, first3rounds.py) take
+that level partially instead, up to the limit; `partial=True` (--partial)
+simulates those.  Either way, calling run() every tick is unnecessary.  Here
+the levels that qualify are found for the whole day in one NumPy pass, the
+position is carried with a cumulative sum, and only from the first tick where
+the limits bind does a loop run, over the ticks that have a qualifying level
+at all.  Fills, cash, positions and the mark-to-mid PnL match what Backtest
+reports for the same rule (orders at book prices fill against the book, so
+market trades never matter), including the exchange rejecting a tick's orders
+over the limit.
+
+Products don't interact, so a grid of thresholds is searched per product:
+simulate_many steps through the day once with every band as a lane of the
+same arrays.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backtest import POSITION_LIMITS
+from book import BandRule
+from tickstore import DayColumns, TickStore, read_day
+
+
+# The fixed-fair branches as the strategies have them
+STRATEGY_RULES = {
+    "RAINFOREST_RESIN": BandRule.around(10000, 0, 50),                 # r5_r1.py, r1r2r3.py
+    "SQUID_INK": BandRule.around(7000, 300, 50),                       # r5_r1.py, r5squidink.py
+    "CROISSANTS": BandRule.around(300, 20, 250),                       # r5_r2.py
+    "JAMS": BandRule.around(400, 20, 350),
+    "DJEMBES": BandRule.around(800, 20, 60),
+    "VOLCANIC_ROCK_VOUCHER_9500": BandRule(800, 1200, 200),            # VolcanicAlpha_Empirical.py
+    "VOLCANIC_ROCK_VOUCHER_9750": BandRule(650, 1050, 200),
+    "VOLCANIC_ROCK_VOUCHER_10000": BandRule(500, 900, 200),
+    "VOLCANIC_ROCK_VOUCHER_10250": BandRule(350, 750, 200),
+    "VOLCANIC_ROCK_VOUCHER_10500": BandRule(250, 550, 200),
+}
+
+
+class Book(NamedTuple):
+    """One product's book columns as (T, 3) arrays, best level first."""
+    bid_price: np.ndarray
+    bid_volume: np.ndarray
+    ask_price: np.ndarray
+    ask_volume: np.ndarray
+    mid: np.ndarray
+
+
+def book(day: DayColumns, product: str) -> Book:
+    return Book(*(np.asarray(day.column(name, product)) for name in
+                  ("bid_price", "bid_volume", "ask_price", "ask_volume", "mid_price")))
+
+
+class ProductRun(NamedTuple):
+    delta: np.ndarray     # signed quantity filled per tick
+    cash: np.ndarray      # cash flow per tick
+    fills: int            # levels filled, as Backtest counts fills
+    rejected: int         # ticks whose orders the exchange rejected
+    position: int
+    cash_total: float
+
+
+def simulate(rule: BandRule, b: Book, exchange_limit: int, position: int = 0,
+             partial: bool = False) -> ProductRun:
+    """Apply `rule` to every tick of `b`, starting from `position`.
+
+    A level that would take the position past `rule.limit` is skipped, or
+    with `partial` taken up to the limit as book.take_orders does.
+    """
+    buy = (b.ask_price < rule.buy_below) & (b.ask_volume > 0)
+    sell = (b.bid_price > rule.sell_above) & (b.bid_volume > 0)
+    buy_qty = np.where(buy, b.ask_volume, 0)
+    sell_qty = np.where(sell, b.bid_volume, 0)
+    bought = buy_qty.sum(axis=1)
+    sold = sell_qty.sum(axis=1)
+    delta = bought - sold
+    cash = ((sell_qty * b.bid_price).sum(axis=1) - (buy_qty * b.ask_price).sum(axis=1)).astype(float)
+    fills = buy.astype(np.int64).sum(axis=1) + sell.sum(axis=1)
+
+    # if no limit binds anywhere, every qualifying level fills and the cumsum is the answer
+    before = position + np.concatenate([[0], np.cumsum(delta)[:-1]])
+    ok = (before + bought <= rule.limit) & (before + delta >= -rule.limit) & \
+         (before + bought <= exchange_limit) & (before - sold >= -exchange_limit)
+    first = len(delta) if ok.all() else int(np.argmin(ok))
+    rejected = 0
+    if first < len(delta):
+        active = first + np.flatnonzero((bought[first:] > 0) | (sold[first:] > 0))
+        delta[first:] = 0
+        cash[first:] = 0.0
+        fills[first:] = 0
+        pos = int(before[first])
+        rows = zip(active.tolist(), b.ask_price[active].tolist(), buy_qty[active].tolist(),
+                   b.bid_price[active].tolist(), sell_qty[active].tolist())
+        for t, ask_prices, ask_qty, bid_prices, bid_qty in rows:
+            # the orders the strategy places: whole levels, skipping any that breach its
+            # limit, or with `partial` as much of each level as the limit leaves room for
+            cur = pos
+            buys = []
+            for price, qty in zip(ask_prices, ask_qty):
+                if partial and qty > rule.limit - cur:
+                    qty = max(rule.limit - cur, 0)
+                if qty and cur + qty <= rule.limit:
+                    cur += qty
+                    buys.append((price, qty))
+            up = cur - pos
+            sells = []
+            for price, qty in zip(bid_prices, bid_qty):
+                if partial and qty > rule.limit + cur:
+                    qty = max(rule.limit + cur, 0)
+                if qty and cur - qty >= -rule.limit:
+                    cur -= qty
+                    sells.append((price, qty))
+            if pos + up > exchange_limit or pos - (up - (cur - pos)) < -exchange_limit:
+                rejected += 1
+                continue
+            # each order takes from the best level first, so after a skipped
+            # level a deeper order fills at the skipped level's better price
+            flow, n = 0.0, 0
+            for orders, prices, left, sign in ((buys, ask_prices, ask_qty, 1), (sells, bid_prices, bid_qty, -1)):
+                for limit_price, qty in orders:
+                    for j, price in enumerate(prices):
+                        if qty == 0 or sign * (price - limit_price) > 0:
+                            break
+                        take = left[j] if left[j] < qty else qty
+                        if take:
+                            left[j] -= take
+                            qty -= take
+                            flow -= sign * price * take
+                            n += 1
+            delta[t] = cur - pos
+            cash[t] = flow
+            fills[t] = n
+            pos = cur
+    return ProductRun(delta, cash, int(fills.sum()), rejected, position + int(delta.sum()), float(cash.sum()))
+
+
+def _marks(mid: np.ndarray, last: float) -> np.ndarray:
+    """The mid carried forward over missing (NaN) ticks, `last` before the first."""
+    valid = ~np.isnan(mid)
+    idx = np.where(valid, np.arange(len(mid)), -1)
+    np.maximum.accumulate(idx, out=idx)
+    return np.where(idx >= 0, mid[np.maximum(idx, 0)], last)
+
+
+class BandResult:
+    """What BacktestResult reports, for a run of band rules."""
+
+    def __init__(self):
+        self.timestamps: List[np.ndarray] = []
+        self.pnl: List[np.ndarray] = []
+        self.product_pnl: Dict[str, float] = {}
+        self.positions: Dict[str, int] = {}
+        self.cash: Dict[str, float] = {}
+        self.fills = 0
+        self.rejected: Dict[str, int] = {}
+
+    @property
+    def final_pnl(self) -> float:
+        return float(self.pnl[-1][-1]) if self.pnl and len(self.pnl[-1]) else 0.0
+
+    def summary(self) -> str:
+        lines = ["%-28s %12s %6s" % ("product", "pnl", "pos")]
+        for product in sorted(self.product_pnl):
+            lines.append("%-28s %12.1f %6d" % (product, self.product_pnl[product], self.positions.get(product, 0)))
+        lines.append("%-28s %12.1f" % ("total", self.final_pnl))
+        lines.append("%d ticks, %d fills" % (sum(len(t) for t in self.timestamps), self.fills))
+        if self.rejected:
+            lines.append("rejected for position limit: " + ", ".join(
+                "%s x%d" % item for item in sorted(self.rejected.items())))
+        return "\n".join(lines)
+
+
+def run(days: Union[DayColumns, Iterable[DayColumns]], rules: Dict[str, BandRule],
+        limits: Optional[Dict[str, int]] = None, partial: bool = False) -> BandResult:
+    """Backtest `rules` over a day, or over consecutive chunks of one (synthetic.SyntheticDay.chunks()).
+
+    Products in `rules` the day doesn't list are skipped; `partial` is as in simulate().
+    """
+    limits = POSITION_LIMITS if limits is None else limits
+    result = BandResult()
+    last_mid: Dict[str, float] = {}
+    for day in [days] if isinstance(days, DayColumns) else days:
+        total = np.zeros(len(day))
+        for product, rule in rules.items():
+            if product not in day.book_products:
+                continue
+            b = book(day, product)
+            r = simulate(rule, b, limits.get(product, rule.limit), result.positions.get(product, 0), partial)
+            marks = _marks(b.mid, last_mid.get(product, 0.0))
+            if len(marks):
+                last_mid[product] = float(marks[-1])
+            cash = result.cash.get(product, 0.0) + np.cumsum(r.cash)
+            positions = result.positions.get(product, 0) + np.cumsum(r.delta)
+            total += cash + positions * marks
+            if product in result.cash or r.fills > 0:
+                result.cash[product] = r.cash_total + result.cash.get(product, 0.0)
+                result.positions[product] = r.position
+                result.product_pnl[product] = result.cash[product] + r.position * last_mid.get(product, 0.0)
+            result.fills += r.fills
+            if r.rejected:
+                result.rejected[product] = result.rejected.get(product, 0) + r.rejected
+        result.timestamps.append(np.asarray(day.timestamps))
+        result.pnl.append(total)
+    return result
+
+
+def simulate_many(buy_below: np.ndarray, sell_above: np.ndarray, limit: int, b: Book,
+                  exchange_limit: int, partial: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Final (position, cash) of many bands on one book, from flat.
+
+    The same rule as simulate(), stepped through the day once with every band
+    a lane of the arrays.  A level's volume or nothing is taken per lane (with
+    `partial`, as much of it as the limit allows), and since orders fill from
+    the best level the cost of a tick's buys is that of sweeping the asks for
+    their total.
+    """
+    lo = np.asarray(buy_below, float)
+    hi = np.asarray(sell_above, float)
+    pos = np.zeros(len(lo), np.int64)
+    cash = np.zeros(len(lo))
+    # a tick matters if its best ask is under some band's buy_below or its best bid over some sell_above
+    live = ((b.ask_price[:, 0] < lo.max()) & (b.ask_volume[:, 0] > 0)) | \
+           ((b.bid_price[:, 0] > hi.min()) & (b.bid_volume[:, 0] > 0))
+    t = np.flatnonzero(live)
+    rows = zip(b.ask_price[t].tolist(), b.ask_volume[t].tolist(), b.bid_price[t].tolist(), b.bid_volume[t].tolist())
+    for ask_prices, ask_volumes, bid_prices, bid_volumes in rows:
+        cur = pos.copy()
+        for price, volume in zip(ask_prices, ask_volumes):
+            if volume:
+                if partial:
+                    cur += (price < lo) * np.clip(limit - cur, 0, volume)
+                else:
+                    cur += ((price < lo) & (cur + volume <= limit)) * volume
+        up = cur - pos
+        for price, volume in zip(bid_prices, bid_volumes):
+            if volume:
+                if partial:
+                    cur -= (price > hi) * np.clip(limit + cur, 0, volume)
+                else:
+                    cur -= ((price > hi) & (cur - volume >= -limit)) * volume
+        down = up - (cur - pos)
+        flow = np.zeros(len(lo))
+        for prices, volumes, left, sign in ((ask_prices, ask_volumes, up, -1), (bid_prices, bid_volumes, down, 1)):
+            for price, volume in zip(prices, volumes):
+                take = np.minimum(left, volume)
+                flow += sign * price * take
+                left = left - take
+        ok = (pos + up <= exchange_limit) & (pos - down >= -exchange_limit)
+        cash += np.where(ok, flow, 0.0)
+        pos = np.where(ok, cur, pos)
+    return pos, cash
+
+
+def grid(day: DayColumns, product: str, buy_below: Sequence[float], sell_above: Sequence[float],
+         limit: int, limits: Optional[Dict[str, int]] = None, partial: bool = False) -> List[Tuple[BandRule, float]]:
+    """(rule, final PnL) for every band on one product, best first."""
+    limits = POSITION_LIMITS if limits is None else limits
+    b = book(day, product)
+    marks = _marks(b.mid, 0.0)
+    final_mark = float(marks[-1]) if len(marks) else 0.0
+    rules = [BandRule(lo, hi, limit) for lo in buy_below for hi in sell_above]
+    if not rules:
+        return []
+    pos, cash = simulate_many(np.array([r.buy_below for r in rules]), np.array([r.sell_above for r in rules]),
+                              limit, b, limits.get(product, limit), partial)
+    pnl = cash + pos * final_mark
+    return sorted(zip(rules, pnl.tolist()), key=lambda item: item[1], reverse=True)
+
+
+def _values(spec: str) -> List[float]:
+    if ":" in spec:
+        lo, hi, step = (float(v) for v in spec.split(":"))
+        return list(np.arange(lo, hi + step / 2, step))
+    return [float(v) for v in spec.split(",")]
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Vectorized backtest of band rules.")
+    parser.add_argument("day", help="prices CSV or a tickstore directory")
+    parser.add_argument("--product", help="grid search this product's band")
+    parser.add_argument("--buy-below", help="v1,v2,... or lo:hi:step")
+    parser.add_argument("--sell-above", help="v1,v2,... or lo:hi:step")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--partial", action="store_true",
+                        help="take the level that crosses the limit partially, as book.take_orders does")
+    args = parser.parse_args(argv)
+    day = TickStore(args.day) if Path(args.day).is_dir() else DayColumns(*read_day(args.day))
+
+    if not args.product:
+        print(run(day, STRATEGY_RULES, partial=args.partial).summary())
+        return
+    default = STRATEGY_RULES.get(args.product, BandRule(0, 0, POSITION_LIMITS.get(args.product, 0)))
+    lows = _values(args.buy_below) if args.buy_below else [default.buy_below]
+    highs = _values(args.sell_above) if args.sell_above else [default.sell_above]
+    limit = args.limit if args.limit is not None else default.limit
+    results = grid(day, args.product, lows, highs, limit, partial=args.partial)
+    print("%10s %10s %12s" % ("buy_below", "sell_above", "pnl"))
+    for rule, pnl in results[:args.top]:
+        print("%10g %10g %12.1f" % (rule.buy_below, rule.sell_above, pnl))
+    print("%d bands" % len(results))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,231 @@
+"""Executable basket spreads: what the baskets and their components really trade at, size by size.
+
+    python basket.py data/r2d1 --max-size 60
+    python basket.py prices_round_2_day_1.csv --fixed 10
+
+The basket strategies price the synthetic from component mids, or from the
+touch, and then trade a fixed 10.  Both overstate the edge once size walks
+past the first level.  Here every book involved is walked for every size
+from 1 to `max_size` baskets at once: taking q units of a side costs the
+full levels before the one that completes q plus part of that one, which
+is each level's volume clipped against what the levels before it leave of
+q.  Both baskets go through the same arrays, so the whole table is one
+pass:
+
+    books = snapshots(state.order_depths)
+    c = basket_curves(books, 60)["PICNIC_BASKET2"]
+    room = basket_room("PICNIC_BASKET2", state.position, buy_basket=False)
+    n = int(best_size(c.sell_basket, room))   # sell n baskets, buy 4n CROISSANTS and 2n JAMS
+    if n:
+        result.update(arb_orders(books, "PICNIC_BASKET2", n, buy_basket=False))
+
+Sizes past the depth of any book involved are NaN.  The same works on a
+whole day's tickstore columns (day_curves), which is what the CLI uses to
+compare sizing to where the edge runs out against a fixed size.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backtest import POSITION_LIMITS
+from book import BookSnapshot
+from datamodel import Order
+from tickstore import DayColumns, TickStore, read_day
+
+BASKETS: Dict[str, Dict[str, int]] = {
+    "PICNIC_BASKET1": {"CROISSANTS": 6, "JAMS": 3, "DJEMBES": 1},
+    "PICNIC_BASKET2": {"CROISSANTS": 4, "JAMS": 2},
+}
+
+
+class BasketCurve(NamedTuple):
+    """Totals for 1..max_size baskets, along the last axis."""
+    basket_bid: np.ndarray      # proceeds of selling n baskets into the bids
+    basket_ask: np.ndarray      # cost of buying n baskets from the asks
+    synthetic_bid: np.ndarray   # proceeds of selling n baskets' worth of components
+    synthetic_ask: np.ndarray   # cost of buying n baskets' worth of components
+
+    @property
+    def buy_basket(self) -> np.ndarray:
+        """Total edge of buying n baskets and selling the components."""
+        return self.synthetic_bid - self.basket_ask
+
+    @property
+    def sell_basket(self) -> np.ndarray:
+        """Total edge of selling n baskets and buying the components."""
+        return self.basket_bid - self.synthetic_ask
+
+
+def take_cost(prices: np.ndarray, volumes: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+    """Total price of taking each of `quantities` from best-first levels, NaN past the depth.
+
+    `prices`/`volumes` are (..., levels) with zero volume on missing levels;
+    `quantities` is (..., Q) and broadcasts against their leading axes.
+    """
+    prices = np.asarray(prices, dtype=float)
+    volumes = np.asarray(volumes, dtype=float)
+    quantities = np.asarray(quantities, dtype=float)
+    depth = np.cumsum(volumes, axis=-1)
+    # each level gives what is left of q after the levels before it, up to its volume
+    taken = np.minimum(np.maximum(quantities[..., None] - (depth - volumes)[..., None, :], 0), volumes[..., None, :])
+    total = np.einsum("...ql,...l->...q", taken, prices)
+    return np.where(quantities <= depth[..., -1:], total, np.nan)
+
+
+def curves(sides: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]], max_size: int,
+           baskets: Optional[Dict[str, Dict[str, int]]] = None) -> Dict[str, BasketCurve]:
+    """BasketCurves from each product's (bid_price, bid_volume, ask_price, ask_volume) arrays.
+
+    The arrays are (..., levels) with any leading shape shared by all
+    products; baskets with a product missing from `sides` are left out.
+    """
+    baskets = BASKETS if baskets is None else baskets
+    sizes = np.arange(1, max_size + 1)
+    rows: List[Tuple[np.ndarray, np.ndarray]] = []
+    weights: List[int] = []
+    layout: Dict[str, int] = {}
+    for basket, components in baskets.items():
+        if basket not in sides or any(c not in sides for c in components):
+            continue
+        layout[basket] = len(rows)
+        for product, weight in [(basket, 1)] + list(components.items()):
+            bp, bv, ap, av = sides[product]
+            rows += [(bp, bv), (ap, av)]
+            weights += [weight, weight]
+    if not rows:
+        return {}
+    if all(isinstance(p, list) for p, _ in rows):   # one tick's snapshot lists
+        width = max(1, max(len(p) for p, _ in rows))
+        prices = np.array([p + [0] * (width - len(p)) for p, _ in rows], dtype=float)
+        volumes = np.array([v + [0] * (width - len(v)) for _, v in rows], dtype=float)
+    else:
+        width = max(1, max(np.shape(p)[-1] for p, _ in rows))
+        prices = np.stack([_pad(p, width) for p, _ in rows], axis=-2)
+        volumes = np.stack([_pad(v, width) for _, v in rows], axis=-2)
+    totals = take_cost(prices, volumes, np.array(weights)[:, None] * sizes)
+
+    result = {}
+    for basket, first in layout.items():
+        components = slice(first + 2, first + 2 + 2 * len(baskets[basket]))
+        legs = totals[..., components, :]
+        result[basket] = BasketCurve(totals[..., first, :], totals[..., first + 1, :],
+                                     legs[..., 0::2, :].sum(axis=-2), legs[..., 1::2, :].sum(axis=-2))
+    return result
+
+
+def _pad(values, width: int) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    missing = width - values.shape[-1]
+    if not missing:
+        return values
+    return np.concatenate([values, np.zeros(values.shape[:-1] + (missing,))], axis=-1)
+
+
+def basket_curves(books: Dict[str, BookSnapshot], max_size: int,
+                  baskets: Optional[Dict[str, Dict[str, int]]] = None) -> Dict[str, BasketCurve]:
+    """BasketCurves for one tick's snapshots, each total shaped (max_size,)."""
+    baskets = BASKETS if baskets is None else baskets
+    needed = set(baskets).union(*baskets.values())
+    sides = {product: (book.bid_prices, book.bid_volumes, book.ask_prices, book.ask_volumes)
+             for product, book in books.items() if product in needed}
+    return curves(sides, max_size, baskets)
+
+
+def day_curves(day: DayColumns, max_size: int, start: int = 0, stop: Optional[int] = None,
+               baskets: Optional[Dict[str, Dict[str, int]]] = None) -> Dict[str, BasketCurve]:
+    """BasketCurves for ticks start:stop of a day, each total shaped (ticks, max_size)."""
+    rows = slice(start, stop)
+    sides = {product: tuple(day.column(name, product)[rows] for name in
+                            ("bid_price", "bid_volume", "ask_price", "ask_volume"))
+             for product in day.book_products}
+    return curves(sides, max_size, baskets)
+
+
+def best_size(edge: np.ndarray, room, min_edge: float = 0.0) -> np.ndarray:
+    """The size (1-based) with the most total edge above `min_edge` per basket, at most `room`; 0 if none.
+
+    Works along the last axis, so a day's (ticks, max_size) edges give one
+    size per tick.
+    """
+    edge = np.asarray(edge, dtype=float)
+    sizes = np.arange(1, edge.shape[-1] + 1)
+    net = edge - min_edge * sizes
+    net = np.where(np.isnan(net) | (sizes > np.asarray(room)[..., None]), -np.inf, net)
+    best = net.argmax(axis=-1)
+    return np.where(np.take_along_axis(net, best[..., None], axis=-1)[..., 0] > 0, best + 1, 0)
+
+
+def basket_room(basket: str, position: Dict[str, int], buy_basket: bool,
+                limits: Optional[Dict[str, int]] = None,
+                baskets: Optional[Dict[str, Dict[str, int]]] = None) -> int:
+    """How many baskets the position limits allow, legs included."""
+    limits = POSITION_LIMITS if limits is None else limits
+    components = (BASKETS if baskets is None else baskets)[basket]
+    sign = 1 if buy_basket else -1
+    allowed = limits[basket] - sign * position.get(basket, 0)
+    for product, weight in components.items():
+        allowed = min(allowed, (limits[product] + sign * position.get(product, 0)) // weight)
+    return max(0, allowed)
+
+
+def _worst_price(prices: Sequence[int], volumes: Sequence[int], quantity: int) -> int:
+    taken = 0
+    for price, volume in zip(prices, volumes):
+        taken += volume
+        if taken >= quantity:
+            return price
+    raise ValueError("book too thin for %d" % quantity)
+
+
+def arb_orders(books: Dict[str, BookSnapshot], basket: str, size: int, buy_basket: bool,
+               baskets: Optional[Dict[str, Dict[str, int]]] = None) -> Dict[str, List[Order]]:
+    """One order per product that takes `size` baskets against their components.
+
+    Each order is priced at the deepest level it needs; orders fill from the
+    best level, so that walks the book exactly as the curve priced it.
+    """
+    components = (BASKETS if baskets is None else baskets)[basket]
+    legs = [(basket, size if buy_basket else -size)]
+    legs += [(product, -weight * size if buy_basket else weight * size) for product, weight in components.items()]
+    orders = {}
+    for product, quantity in legs:
+        book = books[product]
+        if quantity > 0:
+            price = _worst_price(book.ask_prices, book.ask_volumes, quantity)
+        else:
+            price = _worst_price(book.bid_prices, book.bid_volumes, -quantity)
+        orders[product] = [Order(product, price, quantity)]
+    return orders
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Executable basket spreads over a day, by size.")
+    parser.add_argument("day", help="prices CSV or a tickstore directory")
+    parser.add_argument("--max-size", type=int, default=60)
+    parser.add_argument("--fixed", type=int, default=10, help="the fixed size to compare against")
+    parser.add_argument("--chunk", type=int, default=2000)
+    args = parser.parse_args(argv)
+    day = TickStore(args.day) if Path(args.day).is_dir() else DayColumns(*read_day(args.day))
+
+    # per basket side: ticks with edge, baskets traded, edge sized to the curve, edge at the fixed size
+    totals: Dict[str, np.ndarray] = {}
+    for lo in range(0, len(day), args.chunk):
+        for basket, c in day_curves(day, args.max_size, lo, lo + args.chunk).items():
+            for side, edge in (("buy", c.buy_basket), ("sell", c.sell_basket)):
+                n = best_size(edge, args.max_size)
+                sized = np.where(n > 0, np.take_along_axis(edge, np.maximum(n - 1, 0)[:, None], axis=1)[:, 0], 0.0)
+                # a fixed-size strategy trades whenever the touch shows edge
+                fixed = np.where(edge[:, 0] > 0, edge[:, min(args.fixed, args.max_size) - 1], 0.0)
+                row = np.array([(n > 0).sum(), n.sum(), sized.sum(), np.nansum(fixed)])
+                key = basket + " " + side
+                totals[key] = totals.get(key, 0) + row
+    print("%-22s %8s %9s %12s %12s" % ("basket side", "ticks", "avg size", "edge sized", "edge at %d" % args.fixed))
+    for key, (ticks, traded, sized, fixed) in totals.items():
+        print("%-22s %8d %9.1f %12.1f %12.1f" % (key, ticks, traded / max(ticks, 1), sized, fixed))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
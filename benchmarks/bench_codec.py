@@ -0,0 +1,94 @@
+"""traderData round-trip cost: jsonpickle vs codec.Codec.
+
+    python benchmarks/bench_codec.py
+
+For each structure the traders keep in traderData, times encode + decode and
+reports the payload size of both formats.
+"""
+import random
+import sys
+import timeit
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import jsonpickle
+
+from codec import Codec, Float, FloatArray, Int, Mapping, Records, Str
+
+STRIKES = [9500, 9750, 10000, 10250, 10500]
+
+
+def sample_kelp_history():
+    return {"kelp_history": [2030 + random.randint(-6, 6) / 2 for _ in range(20)]}
+
+
+def sample_open_trades():
+    signals = ["market_long", "market_short", "conversion_long", "conversion_short"]
+    trades = []
+    for _ in range(6):
+        key = random.choice(signals)
+        trades.append({"dir": "long" if key.endswith("long") else "short",
+                       "entry": 640 + random.randint(0, 40) + random.choice([0.0, 0.5]),
+                       "qty": random.randint(1, 10), "entry_ts": random.randint(0, 99) * 100,
+                       "peak_pnl": random.random() * 50, "signal_key": key})
+    return {"open_trades": trades, "cooldowns": {s: random.randint(0, 9) * 1000 for s in signals[:2]}}
+
+
+def sample_historical_data():
+    rows = []
+    for _ in range(60):
+        strike = random.choice(STRIKES)
+        rows.append({"product": "VOLCANIC_ROCK_VOUCHER_%d" % strike, "m": random.gauss(0, 0.03),
+                     "iv": 0.01 + random.random() * 0.01, "strike": strike,
+                     "S": 10000 + random.randint(-200, 200) / 2, "T": random.randint(3, 7),
+                     "V": random.randint(5, 700) / 2})
+    return {"historical_data": rows, "rock_prices": [10000 + random.randint(-100, 100) / 2 for _ in range(30)]}
+
+
+def sample_entry_book():
+    return {"entry_book": {"VOLCANIC_ROCK_VOUCHER_%d" % k: {"price": random.randint(5, 700) / 2,
+                                                            "timestamp": random.randint(0, 999) * 100}
+                           for k in STRIKES}}
+
+
+CASES = [
+    ("kelp_history", sample_kelp_history, Codec({"kelp_history": FloatArray("f")})),
+    ("open_trades", sample_open_trades, Codec({
+        "open_trades": Records({"dir": Str(), "entry": Float("f"), "qty": Int("h"), "entry_ts": Int("i"),
+                                "peak_pnl": Float(), "signal_key": Str()}),
+        "cooldowns": Mapping(Int("i")),
+    })),
+    ("historical_data", sample_historical_data, Codec({
+        "historical_data": Records({"product": Str(), "m": Float(), "iv": Float(), "strike": Int("i"),
+                                    "S": Float("f"), "T": Int("h"), "V": Float("f")}),
+        "rock_prices": FloatArray("f"),
+    })),
+    ("entry_book", sample_entry_book, Codec({
+        "entry_book": Mapping(Records({"price": Float("f"), "timestamp": Int("i")})),
+    })),
+]
+
+
+def per_call_us(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main(number: int = 2000):
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    random.seed(0)
+    print("%-16s %12s %12s %8s %10s %10s" % ("structure", "jsonpickle", "codec", "speedup", "jp bytes", "codec B"))
+    for name, make, codec in CASES:
+        data = make()
+        jp = jsonpickle.encode(data)
+        packed = codec.encode(data)
+        assert codec.decode(packed) == jsonpickle.decode(jp)
+        jp_us = per_call_us(lambda: jsonpickle.decode(jsonpickle.encode(data)), number)
+        codec_us = per_call_us(lambda: codec.decode(codec.encode(data)), number)
+        print("%-16s %10.1fus %10.1fus %7.1fx %10d %10d"
+              % (name, jp_us, codec_us, jp_us / codec_us, len(jp), len(packed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Per-call cost of the helper functions copied between strategy files.
+
+    python benchmarks/bench_helpers.py                 # time everything, compare to the baseline
+    python benchmarks/bench_helpers.py --save          # record the current timings as the baseline
+    python benchmarks/bench_helpers.py calculate_rolling_vol approximate_iv
+
+Every definition of a helper is found in the strategy files (module level,
+Trader method or nested inside run()), and each one is timed as a variant on
+the same inputs: a day's worth of calls at the sizes the traders see.  Methods
+that keep state (rolling windows) get a fresh Trader for every repeat.  The
+library rewrites (rolling, options) are timed alongside the copies, as is the
+original compute_rock_momentum, which no strategy defines any more.
+
+Each variant's outputs are checked against the first one's, and its time is
+compared to helpers_baseline.json next to this file.  A variant more than
+--tolerance slower than its baseline is flagged and the exit status is 1.
+Times are compared as ratios to a calibration loop timed alongside them
+("relative"), which absorbs most of the machine's speed, but a baseline is
+best re-recorded on the machine that checks against it.
+"""
+import argparse
+import ast
+import json
+import math
+import random
+import sys
+import textwrap
+import time
+import warnings
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from backtest import load_module
+from datamodel import OrderDepth
+from options import bs_call, implied_vol
+from rolling import RollingLinearFit
+
+BASELINE = Path(__file__).resolve().parent / "helpers_baseline.json"
+CALLS = 1000
+REPEAT = 9
+STRIKES = [9500, 9750, 10000, 10250, 10500]
+
+
+class Variant(NamedTuple):
+    name: str
+    factory: Callable[[], Callable]  # a fresh callable per repeat
+
+
+# === Inputs: one argument tuple per call ===
+
+def _rock_walk(rng, n):
+    prices = [10000.0]
+    for _ in range(n - 1):
+        prices.append(prices[-1] + rng.choice([-1.0, -0.5, 0.0, 0.0, 0.5, 1.0]))
+    return prices
+
+
+def _black_scholes(S, K, T, sigma):
+    d1 = (math.log(S / K) + 0.5 * sigma * sigma * T) / (sigma * math.sqrt(T))
+    d2 = d1 - sigma * math.sqrt(T)
+    return S * 0.5 * math.erfc(-d1 / math.sqrt(2)) - K * 0.5 * math.erfc(-d2 / math.sqrt(2))
+
+
+def _voucher_quotes(rng, n):
+    rows = []
+    for S in _rock_walk(rng, n):
+        K = rng.choice(STRIKES)
+        T = rng.randint(3, 7)
+        price = round(2 * _black_scholes(S, K, T, rng.uniform(0.01, 0.02))) / 2
+        rows.append((max(price, max(S - K, 0.0) + 0.5), S, K, T))
+    return rows
+
+
+def _depth(rng, mid):
+    depth = OrderDepth()
+    bid = int(mid) - rng.randint(1, 3)
+    ask = int(mid) + rng.randint(1, 3)
+    for i in range(3):
+        depth.buy_orders[bid - i] = rng.randint(1, 30)
+        depth.sell_orders[ask + i] = -rng.randint(1, 30)
+    return depth
+
+
+def inputs(helper: str, n: int = CALLS) -> List[tuple]:
+    rng = random.Random(0)
+    if helper == "calculate_rolling_vol":
+        return [(p,) for p in _rock_walk(rng, n)]
+    if helper == "calculate_z_score":
+        return [(p, p + rng.gauss(0, 2)) for p in _rock_walk(rng, n)]
+    if helper == "dynamic_trade_size":
+        return [(rng.gauss(0, 20), rng.uniform(5, 35)) for _ in range(n)]
+    if helper == "approximate_iv":
+        # only quotes whose vol is inside the old bisection's [0.01, 2.0] bracket:
+        # outside it the strategy copies clamp and legitimately disagree
+        quotes = []
+        while len(quotes) < n:
+            for quote in _voucher_quotes(rng, n):
+                if 0.011 < float(implied_vol(*quote).iv) < 1.99:
+                    quotes.append(quote)
+        return quotes[:n]
+    if helper == "black_scholes_call":
+        return [(S, K, T, rng.uniform(0.01, 0.02)) for _, S, K, T in _voucher_quotes(rng, n)]
+    if helper == "compute_rock_momentum":
+        # the strategy kept the last ROCK_HISTORY (20) mids
+        prices = _rock_walk(rng, n)
+        return [(prices[max(0, i - 19):i + 1],) for i in range(n)]
+    if helper in ("average_price", "estimate_volatility"):
+        return [(_depth(rng, 2030 + rng.randint(-5, 5)),) for _ in range(n)]
+    raise KeyError(helper)
+
+
+HELPERS = ["calculate_rolling_vol", "calculate_z_score", "dynamic_trade_size", "approximate_iv",
+           "black_scholes_call", "compute_rock_momentum", "estimate_volatility", "average_price"]
+TOLERANCE = {"approximate_iv": 1e-4}  # bisection vs Halley
+
+
+# === Variants ===
+
+def compute_rock_momentum(prices):
+    """As Round3Final had it before rolling.RollingLinearFit replaced it."""
+    if len(prices) < 5:
+        return 0
+    x = np.arange(len(prices))
+    y = np.array(prices)
+    slope, _ = np.polyfit(x, y, 1)
+    return slope
+
+
+def _rolling_momentum():
+    fit = RollingLinearFit(20)
+
+    def momentum(prices):
+        fit.push(prices[-1])
+        return fit.slope if len(fit) >= 5 else 0
+    return momentum
+
+
+def _bs_call_scalar(S, K, T, sigma):
+    return float(bs_call(S, K, T, sigma))
+
+
+def _implied_vol_scalar(C_market, S, K, T):
+    iv = float(implied_vol(C_market, S, K, T).iv)
+    return None if math.isnan(iv) else iv
+
+
+# helpers no strategy file defines any more; timed first, as the reference
+REFERENCES = {
+    "compute_rock_momentum": [Variant("Round3Final (before RollingLinearFit)", lambda: compute_rock_momentum)],
+}
+# library rewrites, timed after the copies
+LIBRARY = {
+    "compute_rock_momentum": [Variant("rolling.RollingLinearFit", _rolling_momentum)],
+    "black_scholes_call": [Variant("options.bs_call", lambda: _bs_call_scalar)],
+    "approximate_iv": [Variant("options.implied_vol", lambda: _implied_vol_scalar)],
+}
+
+
+def _strategy_files() -> List[Path]:
+    return sorted(p for p in ROOT.rglob("*.py")
+                  if "benchmarks" not in p.parts and not any(part.startswith(".") for part in p.parts))
+
+
+def _definitions(path: Path, names) -> List[tuple]:
+    """(name, enclosing, source) for every def of one of `names` in `path`."""
+    text = path.read_text()
+    found = []
+
+    def visit(node, enclosing):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.FunctionDef) and child.name in names:
+                found.append((child.name, enclosing, ast.get_source_segment(text, child)))
+            elif isinstance(child, (ast.FunctionDef, ast.ClassDef)):
+                visit(child, enclosing + [child])
+            else:
+                visit(child, enclosing)
+    visit(ast.parse(text), [])
+    return found
+
+
+def _bind(module, enclosing, name, source) -> Callable[[], Callable]:
+    if not enclosing:
+        fn = getattr(module, name)
+        return lambda: fn
+    if len(enclosing) == 1 and isinstance(enclosing[0], ast.ClassDef):
+        cls = getattr(module, enclosing[0].name)
+        return lambda: getattr(cls(), name)
+    # nested inside a method: compile it on its own against the module's globals
+    namespace = dict(vars(module))
+    exec(compile(textwrap.dedent(source), module.__file__, "exec"), namespace)
+    fn = namespace[name]
+    return lambda: fn
+
+
+def discover(helpers: List[str]) -> Dict[str, List[Variant]]:
+    variants: Dict[str, List[Variant]] = {h: [] for h in helpers}
+    for path in _strategy_files():
+        defs = _definitions(path, set(helpers))
+        if not defs:
+            continue
+        label = str(path.relative_to(ROOT))
+        try:
+            module = load_module(path)
+        except Exception as e:
+            print("skipping %s: %s" % (label, e), file=sys.stderr)
+            continue
+        for name, enclosing, source in defs:
+            where = label + "".join(":" + n.name for n in enclosing if isinstance(n, ast.FunctionDef))
+            variants[name].append(Variant(where, _bind(module, enclosing, name, source)))
+    for helper in helpers:
+        variants[helper] = REFERENCES.get(helper, []) + variants[helper] + LIBRARY.get(helper, [])
+    return variants
+
+
+# === Timing ===
+
+def _calibration(rounds: int = 200) -> float:
+    """Seconds for a fixed mix of interpreter and small-NumPy work."""
+    values = [10000.0 + 0.5 * (i % 7) for i in range(20)]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        total = 0.0
+        for v in values:
+            total += math.sqrt(v) * 0.5
+        np.std(values)
+    return time.perf_counter() - start
+
+
+class Timing(NamedTuple):
+    us: float        # best time per call
+    relative: float  # median time per call over the calibration loop's, timed alongside
+
+
+def time_variants(variants: List[Variant], args: List[tuple], repeat: int = REPEAT) -> Dict[str, object]:
+    """A Timing for each variant, or the exception it raised.
+
+    The variants take turns within every round, each round also times the
+    calibration loop, and the regression check uses the ratio to it: the
+    machine's speed drifts by tens of percent from one moment to the next,
+    and the ratio doesn't.
+    """
+    raw: Dict[str, List[float]] = {v.name: [] for v in variants}
+    ratio: Dict[str, List[float]] = {v.name: [] for v in variants}
+    failed: Dict[str, Exception] = {}
+    for _ in range(repeat):
+        cal = _calibration()
+        for v in variants:
+            if v.name in failed:
+                continue
+            try:
+                fn = v.factory()
+                start = time.perf_counter()
+                for a in args:
+                    fn(*a)
+                elapsed = (time.perf_counter() - start) / len(args)
+            except Exception as e:
+                failed[v.name] = e
+                continue
+            raw[v.name].append(elapsed * 1e6)
+            ratio[v.name].append(elapsed / cal * 1e3)
+    return {v.name: failed.get(v.name) or Timing(min(raw[v.name]), float(np.median(ratio[v.name])))
+            for v in variants}
+
+
+def _same(a, b, tol: float) -> bool:
+    if a is None or b is None:
+        return a is b
+    return abs(float(a) - float(b)) <= tol * max(1.0, abs(float(b)))
+
+
+def outputs_match(factory, reference, args, tol: float) -> bool:
+    fn, ref = factory(), reference()
+    return all(_same(fn(*a), ref(*a), tol) for a in args)
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the copied helper functions.")
+    parser.add_argument("helpers", nargs="*", default=HELPERS)
+    parser.add_argument("--save", action="store_true", help="write the timings to the baseline file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="slowdown vs baseline that counts as a regression")
+    parser.add_argument("--calls", type=int, default=CALLS)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args(argv)
+    unknown = [h for h in args.helpers if h not in HELPERS]
+    if unknown:
+        parser.error("unknown helper(s): " + ", ".join(unknown))
+
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    saved: Dict[str, Dict[str, dict]] = {}
+    regressions = 0
+    for helper, variants in discover(args.helpers).items():
+        calls = inputs(helper, args.calls)
+        print("%s (%d calls)" % (helper, len(calls)))
+        print("  %-46s %10s %10s %8s  %s" % ("variant", "us/call", "relative", "change", "notes"))
+        saved[helper] = {}
+        results = time_variants(variants, calls, args.repeat)
+        reference = variants[0] if variants else None
+        for v in variants:
+            timing = results[v.name]
+            if isinstance(timing, Exception):
+                print("  %-46s failed: %r" % (v.name, timing))
+                continue
+            notes = []
+            if v is not reference and not isinstance(results[reference.name], Exception) and \
+                    not outputs_match(v.factory, reference.factory, calls, TOLERANCE.get(helper, 1e-9)):
+                notes.append("outputs differ")
+            saved[helper][v.name] = {"us_per_call": round(timing.us, 3), "relative": round(timing.relative, 4)}
+            base = baseline.get(helper, {}).get(v.name)
+            change = ""
+            if base:
+                slower = timing.relative / base["relative"] - 1
+                change = "%+.0f%%" % (100.0 * slower)
+                if slower > args.tolerance:
+                    notes.append("REGRESSION")
+                    regressions += 1
+            print("  %-46s %10.2f %10.4f %8s  %s" % (v.name, timing.us, timing.relative, change, ", ".join(notes)))
+        print()
+
+    if args.save:
+        baseline.update(saved)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print("baseline written to %s" % args.baseline)
+    elif regressions:
+        print("%d regression(s) over %.0f%%" % (regressions, 100 * args.tolerance))
+    return 1 if regressions and not args.save else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
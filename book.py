@@ -0,0 +1,234 @@
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from datamodel import Order, OrderDepth
+
+# A tick's order books, read once and shared.  A merged trader used to call
+# min(sell_orders)/max(buy_orders) and sorted(...items()) again in every branch
+# that looked at a product; snapshots(state.order_depths) builds one
+# BookSnapshot per product and every branch reads that:
+#
+#     books = snapshots(state.order_depths)
+#     book = books["KELP"]
+#     if book.mid is not None and book.best_ask < fair:
+#         ...
+#     for ask, volume in book.asks:      # best first, volumes positive
+#         ...
+#
+# Levels are plain lists: with a handful of levels per side they are cheaper to
+# build and walk than NumPy arrays (see matching.SortedBook).  Most products
+# only need the touch, so a side is sorted only once something walks it.
+#
+# The fixed-fair take branches ("buy every ask below X, sell every bid above
+# Y, within the limit") of round3.py and first3rounds.py go through
+# take_orders() instead of a loop per branch.  TotalRound4.py keeps its own
+# loops over book.asks/book.bids: they skip a level that would cross the
+# limit, where take_orders() takes it partially, so moving them would change
+# its trading.
+#
+#     rules = {"RAINFOREST_RESIN": BandRule.around(10000, 0, 50),
+#              "SQUID_INK": BandRule.around(7000, 300, 50)}
+#     result.update(take_orders(books, rules, state.position))
+#
+# sweep() is the same take over level arrays, any number of rows at once: a
+# tickstore day's book columns, or a stack of products.  For one tick's dict
+# books the arrays cost more to build than the lists cost to walk.
+
+
+class BookSnapshot:
+    """One product's book at one tick: levels best first, volumes positive.
+
+    Best levels are read on construction; the full sorted levels are built the
+    first time something walks them.
+    """
+
+    __slots__ = ("best_bid", "best_ask", "best_bid_volume", "best_ask_volume", "_depth", "_bids", "_asks",
+                 "_bid_depth", "_ask_depth")
+
+    def __init__(self, depth: OrderDepth):
+        buy = depth.buy_orders
+        sell = depth.sell_orders
+        self._depth = depth
+        if buy:
+            self.best_bid: Optional[int] = max(buy)
+            self.best_bid_volume = buy[self.best_bid]
+        else:
+            self.best_bid = None
+            self.best_bid_volume = 0
+        if sell:
+            self.best_ask: Optional[int] = min(sell)
+            self.best_ask_volume = -sell[self.best_ask]
+        else:
+            self.best_ask = None
+            self.best_ask_volume = 0
+        self._bids: Optional[Tuple[List[int], List[int]]] = None
+        self._asks: Optional[Tuple[List[int], List[int]]] = None
+        self._bid_depth: Optional[List[int]] = None
+        self._ask_depth: Optional[List[int]] = None
+
+    def _bid_levels(self) -> Tuple[List[int], List[int]]:
+        if self._bids is None:
+            buy = self._depth.buy_orders
+            prices = sorted(buy, reverse=True)
+            self._bids = prices, [buy[p] for p in prices]
+        return self._bids
+
+    def _ask_levels(self) -> Tuple[List[int], List[int]]:
+        if self._asks is None:
+            sell = self._depth.sell_orders
+            prices = sorted(sell)
+            self._asks = prices, [-sell[p] for p in prices]
+        return self._asks
+
+    @property
+    def bid_prices(self) -> List[int]:
+        return self._bid_levels()[0]
+
+    @property
+    def bid_volumes(self) -> List[int]:
+        return self._bid_levels()[1]
+
+    @property
+    def ask_prices(self) -> List[int]:
+        return self._ask_levels()[0]
+
+    @property
+    def ask_volumes(self) -> List[int]:
+        return self._ask_levels()[1]
+
+    @property
+    def bids(self) -> Iterator[Tuple[int, int]]:
+        return zip(*self._bid_levels())
+
+    @property
+    def asks(self) -> Iterator[Tuple[int, int]]:
+        return zip(*self._ask_levels())
+
+    @property
+    def two_sided(self) -> bool:
+        return self.best_bid is not None and self.best_ask is not None
+
+    @property
+    def spread(self) -> Optional[int]:
+        return self.best_ask - self.best_bid if self.two_sided else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        return (self.best_ask + self.best_bid) / 2 if self.two_sided else None
+
+    @property
+    def bid_depth(self) -> List[int]:
+        """Cumulative bid volume down the levels."""
+        if self._bid_depth is None:
+            self._bid_depth = _cumulative(self.bid_volumes)
+        return self._bid_depth
+
+    @property
+    def ask_depth(self) -> List[int]:
+        if self._ask_depth is None:
+            self._ask_depth = _cumulative(self.ask_volumes)
+        return self._ask_depth
+
+    def vwap(self, buy: bool, size: int) -> Optional[float]:
+        """Average price of taking `size` from the asks (buy) or the bids (sell).
+
+        None if that side holds less than `size`.
+        """
+        prices, volumes = self._ask_levels() if buy else self._bid_levels()
+        if size <= 0:
+            return None
+        left = size
+        cost = 0
+        for price, volume in zip(prices, volumes):
+            take = volume if volume < left else left
+            cost += price * take
+            left -= take
+            if left == 0:
+                return cost / size
+        return None
+
+
+def _cumulative(volumes: List[int]) -> List[int]:
+    out = []
+    total = 0
+    for v in volumes:
+        total += v
+        out.append(total)
+    return out
+
+
+def snapshots(order_depths: Dict[str, OrderDepth]) -> Dict[str, BookSnapshot]:
+    """A BookSnapshot per product for one tick's order depths."""
+    return {product: BookSnapshot(depth) for product, depth in order_depths.items()}
+
+
+class BandRule(NamedTuple):
+    buy_below: float
+    sell_above: float
+    limit: int
+
+    @classmethod
+    def around(cls, fair: float, width: float, limit: int) -> "BandRule":
+        return cls(fair - width, fair + width, limit)
+
+
+def sweep(prices: np.ndarray, volumes: np.ndarray, inside, room, buy: bool = True) -> np.ndarray:
+    """Quantity to take at each level when sweeping one side from the best.
+
+    `prices`/`volumes` are best first along the last axis, one row per product,
+    padded with NaN prices past a row's last level.  A level qualifies if it is
+    strictly below `inside` (asks, buy=True) or above it (bids); `inside` is one
+    price per row, or one per row and level for an edge that grows with depth.
+    Levels are taken in order until one fails or the row's `room` runs out, the
+    last one partially.
+    """
+    prices = np.asarray(prices, dtype=float)
+    inside = np.asarray(inside, dtype=float)
+    if inside.ndim < prices.ndim:
+        # sorted rows against one price: the qualifying levels are a prefix already
+        inside = inside[..., None]
+        qualifies = prices < inside if buy else prices > inside
+    else:
+        qualifies = np.logical_and.accumulate(prices < inside if buy else prices > inside, axis=-1)
+    wanted = volumes * qualifies
+    before = wanted.cumsum(axis=-1) - wanted
+    return np.minimum(wanted, np.maximum(np.asarray(room)[..., None] - before, 0))
+
+
+def take_orders(books: Dict[str, BookSnapshot], rules: Dict[str, BandRule],
+                position: Dict[str, int]) -> Dict[str, List[Order]]:
+    """Orders for every product in `rules` that has a book.
+
+    Each product buys the asks below `buy_below` and sells the bids above
+    `sell_above`, best first, keeping its position within `limit`; the level
+    that would cross the limit is taken partially.  Buys come first and count
+    towards the room left for sells.  Same fills as sweep(), but on the
+    snapshots' lists: a side is only sorted if its best level qualifies.
+    """
+    result: Dict[str, List[Order]] = {}
+    for product, (buy_below, sell_above, limit) in rules.items():
+        book = books.get(product)
+        if book is None:
+            continue
+        held = position.get(product, 0)
+        orders: List[Order] = []
+        if book.best_ask is not None and book.best_ask < buy_below:
+            room = limit - held
+            for price, volume in zip(*book._ask_levels()):
+                if price >= buy_below or room <= 0:
+                    break
+                take = volume if volume < room else room
+                orders.append(Order(product, price, take))
+                room -= take
+                held += take
+        if book.best_bid is not None and book.best_bid > sell_above:
+            room = limit + held
+            for price, volume in zip(*book._bid_levels()):
+                if price <= sell_above or room <= 0:
+                    break
+                take = volume if volume < room else room
+                orders.append(Order(product, price, -take))
+                room -= take
+        result[product] = orders
+    return result
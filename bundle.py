@@ -0,0 +1,137 @@
+"""Inline the repo's helper modules into a single-file submission.
+
+    python bundle.py "April 19/rocks.py" -o submission.py
+
+Several traders import shared helpers from the repo root (rolling, indicators,
+options, codec, history, book, state).  That works locally because
+backtest.load_module puts the root on sys.path, but the competition takes one
+file.  This copies a trader and pastes every root module it imports, and the
+modules those import, above it in dependency order.  The helpers' imports of
+one another are dropped, so the bundle needs only the standard library, numpy,
+jsonpickle and datamodel.  Top-level names defined in more than one of the
+pasted files are reported rather than left to shadow each other.
+"""
+import argparse
+import ast
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+ROOT = Path(__file__).resolve().parent
+PROVIDED = {"datamodel"}  # supplied by the competition, so imported rather than inlined
+
+
+def _helper(name: Optional[str]) -> Optional[Path]:
+    """The repo-root module `name` refers to, or None for anything else."""
+    if not name or name in PROVIDED or "." in name:
+        return None
+    path = ROOT / (name + ".py")
+    return path if path.is_file() else None
+
+
+def _is_main_guard(node: ast.stmt) -> bool:
+    test = getattr(node, "test", None)
+    return (isinstance(node, ast.If) and isinstance(test, ast.Compare)
+            and isinstance(test.left, ast.Name) and test.left.id == "__name__")
+
+
+def _defined(tree: ast.Module) -> Set[str]:
+    """Names a module binds at top level other than by importing them."""
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                names.update(n.id for n in ast.walk(target) if isinstance(n, ast.Name))
+    return names
+
+
+def _strip(path: Path, helper: bool) -> Tuple[str, List[str], Set[str]]:
+    """(source without helper imports, helper modules it imports, names it defines).
+
+    `from helper import a as b` leaves a `b = a` behind.  A helper's own
+    `if __name__ == ...` block is dropped too.
+    """
+    source = path.read_text()
+    tree = ast.parse(source, str(path))
+    top = set(id(node) for node in tree.body)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import) and any(_helper(a.name) for a in node.names):
+            raise ValueError("%s:%d: use 'from <module> import ...' for repo modules so they can be inlined"
+                             % (path, node.lineno))
+        if isinstance(node, ast.ImportFrom) and node.level == 0 and _helper(node.module) and id(node) not in top:
+            raise ValueError("%s:%d: only top-level imports of repo modules can be inlined" % (path, node.lineno))
+
+    lines = source.splitlines()
+    replaced: Dict[int, List[str]] = {}
+    deps: List[str] = []
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.level == 0 and _helper(node.module):
+            if node.module not in deps:
+                deps.append(node.module)
+            aliases = ["%s = %s" % (a.asname, a.name) for a in node.names if a.asname and a.asname != a.name]
+            replaced[node.lineno - 1] = aliases
+            for i in range(node.lineno, node.end_lineno):
+                replaced[i] = []
+        elif helper and _is_main_guard(node):
+            for i in range(node.lineno - 1, node.end_lineno):
+                replaced[i] = []
+    out = []
+    for i, line in enumerate(lines):
+        out.extend(replaced.get(i, [line]))
+    return "\n".join(out).rstrip() + "\n", deps, _defined(tree)
+
+
+def bundle(trader: str) -> str:
+    """The trader file with its repo helper modules inlined above it."""
+    order: List[str] = []
+    parts: Dict[str, Tuple[str, Set[str]]] = {}
+    visiting: Set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in parts:
+            return
+        if name in visiting:
+            raise ValueError("circular import involving %s" % name)
+        visiting.add(name)
+        source, deps, defined = _strip(_helper(name), helper=True)
+        for dep in deps:
+            visit(dep)
+        visiting.discard(name)
+        parts[name] = (source, defined)
+        order.append(name)
+
+    source, deps, defined = _strip(Path(trader), helper=False)
+    for dep in deps:
+        visit(dep)
+
+    owners: Dict[str, str] = {}
+    for name in order + [trader]:
+        for symbol in (parts[name][1] if name in parts else defined):
+            if symbol in owners:
+                raise ValueError("%s is defined in both %s and %s" % (symbol, owners[symbol], name))
+            owners[symbol] = name
+
+    sections = ["# ---- %s.py ----\n%s" % (name, parts[name][0]) for name in order]
+    sections.append("# ---- %s ----\n%s" % (Path(trader).name, source))
+    return "\n\n".join(sections)
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Bundle a trader and its repo helpers into one file.")
+    parser.add_argument("trader")
+    parser.add_argument("-o", "--output", help="write here instead of stdout")
+    args = parser.parse_args(argv)
+
+    text = bundle(args.trader)
+    compile(text, args.output or "<bundle>", "exec")
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
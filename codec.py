@@ -0,0 +1,326 @@
+import base64
+import json
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Tuple
+
+# Compact traderData: a fixed schema says what each key holds, so the payload
+# carries only packed numbers (no type tags or key names per element) and is
+# base64'd into the traderData string.  Typical use:
+#
+#     CODEC = Codec({"kelp_history": FloatArray(), "cooldowns": Mapping(Int())})
+#     data = CODEC.decode(state.traderData)
+#     ...
+#     return result, conversions, CODEC.encode(data)
+
+VERSION = 1
+_LITTLE = sys.byteorder == "little"
+
+
+def _pack_len(out: bytearray, n: int) -> None:
+    # LEB128 varint: lengths under 128 (nearly all of them) cost one byte
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _unpack_len(buf: bytes, pos: int) -> Tuple[int, int]:
+    n = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _pack_array(out: bytearray, typecode: str, values) -> None:
+    arr = array(typecode, values)
+    if not _LITTLE:
+        arr.byteswap()
+    _pack_len(out, len(arr))
+    out += arr.tobytes()
+
+
+def _unpack_array(buf: bytes, pos: int, typecode: str) -> Tuple[array, int]:
+    n, pos = _unpack_len(buf, pos)
+    arr = array(typecode)
+    end = pos + n * arr.itemsize
+    if end > len(buf):
+        raise ValueError("truncated codec payload")
+    arr.frombytes(buf[pos:end])
+    if not _LITTLE:
+        arr.byteswap()
+    return arr, end
+
+
+class Field:
+    """One schema entry: packs a value, or a column of values, into the payload."""
+
+    default: Any = None
+
+    def fresh(self):
+        """A new default value that is safe to mutate."""
+        return _fresh(self.default)
+
+    def pack(self, out: bytearray, value) -> None:
+        raise NotImplementedError
+
+    def unpack(self, buf: bytes, pos: int):
+        raise NotImplementedError
+
+    def pack_many(self, out: bytearray, values) -> None:
+        """A column of values; fields with a tighter column layout override this."""
+        _pack_len(out, len(values))
+        for value in values:
+            self.pack(out, value)
+
+    def unpack_many(self, buf: bytes, pos: int) -> Tuple[list, int]:
+        n, pos = _unpack_len(buf, pos)
+        values = []
+        for _ in range(n):
+            value, pos = self.unpack(buf, pos)
+            values.append(value)
+        return values, pos
+
+
+class _Number(Field):
+    def __init__(self, typecode: str):
+        self.typecode = typecode
+        self._struct = struct.Struct("<" + typecode)
+
+    def pack(self, out, value):
+        out += self._struct.pack(value)
+
+    def unpack(self, buf, pos):
+        return self._struct.unpack_from(buf, pos)[0], pos + self._struct.size
+
+    def pack_many(self, out, values):
+        _pack_array(out, self.typecode, values)
+
+    def unpack_many(self, buf, pos):
+        arr, pos = _unpack_array(buf, pos, self.typecode)
+        return arr.tolist(), pos
+
+
+class Float(_Number):
+    """Float; typecode "f" halves the size and is exact for prices on half ticks."""
+
+    default = 0.0
+
+    def __init__(self, typecode: str = "d"):
+        super().__init__(typecode)
+
+
+class Int(_Number):
+    """Int; pass a narrower array typecode ("i", "h") when the range allows."""
+
+    default = 0
+
+    def __init__(self, typecode: str = "q"):
+        super().__init__(typecode)
+
+
+class Str(Field):
+    """UTF-8 strings; a column is stored as a table of distinct values plus indices."""
+
+    default = ""
+
+    def pack(self, out, value):
+        raw = value.encode("utf-8")
+        _pack_len(out, len(raw))
+        out += raw
+
+    def unpack(self, buf, pos):
+        n, pos = _unpack_len(buf, pos)
+        return buf[pos:pos + n].decode("utf-8"), pos + n
+
+    def pack_many(self, out, values):
+        table: Dict[str, int] = {}
+        codes = [table.setdefault(v, len(table)) for v in values]
+        _pack_len(out, len(table))
+        for v in table:
+            self.pack(out, v)
+        _pack_array(out, "H" if len(table) < 65536 else "I", codes)
+
+    def unpack_many(self, buf, pos):
+        n, pos = _unpack_len(buf, pos)
+        table = []
+        for _ in range(n):
+            v, pos = self.unpack(buf, pos)
+            table.append(v)
+        codes, pos = _unpack_array(buf, pos, "H" if n < 65536 else "I")
+        return [table[c] for c in codes], pos
+
+
+class Bytes(Field):
+    """Raw bytes, length-prefixed."""
+
+    default = b""
+
+    def pack(self, out, value):
+        _pack_len(out, len(value))
+        out += value
+
+    def unpack(self, buf, pos):
+        n, pos = _unpack_len(buf, pos)
+        if pos + n > len(buf):
+            raise ValueError("truncated codec payload")
+        return bytes(buf[pos:pos + n]), pos + n
+
+
+class FloatArray(Field):
+    """A list of floats as one packed array."""
+
+    def __init__(self, typecode: str = "d"):
+        self.typecode = typecode
+        self.default = []
+
+    def pack(self, out, value):
+        _pack_array(out, self.typecode, value)
+
+    def unpack(self, buf, pos):
+        arr, pos = _unpack_array(buf, pos, self.typecode)
+        return arr.tolist(), pos
+
+    def pack_many(self, out, values):
+        # the lengths, then every list's items back to back in one array
+        _pack_array(out, "I", [len(v) for v in values])
+        _pack_array(out, self.typecode, [x for v in values for x in v])
+
+    def unpack_many(self, buf, pos):
+        lengths, pos = _unpack_array(buf, pos, "I")
+        flat, pos = _unpack_array(buf, pos, self.typecode)
+        if len(flat) != sum(lengths):
+            raise ValueError("corrupt array column")
+        items = flat.tolist()
+        values = []
+        start = 0
+        for n in lengths:
+            values.append(items[start:start + n])
+            start += n
+        return values, pos
+
+
+class IntArray(FloatArray):
+    """A list of ints as one packed array."""
+
+    def __init__(self, typecode: str = "q"):
+        super().__init__(typecode)
+
+
+class Records(Field):
+    """A list of flat dicts sharing `fields`, stored column by column.
+
+    Keys missing from a record are written as the column's default, and keys
+    not in `fields` are dropped.
+    """
+
+    def __init__(self, fields: Dict[str, Field]):
+        self.fields = fields
+        self.default = []
+
+    def pack(self, out, value):
+        _pack_len(out, len(value))
+        for name, field in self.fields.items():
+            default = field.default
+            field.pack_many(out, [row.get(name, default) for row in value])
+
+    def unpack(self, buf, pos):
+        n, pos = _unpack_len(buf, pos)
+        columns = []
+        for field in self.fields.values():
+            col, pos = field.unpack_many(buf, pos)
+            columns.append(col)
+        names = list(self.fields)
+        return [dict(zip(names, row)) for row in zip(*columns)], pos
+
+
+class Mapping(Field):
+    """A str-keyed dict whose values all share one field type.
+
+    `value` is either a scalar field ({signal: cooldown_ts}) or Records
+    ({product: {"price": ..., "timestamp": ...}}), in which case the values are
+    stored as one Records column block.
+    """
+
+    def __init__(self, value: Field):
+        self.value = value
+        self.default = {}
+
+    def pack(self, out, value):
+        _KEYS.pack_many(out, list(value))
+        if isinstance(self.value, Records):
+            self.value.pack(out, list(value.values()))
+        else:
+            self.value.pack_many(out, list(value.values()))
+
+    def unpack(self, buf, pos):
+        keys, pos = _KEYS.unpack_many(buf, pos)
+        if isinstance(self.value, Records):
+            values, pos = self.value.unpack(buf, pos)
+        else:
+            values, pos = self.value.unpack_many(buf, pos)
+        return dict(zip(keys, values)), pos
+
+
+_KEYS = Str()
+
+
+class Codec:
+    def __init__(self, schema: Dict[str, Field]):
+        self.schema = schema
+
+    def pack(self, data: Dict[str, Any]) -> bytes:
+        out = bytearray((VERSION,))
+        for name, field in self.schema.items():
+            value = data.get(name)
+            field.pack(out, field.default if value is None else value)
+        return bytes(out)
+
+    def unpack(self, raw: bytes) -> Dict[str, Any]:
+        if not raw or raw[0] != VERSION:
+            raise ValueError("not a codec payload")
+        data = {}
+        pos = 1
+        try:
+            for name, field in self.schema.items():
+                data[name], pos = field.unpack(raw, pos)
+        except (struct.error, IndexError, UnicodeDecodeError) as e:
+            raise ValueError("truncated or corrupt codec payload") from e
+        return data
+
+    def encode(self, data: Dict[str, Any]) -> str:
+        return base64.b64encode(self.pack(data)).decode("ascii")
+
+    def defaults(self) -> Dict[str, Any]:
+        return {name: field.fresh() for name, field in self.schema.items()}
+
+    def decode(self, text: str) -> Dict[str, Any]:
+        """Inverse of encode; an empty string decodes to every field's default."""
+        if not text:
+            return self.defaults()
+        return self.unpack(base64.b64decode(text))
+
+
+class JsonCodec:
+    """Codec interface over plain JSON, for state that has no fixed schema."""
+
+    def defaults(self) -> Dict[str, Any]:
+        return {}
+
+    def pack(self, data: Dict[str, Any]) -> bytes:
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+    def unpack(self, raw: bytes) -> Dict[str, Any]:
+        return json.loads(raw.decode("utf-8"))
+
+
+def _fresh(default):
+    if isinstance(default, (list, dict)):
+        return type(default)()
+    return default
@@ -0,0 +1,194 @@
+import json
+from json import JSONEncoder
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Local stand-in for the exchange's datamodel so the traders run offline.  The
+# constructors, attribute names and __str__ formats follow the competition's
+# module, so a Trader that runs here runs unchanged on submission.  Every class
+# uses __slots__ (smaller and faster to build than a per-instance __dict__),
+# and the from_* constructors build books straight from CSV rows or price /
+# volume arrays, which is where a backtest spends its time.
+
+Time = int
+Symbol = str
+Product = str
+Position = int
+UserId = str
+ObservationValue = int
+
+
+def _as_dict(o) -> dict:
+    return {name: getattr(o, name) for name in type(o).__slots__}
+
+
+class Listing:
+    __slots__ = ("symbol", "product", "denomination")
+
+    def __init__(self, symbol: Symbol, product: Product, denomination: Product):
+        self.symbol = symbol
+        self.product = product
+        self.denomination = denomination
+
+
+class ConversionObservation:
+    __slots__ = ("bidPrice", "askPrice", "transportFees", "exportTariff", "importTariff",
+                 "sugarPrice", "sunlightIndex")
+
+    def __init__(self, bidPrice: float, askPrice: float, transportFees: float, exportTariff: float,
+                 importTariff: float, sugarPrice: float, sunlightIndex: float):
+        self.bidPrice = bidPrice
+        self.askPrice = askPrice
+        self.transportFees = transportFees
+        self.exportTariff = exportTariff
+        self.importTariff = importTariff
+        self.sugarPrice = sugarPrice
+        self.sunlightIndex = sunlightIndex
+
+
+class Observation:
+    __slots__ = ("plainValueObservations", "conversionObservations")
+
+    def __init__(self, plainValueObservations: Dict[Product, ObservationValue],
+                 conversionObservations: Dict[Product, ConversionObservation]) -> None:
+        self.plainValueObservations = plainValueObservations
+        self.conversionObservations = conversionObservations
+
+    def __str__(self) -> str:
+        return ("(plainValueObservations: " + json.dumps(self.plainValueObservations, cls=ProsperityEncoder)
+                + ", conversionObservations: " + json.dumps(self.conversionObservations, cls=ProsperityEncoder) + ")")
+
+
+class Order:
+    __slots__ = ("symbol", "price", "quantity")
+
+    def __init__(self, symbol: Symbol, price: int, quantity: int) -> None:
+        self.symbol = symbol
+        self.price = price
+        self.quantity = quantity
+
+    def __str__(self) -> str:
+        return "(" + self.symbol + ", " + str(self.price) + ", " + str(self.quantity) + ")"
+
+    def __repr__(self) -> str:
+        return "(" + self.symbol + ", " + str(self.price) + ", " + str(self.quantity) + ")"
+
+
+class OrderDepth:
+    """Resting volume by price; sell_orders volumes are negative, as on the exchange."""
+
+    __slots__ = ("buy_orders", "sell_orders")
+
+    def __init__(self):
+        self.buy_orders: Dict[int, int] = {}
+        self.sell_orders: Dict[int, int] = {}
+
+    @classmethod
+    def from_levels(cls, bid_prices: Iterable, bid_volumes: Iterable,
+                    ask_prices: Iterable, ask_volumes: Iterable) -> "OrderDepth":
+        """Book from parallel price / volume sequences (lists or NumPy arrays).
+
+        Ask volumes may be given with either sign.  Levels whose price is NaN or
+        whose volume is zero/NaN (the blanks in the price CSVs) are skipped.
+        """
+        depth = cls()
+        buys = depth.buy_orders
+        for p, v in zip(bid_prices, bid_volumes):
+            if v == v and v and p == p:
+                buys[int(p)] = int(v)
+        sells = depth.sell_orders
+        for p, v in zip(ask_prices, ask_volumes):
+            if v == v and v and p == p:
+                sells[int(p)] = -abs(int(v))
+        return depth
+
+    @classmethod
+    def from_row(cls, row: Sequence[str]) -> "OrderDepth":
+        """Book from the 12 depth fields of a prices CSV row, i.e. bid_price_1,
+        bid_volume_1 ... bid_volume_3, ask_price_1 ... ask_volume_3 as strings;
+        empty fields are missing levels."""
+        depth = cls()
+        buys = depth.buy_orders
+        sells = depth.sell_orders
+        bp1, bv1, bp2, bv2, bp3, bv3, ap1, av1, ap2, av2, ap3, av3 = row
+        try:
+            if bv1:
+                buys[int(bp1)] = int(bv1)
+            if bv2:
+                buys[int(bp2)] = int(bv2)
+            if bv3:
+                buys[int(bp3)] = int(bv3)
+            if av1:
+                sells[int(ap1)] = -abs(int(av1))
+            if av2:
+                sells[int(ap2)] = -abs(int(av2))
+            if av3:
+                sells[int(ap3)] = -abs(int(av3))
+        except ValueError:
+            # prices written as "9998.0"
+            buys.clear()
+            sells.clear()
+            for p, v in ((bp1, bv1), (bp2, bv2), (bp3, bv3)):
+                if v:
+                    buys[int(float(p))] = int(float(v))
+            for p, v in ((ap1, av1), (ap2, av2), (ap3, av3)):
+                if v:
+                    sells[int(float(p))] = -abs(int(float(v)))
+        return depth
+
+
+class Trade:
+    __slots__ = ("symbol", "price", "quantity", "buyer", "seller", "timestamp")
+
+    def __init__(self, symbol: Symbol, price: int, quantity: int, buyer: Optional[UserId] = None,
+                 seller: Optional[UserId] = None, timestamp: int = 0) -> None:
+        self.symbol = symbol
+        self.price: int = price
+        self.quantity: int = quantity
+        self.buyer = buyer
+        self.seller = seller
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_row(cls, row: Sequence[str]) -> "Trade":
+        """Trade from a trades CSV row: timestamp;buyer;seller;symbol;currency;price;quantity."""
+        return cls(row[3], int(float(row[5])), int(row[6]), row[1] or None, row[2] or None, int(row[0]))
+
+    def __str__(self) -> str:
+        return ("(" + self.symbol + ", " + str(self.buyer) + " << " + str(self.seller) + ", "
+                + str(self.price) + ", " + str(self.quantity) + ", " + str(self.timestamp) + ")")
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class TradingState:
+    __slots__ = ("traderData", "timestamp", "listings", "order_depths", "own_trades",
+                 "market_trades", "position", "observations")
+
+    def __init__(self,
+                 traderData: str,
+                 timestamp: Time,
+                 listings: Dict[Symbol, Listing],
+                 order_depths: Dict[Symbol, OrderDepth],
+                 own_trades: Dict[Symbol, List[Trade]],
+                 market_trades: Dict[Symbol, List[Trade]],
+                 position: Dict[Product, Position],
+                 observations: Observation):
+        self.traderData = traderData
+        self.timestamp = timestamp
+        self.listings = listings
+        self.order_depths = order_depths
+        self.own_trades = own_trades
+        self.market_trades = market_trades
+        self.position = position
+        self.observations = observations
+
+    def toJSON(self):
+        return json.dumps(self, cls=ProsperityEncoder, sort_keys=True)
+
+
+class ProsperityEncoder(JSONEncoder):
+    def default(self, o):
+        if hasattr(type(o), "__slots__"):
+            return _as_dict(o)
+        return o.__dict__
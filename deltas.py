@@ -0,0 +1,223 @@
+"""Delta-encoded recordings of a day's books: changed levels only, with keyframes to seek from.
+
+    python deltas.py data/r4d1 --out data/r4d1.delta --keyframe 100
+    python backtest.py TotalRound4.py data/r4d1.delta
+
+A tickstore keeps every level of every product at every tick, yet from one
+tick to the next most products' books do not move at all.  Here each tick's
+books are a row of int32 cells, per product the bid prices, bid volumes, ask
+prices and ask volumes (LEVELS each) and twice the mid (NaN as MISSING).
+Only the cells that changed since the previous tick are stored, as (cell,
+value) pairs, and every `keyframe` ticks the whole row is stored instead.
+
+Layout (a directory, like a tickstore, opened as memory maps):
+    timestamps  (T,)          int64
+    keyframes   (T / K, P*C)  int32    the row at ticks 0, K, 2K, ...
+    offsets     (T + 1,)      int64    tick t's deltas are [offsets[t], offsets[t+1])
+    cells       (N,)          uint16   p * C + cell
+    values      (N,)          int32
+    trade_*, obs_*                     as in the tickstore
+
+DeltaDay decodes a keyframe interval at a time into DayColumns (a forward
+fill over the interval, in NumPy) and streams ticks from those, so books are
+rebuilt as the replay reaches them and any tick is one keyframe away:
+
+    day = DeltaDay("data/r4d1.delta")
+    Backtest(trader, day.ticks(start=5000), day.trades(), day.observations()).run()
+    day.depth(7321, "KELP")
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from backtest import Tick
+from datamodel import OrderDepth
+from tickstore import BOOK_COLUMNS, LEVELS, DayColumns, TickStore, column_names, read_day
+
+KEYFRAME = 100
+CELLS = len(BOOK_COLUMNS) * LEVELS + 1   # per product: the book columns' levels, then the mid
+MISSING = np.iinfo(np.int32).min
+
+
+def _rows(day: DayColumns, lo: int, hi: int) -> np.ndarray:
+    """Ticks lo:hi of `day` as (n, P * CELLS) rows."""
+    n = hi - lo
+    mid = np.asarray(day.mid_price[lo:hi], dtype=float)
+    doubled = mid * 2
+    if np.any(doubled[~np.isnan(doubled)] % 1):
+        raise ValueError("mid prices must be multiples of 0.5 to delta-encode")
+    mid2 = np.where(np.isnan(doubled), MISSING, doubled).astype(np.int32)
+    parts = [np.asarray(getattr(day, name)[lo:hi], dtype=np.int32) for name in BOOK_COLUMNS]
+    return np.concatenate(parts + [mid2[..., None]], axis=2).reshape(n, -1)
+
+
+def encode(day: DayColumns, out, keyframe: int = KEYFRAME) -> Path:
+    """Write `day` as a delta directory at `out`, one keyframe interval at a time."""
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    T = len(day)
+    keyframes: List[np.ndarray] = []
+    counts = np.zeros(T, np.int64)
+    cells: List[np.ndarray] = []
+    values: List[np.ndarray] = []
+    for lo in range(0, T, keyframe):
+        hi = min(T, lo + keyframe)
+        rows = _rows(day, lo, hi)
+        keyframes.append(rows[0])
+        changed = rows[1:] != rows[:-1]
+        counts[lo + 1:hi] = changed.sum(axis=1)
+        cells.append(np.nonzero(changed)[1].astype(np.uint16))
+        values.append(rows[1:][changed])
+
+    width = len(day.book_products) * CELLS
+    np.save(out / "timestamps.npy", np.asarray(day.timestamps, dtype=np.int64))
+    np.save(out / "keyframes.npy", np.array(keyframes, np.int32).reshape(-1, width))
+    np.save(out / "offsets.npy", np.concatenate([[0], np.cumsum(counts)]))
+    np.save(out / "cells.npy", np.concatenate(cells) if cells else np.zeros(0, np.uint16))
+    np.save(out / "values.npy", np.concatenate(values) if values else np.zeros(0, np.int32))
+    for name, column in day.columns().items():
+        if name.startswith(("trade_", "obs_")):
+            np.save(out / (name + ".npy"), np.asarray(column))
+    meta = dict(day.meta, products=day.products, keyframe=keyframe, levels=LEVELS)
+    (out / "meta.json").write_text(json.dumps(meta, indent=1))
+    return out
+
+
+def is_delta_dir(path) -> bool:
+    return (Path(path) / "keyframes.npy").exists()
+
+
+class DeltaDay:
+    """A day written by encode(), decoded one keyframe interval at a time as it is read."""
+
+    trades = DayColumns.trades
+    observations = DayColumns.observations
+
+    def __init__(self, path):
+        self.path = Path(path)
+        meta = json.loads((self.path / "meta.json").read_text())
+        if meta["levels"] != LEVELS:
+            raise ValueError("%s was written with %d levels, not %d" % (path, meta["levels"], LEVELS))
+        self.meta = meta
+        self.day: int = meta["day"]
+        self.keyframe: int = meta["keyframe"]
+        self.products: List[str] = meta["products"]
+        self.book_products: List[str] = self.products[:meta["book_products"]]
+        self.product_index: Dict[str, int] = {p: i for i, p in enumerate(self.products)}
+        self.traders: List[str] = meta["traders"]
+        self.timestamps = self._load("timestamps")
+        self.keyframes = self._load("keyframes")
+        self.offsets = self._load("offsets")
+        self.cells = self._load("cells")
+        self.values = self._load("values")
+        names = column_names(meta)
+        self.trade = {name[6:]: self._load(name) for name in names if name.startswith("trade_")}
+        self.obs = {name[4:]: self._load(name) for name in names if name.startswith("obs_")}
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(self.path / (name + ".npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def row(self, tick: int) -> np.ndarray:
+        """The (P * CELLS,) row at `tick`: its keyframe plus the last change to each cell since."""
+        base = tick - tick % self.keyframe
+        row = np.array(self.keyframes[base // self.keyframe])
+        lo, hi = int(self.offsets[base + 1]), int(self.offsets[tick + 1])
+        if hi > lo:
+            cells = np.asarray(self.cells[lo:hi])[::-1]
+            latest, first = np.unique(cells, return_index=True)
+            row[latest] = np.asarray(self.values[lo:hi])[::-1][first]
+        return row
+
+    def depth(self, tick: int, product: str) -> OrderDepth:
+        p = self.product_index[product]
+        cells = self.row(tick)[p * CELLS:(p + 1) * CELLS].tolist()
+        book = [cells[i * LEVELS:(i + 1) * LEVELS] for i in range(len(BOOK_COLUMNS))]
+        return _depth(*book)
+
+    def interval(self, k: int) -> DayColumns:
+        """Keyframe interval k (ticks kK up to (k+1)K) decoded into DayColumns."""
+        lo = k * self.keyframe
+        hi = min(len(self), lo + self.keyframe)
+        n = hi - lo
+        changed = np.zeros((n, self.keyframes.shape[1]), bool)
+        grid = np.empty(changed.shape, np.int32)
+        grid[0] = self.keyframes[k]
+        changed[0] = True
+        start, stop = int(self.offsets[lo]), int(self.offsets[hi])
+        if stop > start:
+            ticks = np.repeat(np.arange(n), np.diff(self.offsets[lo:hi + 1]))
+            cells = np.asarray(self.cells[start:stop], dtype=np.intp)
+            grid[ticks, cells] = self.values[start:stop]
+            changed[ticks, cells] = True
+        # each cell holds the value from the last row that changed it
+        last = np.maximum.accumulate(np.where(changed, np.arange(n)[:, None], 0), axis=0)
+        grid = np.take_along_axis(grid, last, axis=0).reshape(n, -1, CELLS)
+
+        mid = grid[..., -1].astype(float) / 2
+        mid[grid[..., -1] == MISSING] = np.nan
+        columns = {name: grid[..., i * LEVELS:(i + 1) * LEVELS] for i, name in enumerate(BOOK_COLUMNS)}
+        columns["mid_price"] = mid
+        columns["timestamps"] = self.timestamps[lo:hi]
+        meta = dict(self.meta, has_trades=False, has_observations=False)
+        return DayColumns(meta, columns)
+
+    def chunks(self, start: int = 0, stop: Optional[int] = None) -> Iterator[DayColumns]:
+        """DayColumns covering ticks start:stop, one keyframe interval at a time."""
+        stop = len(self) if stop is None else stop
+        for k in range(start // self.keyframe, -(-stop // self.keyframe)):
+            columns = self.interval(k)
+            lo = k * self.keyframe
+            if lo < start or lo + len(columns) > stop:
+                part = slice(max(start - lo, 0), stop - lo)
+                columns = DayColumns(columns.meta, {name: values[part] for name, values in
+                                                    columns.columns().items()})
+            yield columns
+
+    def ticks(self, start: int = 0, stop: Optional[int] = None, products: Optional[List[str]] = None,
+              lazy: bool = False) -> Iterator[Tick]:
+        """Ticks as TickStore.ticks gives them, from the keyframe at or before `start`."""
+        for columns in self.chunks(start, stop):
+            yield from columns.ticks(products=products, lazy=lazy)
+
+
+def _depth(bid_prices, bid_volumes, ask_prices, ask_volumes) -> OrderDepth:
+    depth = OrderDepth()
+    for price, volume in zip(bid_prices, bid_volumes):
+        if volume:
+            depth.buy_orders[price] = volume
+    for price, volume in zip(ask_prices, ask_volumes):
+        if volume:
+            depth.sell_orders[price] = -volume
+    return depth
+
+
+def _size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.glob("*.npy"))
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Delta-encode a day's books.")
+    parser.add_argument("day", help="prices CSV or a tickstore directory")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--keyframe", type=int, default=KEYFRAME, help="ticks between full rows")
+    args = parser.parse_args(argv)
+    day = TickStore(args.day) if Path(args.day).is_dir() else DayColumns(*read_day(args.day))
+    out = encode(day, args.out, args.keyframe)
+    decoded = DeltaDay(out)
+    changes = len(decoded.cells) / max(1, len(decoded) * len(decoded.book_products) * CELLS)
+    line = "%s: %d ticks, %d keyframes, %.1f%% of cells change per tick, %.2f MB" % (
+        out, len(decoded), len(decoded.keyframes), 100 * changes, _size(out) / 1e6)
+    if isinstance(day, TickStore):
+        line += " (tickstore %.2f MB)" % (_size(day.path) / 1e6)
+    print(line)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
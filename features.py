@@ -0,0 +1,163 @@
+"""Order-book features for every product at once: imbalance, microprice, depth-weighted mid.
+
+    python features.py data/r4d1 --levels 2
+    python features.py prices_round_2_day_1.csv
+
+The inputs are book arrays laid out as in a tickstore: (..., levels) best
+first, volumes positive, volume 0 where a level is missing.  The leading axes
+are whatever the caller holds, (products,) for one tick or (ticks, products)
+for a whole day, and each feature comes back with that leading shape, NaN
+where a side needed for it is empty:
+
+    imbalance    (bid volume - ask volume) / total over the top `levels`, in [-1, 1]
+    microprice   best bid and ask, each weighted by the other side's volume
+    vwmid        midpoint of the bid and ask VWAPs over the top `levels`
+    slope        average price given up per unit taken, past the touch, both sides
+    spread       best ask - best bid
+    regime       spread against the product's typical spread: 0 tight, 1 normal,
+                 2 wide (REGIME_BOUNDS), -1 without a two-sided book
+
+A whole day is one pass of a few dozen array operations (day_features), about
+5us per tick for all fifteen products, which is what the mids cost to read.
+For one tick's books, snapshot_features stacks the book.BookSnapshot lists
+into (products, levels) arrays and runs the same pass; that is a flat ~100us
+whatever the number of products, so it is for traders that want these for
+many products, not a replacement for one mid.  The CLI prints, per product,
+how well each signal anticipates the next mid move.
+"""
+import argparse
+import sys
+import warnings
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from book import BookSnapshot
+from tickstore import LEVELS, DayColumns, TickStore, read_day
+
+REGIME_BOUNDS = (0.75, 1.5)   # spread / typical spread
+
+
+class BookFeatures(NamedTuple):
+    imbalance: np.ndarray
+    microprice: np.ndarray
+    vwmid: np.ndarray
+    slope: np.ndarray
+    spread: np.ndarray
+    regime: np.ndarray
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    """num / den, NaN where den is not positive."""
+    return np.divide(num, den, out=np.full(np.shape(num), np.nan), where=den > 0)
+
+
+def compute(bid_price, bid_volume, ask_price, ask_volume, levels: int = LEVELS,
+            typical_spread=None) -> BookFeatures:
+    """Features from (..., levels) book arrays; see the module docstring.
+
+    `typical_spread` broadcasts against the leading shape, e.g. one value per
+    product.  Without it, the median spread along the first axis is used,
+    which is what a day's (ticks, products) arrays want for research; it
+    includes ticks after each one, so pass a value fixed in advance to
+    backtest regime rules.
+    """
+    bp = np.asarray(bid_price, dtype=float)[..., :levels]
+    bv = np.asarray(bid_volume, dtype=float)[..., :levels]
+    ap = np.asarray(ask_price, dtype=float)[..., :levels]
+    av = np.asarray(ask_volume, dtype=float)[..., :levels]
+
+    bid_depth = bv.sum(axis=-1)
+    ask_depth = av.sum(axis=-1)
+    imbalance = _ratio(bid_depth - ask_depth, bid_depth + ask_depth)
+
+    best_bid, best_ask = bp[..., 0], ap[..., 0]
+    bid_top, ask_top = bv[..., 0], av[..., 0]
+    two_sided = (bid_top > 0) & (ask_top > 0)
+    microprice = np.where(two_sided, _ratio(best_bid * ask_top + best_ask * bid_top, bid_top + ask_top), np.nan)
+
+    bid_vwap = _ratio((bp * bv).sum(axis=-1), bid_depth)
+    ask_vwap = _ratio((ap * av).sum(axis=-1), ask_depth)
+    vwmid = (bid_vwap + ask_vwap) / 2
+    slope = (_ratio(ask_vwap - best_ask, ask_depth) + _ratio(best_bid - bid_vwap, bid_depth)) / 2
+
+    spread = np.where(two_sided, best_ask - best_bid, np.nan)
+    if typical_spread is None:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)   # products with no two-sided tick
+            typical_spread = np.nanmedian(spread, axis=0) if spread.ndim > 1 else spread
+    relative = _ratio(spread, np.asarray(typical_spread, dtype=float))
+    regime = np.where(np.isnan(relative), -1,
+                      (relative >= REGIME_BOUNDS[0]) * 1 + (relative >= REGIME_BOUNDS[1])).astype(np.int8)
+    return BookFeatures(imbalance, microprice, vwmid, slope, spread, regime)
+
+
+def day_features(day: DayColumns, levels: int = LEVELS, start: int = 0, stop: Optional[int] = None,
+                 typical_spread=None) -> BookFeatures:
+    """Features for every tick and book product of a day, each (ticks, products).
+
+    Without `typical_spread`, regimes are measured against the median spread
+    of ticks start:stop, later ticks included: fine for describing a day,
+    look-ahead for a strategy.
+    """
+    rows = slice(start, stop)
+    return compute(day.bid_price[rows], day.bid_volume[rows], day.ask_price[rows], day.ask_volume[rows],
+                   levels, typical_spread)
+
+
+def snapshot_features(books: Dict[str, BookSnapshot], products: Sequence[str], typical_spread,
+                      levels: int = LEVELS) -> BookFeatures:
+    """Features for one tick's snapshots, each (len(products),) in `products` order.
+
+    `typical_spread` (one per product, e.g. from a previous day's
+    day_features) is required: one tick has no spread history to take it
+    from.  A product missing from `books` gets an empty book.
+    """
+    zeros = [0] * levels
+    flat: List[int] = []
+    for product in products:
+        book = books.get(product)
+        if book is None:
+            flat += zeros * 4
+            continue
+        for values in (book.bid_prices, book.bid_volumes, book.ask_prices, book.ask_volumes):
+            flat += values[:levels]
+            flat += zeros[len(values):]
+    table = np.array(flat, dtype=float).reshape(len(products), 4, levels)
+    return compute(table[:, 0], table[:, 1], table[:, 2], table[:, 3], levels, typical_spread)
+
+
+def _predictive(edge: np.ndarray, mid: np.ndarray) -> float:
+    """Correlation of a signal with the next tick's mid change."""
+    edge = edge[:-1]
+    move = mid[1:] - mid[:-1]
+    ok = np.isfinite(edge) & np.isfinite(move)
+    if ok.sum() < 3 or edge[ok].std() == 0 or move[ok].std() == 0:
+        return float("nan")
+    return float(np.corrcoef(edge[ok], move[ok])[0, 1])
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Order-book features of a day, summarised per product.")
+    parser.add_argument("day", help="prices CSV or a tickstore directory")
+    parser.add_argument("--levels", type=int, default=LEVELS)
+    args = parser.parse_args(argv)
+    day = TickStore(args.day) if Path(args.day).is_dir() else DayColumns(*read_day(args.day))
+
+    f = day_features(day, args.levels)
+    mid = np.asarray(day.mid_price, dtype=float)
+    print("%-28s %7s %7s %6s %6s %6s %9s %9s %9s" % (
+        "product", "spread", "imbal", "tight", "normal", "wide", "micro r", "vwmid r", "imbal r"))
+    for p, product in enumerate(day.book_products):
+        regime = f.regime[:, p]
+        shares = [np.mean(regime == r) for r in (0, 1, 2)]
+        print("%-28s %7.2f %7.3f %6.2f %6.2f %6.2f %9.3f %9.3f %9.3f" % (
+            product, np.nanmean(f.spread[:, p]), np.nanmean(f.imbalance[:, p]), *shares,
+            _predictive(f.microprice[:, p] - mid[:, p], mid[:, p]),
+            _predictive(f.vwmid[:, p] - mid[:, p], mid[:, p]),
+            _predictive(f.imbalance[:, p], mid[:, p])))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,124 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+from codec import Bytes, Field
+
+
+class ColumnarHistory:
+    """Fixed-capacity ring buffer of rows stored as one typed column per field.
+
+    `fields` maps column name to a NumPy dtype.  Each column is backed by an
+    array of twice the capacity and every value is written at both `i` and
+    `i + capacity`, so the live window is always one contiguous slice:
+    `history["iv"]` is a read-only view, not a copy, and appending past the
+    capacity overwrites the oldest row instead of trimming a list.
+
+        hist = ColumnarHistory(60, {"m": "f8", "iv": "f8", "strike": "i4"})
+        hist.append(m=0.01, iv=0.012, strike=10000)
+        np.polyfit(hist["m"], hist["iv"], 2)
+    """
+
+    __slots__ = ("capacity", "dtypes", "_cols", "_head", "_count")
+
+    def __init__(self, capacity: int, fields: Dict[str, str]):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        # little-endian so the raw bytes can go straight into traderData
+        self.dtypes = {name: np.dtype(dtype).newbyteorder("<") for name, dtype in fields.items()}
+        self._cols = {name: np.zeros(2 * capacity, dtype) for name, dtype in self.dtypes.items()}
+        self._head = 0
+        self._count = 0
+
+    def append(self, **row) -> None:
+        """Add one row; columns not given are written as 0."""
+        if self._count < self.capacity:
+            slot = self._count
+            self._count += 1
+        else:
+            slot = self._head
+            self._head = (self._head + 1) % self.capacity
+        for name, col in self._cols.items():
+            value = row.get(name, 0)
+            col[slot] = value
+            col[slot + self.capacity] = value
+
+    def extend(self, **columns) -> None:
+        """Add a batch of rows given as equal-length columns; columns not given are written as 0."""
+        if not columns:
+            return
+        n = len(next(iter(columns.values())))
+        skip = max(0, n - self.capacity)
+        n -= skip
+        slots = (self._head + self._count + np.arange(n)) % self.capacity
+        for name, col in self._cols.items():
+            values = np.asarray(columns[name])[skip:] if name in columns else 0
+            col[slots] = values
+            col[slots + self.capacity] = values
+        overflow = max(0, self._count + n - self.capacity)
+        self._head = (self._head + overflow) % self.capacity
+        self._count = min(self.capacity, self._count + n)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        view = self._cols[name][self._head:self._head + self._count]
+        view.flags.writeable = False
+        return view
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def full(self) -> bool:
+        return self._count == self.capacity
+
+    def rows(self):
+        """Rows as dicts, oldest first (for logging; use the column views for math)."""
+        cols = {name: self[name].tolist() for name in self._cols}
+        for i in range(self._count):
+            yield {name: values[i] for name, values in cols.items()}
+
+    def clear(self) -> None:
+        self._head = 0
+        self._count = 0
+
+
+class History(Field):
+    """codec field for a ColumnarHistory: each column's live window as raw bytes.
+
+    Decoding keeps the newest `capacity` rows if the payload holds more, so the
+    capacity can be lowered between submissions.
+    """
+
+    _COLUMN = Bytes()
+
+    def __init__(self, capacity: int, fields: Dict[str, str]):
+        self.capacity = capacity
+        self.fields = fields
+
+    def fresh(self) -> ColumnarHistory:
+        return ColumnarHistory(self.capacity, self.fields)
+
+    def pack(self, out, value: Optional[ColumnarHistory]):
+        for name in self.fields:
+            self._COLUMN.pack(out, value[name].tobytes() if value is not None else b"")
+
+    def unpack(self, buf, pos):
+        hist = self.fresh()
+        columns = {}
+        n = None
+        for name, dtype in hist.dtypes.items():
+            raw, pos = self._COLUMN.unpack(buf, pos)
+            if len(raw) % dtype.itemsize:
+                raise ValueError("corrupt history column %r" % name)
+            columns[name] = np.frombuffer(raw, dtype)
+            if n is not None and len(columns[name]) != n:
+                raise ValueError("history columns differ in length")
+            n = len(columns[name])
+        n = min(n or 0, hist.capacity)
+        for name, col in hist._cols.items():
+            values = columns[name][len(columns[name]) - n:]
+            col[:n] = values
+            col[hist.capacity:hist.capacity + n] = values
+        hist._count = n
+        return hist, pos
@@ -0,0 +1,83 @@
+from typing import Optional
+
+from rolling import RollingMoments
+
+
+class BollingerBands:
+    """Streaming mean, bands and z-scores from a single update per tick.
+
+    `update(price)` pushes the price into the band window and the price's
+    deviation from the band mean into a second window, so both the band
+    z-score (`zscore`) and the deviation z-score used by the rock strategies
+    (`error_zscore`, the old `calculate_z_score`) come out of the same O(1) step.
+    The bands and price of the previous update are kept for crossover
+    confirmation.
+    """
+
+    def __init__(self, window: int, alpha: float = 2.0, z_window: Optional[int] = None,
+                 eps: float = 1e-5, default_std: float = 1.0):
+        self.prices = RollingMoments(window)
+        self.errors = RollingMoments(z_window or window)
+        self.alpha = alpha
+        self.eps = eps
+        self.default_std = default_std
+        self.value: Optional[float] = None
+        self.error = 0.0
+        self.prev_value: Optional[float] = None
+        self.prev_upper: Optional[float] = None
+        self.prev_lower: Optional[float] = None
+
+    def update(self, price: float) -> None:
+        if self.value is not None:
+            self.prev_value = self.value
+            self.prev_upper = self.upper
+            self.prev_lower = self.lower
+        self.prices.push(price)
+        self.value = price
+        self.error = price - self.prices.mean
+        self.errors.push(self.error)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def mean(self) -> float:
+        return self.prices.mean
+
+    @property
+    def std(self) -> float:
+        if len(self.prices) < 2:
+            return self.default_std
+        return self.prices.std
+
+    @property
+    def upper(self) -> float:
+        return self.mean + self.alpha * self.std
+
+    @property
+    def lower(self) -> float:
+        return self.mean - self.alpha * self.std
+
+    def zscore(self, price: Optional[float] = None) -> float:
+        """Distance of `price` (default: the last update) from the mean in stds."""
+        if price is None:
+            price = self.value
+        if price is None:
+            return 0.0
+        return (price - self.mean) / (self.std + self.eps)
+
+    def error_zscore(self) -> float:
+        """Z-score of the latest deviation against the deviation window; 0 until it fills."""
+        if not self.errors.full:
+            return 0.0
+        return (self.error - self.errors.mean) / (self.errors.std + self.eps)
+
+    def crossed_up_lower(self) -> bool:
+        """Previous price was below the previous lower band and the current one is back above."""
+        return (self.prev_value is not None and self.prev_value < self.prev_lower
+                and self.value > self.lower)
+
+    def crossed_down_upper(self) -> bool:
+        """Previous price was above the previous upper band and the current one is back below."""
+        return (self.prev_value is not None and self.prev_value > self.prev_upper
+                and self.value < self.upper)
@@ -0,0 +1,129 @@
+from typing import Dict, List, Tuple
+
+from datamodel import Order, OrderDepth, Trade
+
+# Exchange-style matching for one product per tick:
+#
+#   1. If the product's buy orders could take the position above its limit, or
+#      its sell orders could take it below -limit, every order for the product
+#      is rejected (the exchange does not partially accept).
+#   2. Orders fill aggressively against the visible book, best level first, at
+#      the book's price.  Volume taken by one order is gone for the next.
+#   3. Whatever is left rests for the tick and fills against that tick's market
+#      trades: a resting buy at p trades with any market trade at price <= p
+#      (a sell at p with price >= p), at p, up to the trade's quantity.
+#
+# The book is held as sorted price lists with a parallel list of volume still
+# available, so a side is walked once from its best level; with three levels
+# per side plain lists beat NumPy arrays here.
+
+SUBMISSION = "SUBMISSION"
+
+
+class SortedBook:
+    """One product's book as sorted levels: asks ascending, bids descending."""
+
+    __slots__ = ("ask_prices", "ask_left", "bid_prices", "bid_left")
+
+    def __init__(self, depth: OrderDepth):
+        asks = sorted(depth.sell_orders.items())
+        bids = sorted(depth.buy_orders.items(), reverse=True)
+        self.ask_prices = [p for p, _ in asks]
+        self.ask_left = [-v for _, v in asks]
+        self.bid_prices = [p for p, _ in bids]
+        self.bid_left = [v for _, v in bids]
+
+    def take(self, buy: bool, limit_price: int, quantity: int) -> List[Tuple[int, int]]:
+        """(price, qty) fills for up to `quantity` at `limit_price` or better."""
+        if buy:
+            prices, left = self.ask_prices, self.ask_left
+        else:
+            prices, left = self.bid_prices, self.bid_left
+        fills = []
+        for i in range(len(prices)):
+            if quantity == 0 or (prices[i] > limit_price if buy else prices[i] < limit_price):
+                break
+            qty = left[i] if left[i] < quantity else quantity
+            if qty > 0:
+                left[i] -= qty
+                quantity -= qty
+                fills.append((prices[i], qty))
+        return fills
+
+
+def within_limit(orders: List[Order], position: int, limit: int) -> bool:
+    """True if the product's orders can't breach the limit even if all of them fill."""
+    buys = sum(o.quantity for o in orders if o.quantity > 0)
+    sells = sum(-o.quantity for o in orders if o.quantity < 0)
+    return position + buys <= limit and position - sells >= -limit
+
+
+def match_orders(symbol: str, orders: List[Order], depth: OrderDepth, market_trades: List[Trade],
+                 position: int, limit: int, timestamp: int) -> Tuple[List[Trade], bool]:
+    """Fills for one product's orders this tick, and whether they were accepted.
+
+    `depth` is the book as published (not the one the trader may have edited),
+    and `market_trades` the market trades printed at this tick.
+    """
+    if not orders:
+        return [], True
+    if not within_limit(orders, position, limit):
+        return [], False
+
+    book = SortedBook(depth)
+    fills: List[Trade] = []
+    resting: List[Tuple[int, int]] = []
+    for order in orders:
+        buy = order.quantity > 0
+        remaining = abs(order.quantity)
+        if remaining == 0:
+            continue
+        for price, qty in book.take(buy, order.price, remaining):
+            remaining -= qty
+            fills.append(_fill(symbol, price, qty, buy, timestamp))
+        if remaining:
+            resting.append((order.price, remaining if buy else -remaining))
+
+    if resting and market_trades:
+        trade_left = [t.quantity for t in market_trades]
+        for price, quantity in resting:
+            buy = quantity > 0
+            remaining = abs(quantity)
+            for i, trade in enumerate(market_trades):
+                if remaining == 0:
+                    break
+                if trade_left[i] == 0 or (trade.price > price if buy else trade.price < price):
+                    continue
+                qty = min(remaining, trade_left[i])
+                trade_left[i] -= qty
+                remaining -= qty
+                fills.append(_fill(symbol, price, qty, buy, timestamp, trade.seller if buy else trade.buyer))
+    return fills, True
+
+
+def _fill(symbol: str, price: int, qty: int, buy: bool, timestamp: int, counterparty: str = "") -> Trade:
+    if buy:
+        return Trade(symbol, price, qty, SUBMISSION, counterparty or "", timestamp)
+    return Trade(symbol, price, qty, counterparty or "", SUBMISSION, timestamp)
+
+
+def match_all(orders: Dict[str, List[Order]], depths: Dict[str, OrderDepth],
+              market_trades: Dict[str, List[Trade]], position: Dict[str, int],
+              limits: Dict[str, int], timestamp: int) -> Tuple[Dict[str, List[Trade]], List[str]]:
+    """match_orders for every product; returns fills by product and the rejected products.
+
+    Products without a book this tick, or without a limit, are skipped.
+    """
+    fills: Dict[str, List[Trade]] = {}
+    rejected: List[str] = []
+    for symbol, product_orders in orders.items():
+        if not product_orders or symbol not in depths or symbol not in limits:
+            continue
+        product_fills, ok = match_orders(symbol, product_orders, depths[symbol],
+                                         market_trades.get(symbol, []), position.get(symbol, 0),
+                                         limits[symbol], timestamp)
+        if not ok:
+            rejected.append(symbol)
+        elif product_fills:
+            fills[symbol] = product_fills
+    return fills, rejected
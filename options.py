@@ -0,0 +1,331 @@
+import math
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+SQRT_2PI = np.sqrt(2.0 * np.pi)
+_SQRT_2PI = math.sqrt(2.0 * math.pi)
+_SQRT_2 = math.sqrt(2.0)
+
+# Below this many options the per-call overhead of NumPy outweighs the batch
+# win, so bs_call and implied_vol work on Python floats instead.
+SCALAR_CUTOFF = 32
+
+
+def norm_pdf(x):
+    x = np.asarray(x, dtype=float)
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+
+def norm_cdf(x):
+    """Standard normal CDF on arrays (Hart 1968 / West 2005), absolute error < 1e-15.
+
+    NumPy has no erf, and np.vectorize(math.erf) is a Python loop, so this is the
+    rational approximation used in place of scipy.stats.norm.cdf.
+    """
+    x = np.asarray(x, dtype=float)
+    a = np.abs(x)
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        return _norm_cdf(x, a, np.exp(-0.5 * a * a))
+
+
+def _norm_cdf(x, a, e):
+    num = 3.52624965998911e-02 * a + 0.700383064443688
+    num = num * a + 6.37396220353165
+    num = num * a + 33.912866078383
+    num = num * a + 112.079291497871
+    num = num * a + 221.213596169931
+    num = num * a + 220.206867912376
+    den = 8.83883476483184e-02 * a + 1.75566716318264
+    den = den * a + 16.064177579207
+    den = den * a + 86.7807322029461
+    den = den * a + 296.564248779674
+    den = den * a + 637.333633378831
+    den = den * a + 793.826512519948
+    den = den * a + 440.413735824752
+    near = e * num / den
+
+    cf = a + 0.65
+    cf = a + 4.0 / cf
+    cf = a + 3.0 / cf
+    cf = a + 2.0 / cf
+    cf = a + 1.0 / cf
+    tail = e / cf / SQRT_2PI
+
+    lower = np.where(a < 7.07106781186547, near, tail)
+    lower = np.where(a > 37.0, 0.0, lower)
+    return np.where(x > 0, 1.0 - lower, lower)
+
+
+def bs_d1_d2(S, K, T, sigma):
+    S, K, T, sigma = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (S, K, T, sigma)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vol_sqrt_t = sigma * np.sqrt(T)
+        d1 = (np.log(S / K) + 0.5 * sigma * sigma * T) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t
+
+
+def _bs_call_scalar(S: float, K: float, T: float, sigma: float) -> float:
+    if not (T > 0 and sigma > 0):
+        return max(S - K, 0.0)
+    v = sigma * math.sqrt(T)
+    d1 = (math.log(S / K) + 0.5 * v * v) / v
+    return S * 0.5 * math.erfc(-d1 / _SQRT_2) - K * 0.5 * math.erfc((v - d1) / _SQRT_2)
+
+
+def bs_call(S, K, T, sigma, return_d: bool = False):
+    """Black-Scholes call price (r = 0) for broadcastable arrays of S, K, T, sigma.
+
+    One call prices every strike of a tick, or every row of a history, in a
+    single NumPy pass; up to SCALAR_CUTOFF prices (a tick's strikes) are
+    priced with math.erfc on Python floats instead, which is several times
+    faster at that size.  Where T <= 0 or sigma <= 0 the price is intrinsic
+    value, matching the scalar black_scholes_call helpers.  With
+    `return_d=True` returns (price, d1, d2).
+    """
+    if not return_d:
+        rows = np.broadcast(S, K, T, sigma)
+        if rows.size <= SCALAR_CUTOFF:
+            values = [(float(s), float(k), float(t), float(v)) for s, k, t, v in rows]
+            if all(s > 0 and k > 0 for s, k, _, _ in values):
+                return np.array([_bs_call_scalar(*row) for row in values]).reshape(rows.shape)
+    S, K, T, sigma = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (S, K, T, sigma)))
+    d1, d2 = bs_d1_d2(S, K, T, sigma)
+    live = (T > 0) & (sigma > 0)
+    price = np.where(live, S * norm_cdf(d1) - K * norm_cdf(d2), np.maximum(S - K, 0.0))
+    if return_d:
+        return price, d1, d2
+    return price
+
+
+def bs_vega(S, K, T, sigma):
+    d1, _ = bs_d1_d2(S, K, T, sigma)
+    return np.asarray(S, dtype=float) * norm_pdf(d1) * np.sqrt(np.asarray(T, dtype=float))
+
+
+class IVResult(NamedTuple):
+    iv: np.ndarray
+    converged: np.ndarray
+    iterations: int
+
+
+def _initial_vol(price, S, K, T):
+    """Corrado-Miller closed-form guess, falling back to Brenner-Subrahmanyam."""
+    a = price - 0.5 * (S - K)
+    disc = np.maximum(a * a - (S - K) ** 2 / np.pi, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sqrt_t = np.sqrt(T)
+        guess = SQRT_2PI / (S + K) * (a + np.sqrt(disc)) / sqrt_t
+        atm = SQRT_2PI * price / S / sqrt_t
+    return np.where(np.isfinite(guess) & (guess > 0), guess, atm)
+
+
+def _plain_rows(*args) -> Optional[Tuple[tuple, List[tuple]]]:
+    """(shape, rows of floats) when every argument is a Python number or a flat
+    list/tuple of one common length, else None and NumPy does the broadcasting."""
+    n = None
+    for a in args:
+        if isinstance(a, (list, tuple)):
+            if n is not None and len(a) != n:
+                return None
+            n = len(a)
+        elif not isinstance(a, (int, float)):
+            return None
+    try:
+        if n is None:
+            return (), [tuple(map(float, args))]
+        columns = [list(map(float, a)) if isinstance(a, (list, tuple)) else [float(a)] * n for a in args]
+    except TypeError:
+        return None
+    return (n,), list(zip(*columns))
+
+
+def _implied_vol_scalar(c: float, S: float, K: float, T: float, x: Optional[float], lo: float,
+                        hi: float, tol: float, price_tol: float, max_iter: int) -> Tuple[float, bool, int]:
+    if T <= 0 or not max(S - K, 0.0) < c < S:
+        return math.nan, False, 0
+    sqrt_t = math.sqrt(T)
+    if x is None or not lo < x < hi:
+        a = c - 0.5 * (S - K)
+        x = _SQRT_2PI / (S + K) * (a + math.sqrt(max(a * a - (S - K) ** 2 / math.pi, 0.0))) / sqrt_t
+        if not lo < x < hi:
+            x = _SQRT_2PI * c / S / sqrt_t
+        if not lo < x < hi:
+            x = 0.5 * (lo + hi)
+    log_sk = math.log(S / K)
+    for it in range(1, max_iter + 1):
+        v = x * sqrt_t
+        d1 = (log_sk + 0.5 * v * v) / v
+        d2 = d1 - v
+        err = S * 0.5 * math.erfc(-d1 / _SQRT_2) - K * 0.5 * math.erfc(-d2 / _SQRT_2) - c
+        if abs(err) <= price_tol:
+            return x, True, it
+        if err > 0:
+            hi = x
+        else:
+            lo = x
+        vega = S * math.exp(-0.5 * d1 * d1) / _SQRT_2PI * sqrt_t
+        nxt = math.nan
+        if vega > 0:
+            newton = err / vega
+            denom = 1.0 - 0.5 * newton * d1 * d2 / x
+            if denom != 0:
+                nxt = x - newton / denom
+        if not lo < nxt < hi:
+            nxt = 0.5 * (lo + hi)
+        if abs(nxt - x) <= tol * max(x, 1.0):
+            return nxt, True, it
+        x = nxt
+    return x, False, max_iter
+
+
+def implied_vol(price, S, K, T, sigma0=None, lo: float = 1e-6, hi: float = 5.0,
+                tol: float = 1e-12, price_tol: float = 1e-10, max_iter: int = 50) -> IVResult:
+    """Implied volatility of call prices, solved for whole arrays at once.
+
+    Starts from `sigma0` (e.g. last tick's solution) or a closed-form guess and
+    takes Halley steps, keeping a [lo, hi] bracket from the sign of the pricing
+    error; any step that leaves the bracket is replaced by bisection, so every
+    valid option converges.  An option is done when the sigma step falls below
+    `tol` or it reprices within `price_tol` (the pricer's own noise floor, which
+    is what ends the search for options with almost no vega).  Prices outside
+    (intrinsic, S) or with T <= 0 have no solution and come back as nan with
+    converged=False.
+    """
+    # a tick's strikes as Python lists skip NumPy entirely: building and
+    # flattening four arrays costs about as much as solving them
+    plain = _plain_rows(price, S, K, T)
+    if plain is not None:
+        shape, rows = plain
+    else:
+        broadcast = np.broadcast(price, S, K, T)
+        shape = broadcast.shape
+        rows = [(float(c), float(s), float(k), float(t)) for c, s, k, t in broadcast] \
+            if broadcast.size <= SCALAR_CUTOFF else None
+    if rows is not None and len(rows) <= SCALAR_CUTOFF:
+        if sigma0 is None:
+            guesses = [None] * len(rows)
+        elif isinstance(sigma0, (list, tuple)) and len(sigma0) == len(rows):
+            guesses = sigma0
+        else:
+            guesses = np.broadcast_to(np.asarray(sigma0, dtype=float), shape).ravel().tolist()
+        solved = [_implied_vol_scalar(c, s, k, t, g, lo, hi, tol, price_tol, max_iter)
+                  for (c, s, k, t), g in zip(rows, guesses)]
+        return IVResult(
+            np.array([r[0] for r in solved], dtype=float).reshape(shape),
+            np.array([r[1] for r in solved], dtype=bool).reshape(shape),
+            max((r[2] for r in solved), default=0),
+        )
+
+    price, S, K, T = (np.array(v, dtype=float).ravel() for v in np.broadcast_arrays(price, S, K, T))
+    if sigma0 is not None:
+        sigma0 = np.broadcast_to(np.asarray(sigma0, dtype=float), shape).ravel()
+
+    valid = (T > 0) & (price > np.maximum(S - K, 0.0)) & (price < S)
+    sigma = _initial_vol(price, S, K, T)
+    if sigma0 is not None:
+        sigma = np.where(np.isfinite(sigma0) & (sigma0 > lo) & (sigma0 < hi), sigma0, sigma)
+    sigma = np.where(np.isfinite(sigma) & (sigma > lo) & (sigma < hi), sigma, 0.5 * (lo + hi))
+    lower = np.full(price.shape, lo)
+    upper = np.full(price.shape, hi)
+
+    converged = np.zeros(price.shape, dtype=bool)
+    active = valid.copy()
+    iterations = 0
+    while iterations < max_iter and active.any():
+        iterations += 1
+        idx = np.flatnonzero(active)
+        s, k, t, c, x = S[idx], K[idx], T[idx], price[idx], sigma[idx]
+
+        sqrt_t = np.sqrt(t)
+        d1 = (np.log(s / k) + 0.5 * x * x * t) / (x * sqrt_t)
+        d2 = d1 - x * sqrt_t
+        err = s * norm_cdf(d1) - k * norm_cdf(d2) - c
+        too_high = err > 0
+        upper[idx] = np.where(too_high, x, upper[idx])
+        lower[idx] = np.where(too_high, lower[idx], x)
+
+        vega = s * norm_pdf(d1) * sqrt_t
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            newton = err / vega
+            nxt = x - newton / (1.0 - 0.5 * newton * d1 * d2 / x)
+        bisect = ~np.isfinite(nxt) | (nxt <= lower[idx]) | (nxt >= upper[idx])
+        nxt = np.where(bisect, 0.5 * (lower[idx] + upper[idx]), nxt)
+
+        hit = np.abs(err) <= price_tol
+        done = hit | (np.abs(nxt - x) <= tol * np.maximum(x, 1.0))
+        sigma[idx] = np.where(hit, x, nxt)
+        converged[idx[done]] = True
+        active[idx[done]] = False
+
+    sigma[~valid] = np.nan
+    return IVResult(sigma.reshape(shape), converged.reshape(shape), iterations)
+
+
+class IVCache:
+    """Implied vols per strike, reused across ticks.
+
+    `solve` quantizes each (S, C, T) to the given ticks; an exact repeat of a
+    strike's quantized inputs returns the cached vol without solving, and
+    everything else is solved in one `implied_vol` call warm-started from that
+    strike's previous solution.  Entries are evicted least-recently-used once
+    `maxsize` is reached.  Mids of integer quotes are multiples of 0.5, so the
+    default ticks only merge inputs that are genuinely identical.
+    """
+
+    def __init__(self, maxsize: int = 4096, spot_tick: float = 0.5, price_tick: float = 0.5,
+                 time_tick: float = 1e-6):
+        self.maxsize = maxsize
+        self.spot_tick = spot_tick
+        self.price_tick = price_tick
+        self.time_tick = time_tick
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[float, int, int, int], Tuple[float, bool]]" = OrderedDict()
+        self._last: Dict[float, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._last.clear()
+
+    def solve(self, price, S, K, T) -> IVResult:
+        plain = _plain_rows(price, S, K, T)
+        if plain is not None:
+            rows = plain[1]
+        else:
+            rows = [(float(c), float(s), float(k), float(t)) for c, s, k, t in np.broadcast(price, S, K, T)]
+        ivs = [math.nan] * len(rows)
+        ok = [False] * len(rows)
+        pending: Dict[Tuple[float, int, int, int], List[int]] = {}
+        spot_tick, price_tick, time_tick = self.spot_tick, self.price_tick, self.time_tick
+        for i, (c, s, k, t) in enumerate(rows):
+            key = (k, round(s / spot_tick), round(c / price_tick), round(t / time_tick))
+            cached = self._entries.get(key)
+            if cached is None:
+                pending.setdefault(key, []).append(i)
+                continue
+            self._entries.move_to_end(key)
+            ivs[i], ok[i] = cached
+        self.hits += len(rows) - len(pending)
+        self.misses += len(pending)
+
+        iterations = 0
+        if pending:
+            first = [rows[same[0]] for same in pending.values()]
+            seeds = [self._last.get(key[0], math.nan) for key in pending]
+            solved = implied_vol(*zip(*first), sigma0=seeds)
+            iterations = solved.iterations
+            for (key, same), iv, conv in zip(pending.items(), solved.iv.tolist(), solved.converged.tolist()):
+                for i in same:
+                    ivs[i], ok[i] = iv, conv
+                self._entries[key] = (iv, conv)
+                if conv:
+                    self._last[key[0]] = iv
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return IVResult(np.array(ivs), np.array(ok, dtype=bool), iterations)
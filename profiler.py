@@ -0,0 +1,238 @@
+"""Per-tick latency profile of Trader.run against the exchange's time budget.
+
+    python profiler.py "April 15/Round3Final.py" prices_round_3_day_0.csv [trades.csv] [observations.csv]
+    python profiler.py TotalRound4.py data/r4d1 --budget 900 --top 10
+
+Replays a day through the backtester and times every run() call, then reports
+p50/p95/p99/max, the ticks over budget, and where the time went by section.
+
+Sections come from two kinds of hooks.  While a profile runs, the usual
+suspects are wrapped automatically: traderData decode/encode (codec, state,
+jsonpickle), pricing (options) and fitting (np.polyfit, RollingQuadraticFit).
+A trader can also mark its own code, at no cost when no profile is running:
+
+    from profiler import section
+    with section("orders"):
+        ...
+
+Time is attributed to the innermost open section, and whatever is left of a
+run() call is reported as "other".
+"""
+import argparse
+import importlib
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backtest import Backtest, load_module
+from tickstore import TickStore
+
+BUDGET_MS = 900.0
+
+# (module, attribute path, section); missing modules are skipped
+AUTO_SECTIONS = [
+    ("codec", "Codec.decode", "decode"),
+    ("state", "StateManager.load", "decode"),
+    ("jsonpickle", "decode", "decode"),
+    ("codec", "Codec.encode", "encode"),
+    ("state", "StateManager.dump", "encode"),
+    ("jsonpickle", "encode", "encode"),
+    ("options", "implied_vol", "pricing"),
+    ("options", "IVCache.solve", "pricing"),
+    ("options", "bs_call", "pricing"),
+    ("numpy", "polyfit", "fitting"),
+    ("rolling", "RollingQuadraticFit.coeffs", "fitting"),
+]
+
+_NULL = nullcontext()
+_active: Optional["TickProfiler"] = None
+
+
+class _Section:
+    __slots__ = ("profiler", "name")
+
+    def __init__(self, profiler: "TickProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter(self.name)
+
+    def __exit__(self, *exc):
+        self.profiler._exit()
+
+
+def section(name: str):
+    """Context manager timing a named section of run(); a shared no-op unless profiling."""
+    if _active is None:
+        return _NULL
+    return _Section(_active, name)
+
+
+class TickProfiler:
+    """Collects run() wall times and exclusive per-section times, tick by tick."""
+
+    def __init__(self):
+        self.timestamps: List[int] = []
+        self.run_ms: List[float] = []
+        self.sections: Dict[str, List[float]] = {}
+        self._tick: Dict[str, float] = {}
+        self._stack: List[List] = []
+
+    def _enter(self, name: str) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self._tick[parent[0]] = self._tick.get(parent[0], 0.0) + now - parent[1]
+        self._stack.append([name, now])
+
+    def _exit(self) -> None:
+        now = time.perf_counter()
+        name, start = self._stack.pop()
+        self._tick[name] = self._tick.get(name, 0.0) + now - start
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def record(self, timestamp: int, seconds: float) -> None:
+        n = len(self.run_ms)
+        for name, spent in self._tick.items():
+            self.sections.setdefault(name, [0.0] * n).append(spent * 1e3)
+        for name, values in self.sections.items():
+            if len(values) == n:
+                values.append(0.0)
+        self.timestamps.append(timestamp)
+        self.run_ms.append(seconds * 1e3)
+        self._tick = {}
+        self._stack = []
+
+    def report(self, budget_ms: float = BUDGET_MS, top: int = 10) -> str:
+        if not self.run_ms:
+            return "no ticks"
+        run = np.array(self.run_ms)
+        p50, p95, p99 = np.percentile(run, [50, 95, 99])
+        lines = ["%d ticks  mean %.3fms  p50 %.3fms  p95 %.3fms  p99 %.3fms  max %.3fms (t=%d)" % (
+            len(run), run.mean(), p50, p95, p99, run.max(), self.timestamps[int(run.argmax())])]
+
+        over = np.flatnonzero(run > budget_ms)
+        lines.append("%d ticks over the %gms budget" % (len(over), budget_ms))
+        slowest = over[np.argsort(run[over])[::-1]][:top] if len(over) else np.argsort(run)[::-1][:top]
+        lines.append(("over budget:" if len(over) else "slowest:") + "  " + ", ".join(
+            "t=%d %.2fms" % (self.timestamps[i], run[i]) for i in slowest))
+
+        total = run.sum()
+        rows = [(name, np.array(values)) for name, values in self.sections.items()]
+        rows.append(("other", run - sum((v for _, v in rows), np.zeros_like(run))))
+        lines.append("%-10s %10s %8s %10s %10s" % ("section", "total ms", "share", "mean ms", "p99 ms"))
+        for name, values in sorted(rows, key=lambda r: -r[1].sum()):
+            lines.append("%-10s %10.1f %7.1f%% %10.4f %10.4f" % (
+                name, values.sum(), 100.0 * values.sum() / total, values.mean(), np.percentile(values, 99)))
+        return "\n".join(lines)
+
+
+class ProfiledTrader:
+    """Wraps a Trader so every run() call is timed into `profiler`."""
+
+    def __init__(self, trader, profiler: TickProfiler):
+        self.trader = trader
+        self.profiler = profiler
+
+    def run(self, state):
+        global _active
+        _active = self.profiler
+        start = time.perf_counter()
+        try:
+            return self.trader.run(state)
+        finally:
+            elapsed = time.perf_counter() - start
+            _active = None
+            self.profiler.record(state.timestamp, elapsed)
+
+
+def _timed(fn: Callable, name: str) -> Callable:
+    def wrapper(*args, **kwargs):
+        profiler = _active
+        if profiler is None:
+            return fn(*args, **kwargs)
+        profiler._enter(name)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler._exit()
+    wrapper.__wrapped__ = fn
+    return wrapper
+
+
+def install_auto_sections(trader_module=None) -> List[Tuple[object, str, object]]:
+    """Wrap AUTO_SECTIONS; returns what to hand to uninstall().
+
+    Functions a trader imported by name (`from options import bs_call`) are
+    also replaced in `trader_module`'s globals.
+    """
+    patched = []
+    for module_name, path, name in AUTO_SECTIONS:
+        try:
+            owner = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        *parents, attr = path.split(".")
+        for parent in parents:
+            owner = getattr(owner, parent)
+        original = getattr(owner, attr, None)
+        if original is None:
+            continue
+        wrapper = _timed(original, name)
+        patched.append((owner, attr, original))
+        setattr(owner, attr, wrapper)
+        if trader_module is not None and not parents:
+            for key, value in list(vars(trader_module).items()):
+                if value is original:
+                    patched.append((trader_module, key, original))
+                    setattr(trader_module, key, wrapper)
+    return patched
+
+
+def uninstall(patched: List[Tuple[object, str, object]]) -> None:
+    for owner, attr, original in reversed(patched):
+        setattr(owner, attr, original)
+
+
+def profile_day(trader_path, prices, trades=None, observations=None, auto_sections: bool = True) -> TickProfiler:
+    """Replay one day through a fresh Trader from `trader_path` with profiling on."""
+    module = load_module(trader_path)
+    profiler = TickProfiler()
+    patched = install_auto_sections(module) if auto_sections else []
+    try:
+        trader = ProfiledTrader(module.Trader(), profiler)
+        if Path(prices).is_dir():
+            store = TickStore(prices)
+            Backtest(trader, store.ticks(), store.trades(), store.observations()).run()
+        else:
+            Backtest(trader, prices, trades, observations).run()
+    finally:
+        uninstall(patched)
+    return profiler
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Per-tick latency profile of a Trader.")
+    parser.add_argument("trader")
+    parser.add_argument("prices", help="prices CSV or a tickstore directory")
+    parser.add_argument("trades", nargs="?")
+    parser.add_argument("observations", nargs="?")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="per-call budget in ms")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--no-auto", action="store_true", help="only time explicit section() hooks")
+    args = parser.parse_args(argv)
+    profiler = profile_day(args.trader, args.prices, args.trades, args.observations, not args.no_auto)
+    print(profiler.report(args.budget, args.top))
+
+
+if __name__ == "__main__":
+    # run through the importable module: a trader's `from profiler import section`
+    # gets that one, not this __main__ copy, and must see the same _active
+    import profiler
+    profiler.main(sys.argv[1:])
@@ -0,0 +1,339 @@
+import math
+from typing import List, Optional, Tuple
+
+
+class RollingMoments:
+    """Fixed-window mean / variance / std over a ring buffer.
+
+    Each push is O(1) regardless of window size: the running mean and the sum of
+    squared deviations (M2) are updated Welford-style when a value enters and the
+    oldest value leaves.  Every `window` evictions the moments are recomputed from
+    the buffer with a two-pass sum, so rounding drift never accumulates and
+    `std` matches `np.std(window_values)` (population, ddof=0).
+    """
+
+    __slots__ = ("window", "_buf", "_head", "_count", "_mean", "_m2", "_since_resync")
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = window
+        self._buf: List[float] = [0.0] * window
+        self._head = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._since_resync = 0
+
+    def push(self, x: float) -> None:
+        x = float(x)
+        if self._count < self.window:
+            self._buf[(self._head + self._count) % self.window] = x
+            self._count += 1
+            delta = x - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (x - self._mean)
+            return
+
+        old = self._buf[self._head]
+        self._buf[self._head] = x
+        self._head = (self._head + 1) % self.window
+        old_mean = self._mean
+        self._mean += (x - old) / self._count
+        self._m2 += (x - old) * (x - self._mean + old - old_mean)
+        if self._m2 < 0.0:
+            self._m2 = 0.0
+
+        self._since_resync += 1
+        if self._since_resync >= self.window:
+            self._resync()
+
+    def _resync(self) -> None:
+        values = self.values()
+        mean = math.fsum(values) / len(values)
+        self._mean = mean
+        self._m2 = math.fsum((v - mean) * (v - mean) for v in values)
+        self._since_resync = 0
+
+    def values(self) -> List[float]:
+        """Window contents, oldest first."""
+        if self._count < self.window:
+            return self._buf[self._head:self._head + self._count]
+        return self._buf[self._head:] + self._buf[:self._head]
+
+    def clear(self) -> None:
+        self._head = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._since_resync = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def full(self) -> bool:
+        return self._count == self.window
+
+    @property
+    def last(self) -> Optional[float]:
+        if self._count == 0:
+            return None
+        return self._buf[(self._head + self._count - 1) % self.window]
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def var(self) -> float:
+        return self._m2 / self._count if self._count else 0.0
+
+    @property
+    def sample_var(self) -> float:
+        return self._m2 / (self._count - 1) if self._count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+
+class RollingQuadraticFit:
+    """Weighted least-squares fit of y = a*x^2 + b*x + c over the last `window` points.
+
+    The normal-equation sums (sum w*x^k for k <= 4 and sum w*x^k*y for k <= 2)
+    are kept up to date as points arrive and expire, so a refit is a 3x3 solve
+    instead of a pass over the history.  Weights decay exponentially: the
+    newest point has weight 1 and each older one `decay` times the next.  Like
+    RollingMoments, the sums are rebuilt from the buffer once per window.
+    """
+
+    __slots__ = ("window", "decay", "_xs", "_ys", "_head", "_count", "_sx", "_sxy",
+                 "_expire_weight", "_since_resync")
+
+    def __init__(self, window: int, decay: float = 1.0):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        if not 0.0 < decay <= 1.0:
+            raise ValueError("decay must be in (0, 1]")
+        self.window = window
+        self.decay = decay
+        self._xs: List[float] = [0.0] * window
+        self._ys: List[float] = [0.0] * window
+        self._head = 0
+        self._count = 0
+        self._sx = [0.0] * 5
+        self._sxy = [0.0] * 3
+        self._expire_weight = decay ** window
+        self._since_resync = 0
+
+    def push(self, x: float, y: float) -> None:
+        x = float(x)
+        y = float(y)
+        sx = self._sx
+        sxy = self._sxy
+        if self.decay != 1.0:
+            d = self.decay
+            for k in range(5):
+                sx[k] *= d
+            for k in range(3):
+                sxy[k] *= d
+
+        if self._count == self.window:
+            ox = self._xs[self._head]
+            oy = self._ys[self._head]
+            p = self._expire_weight
+            for k in range(5):
+                sx[k] -= p
+                if k < 3:
+                    sxy[k] -= p * oy
+                p *= ox
+            slot = self._head
+            self._head = (self._head + 1) % self.window
+        else:
+            slot = (self._head + self._count) % self.window
+            self._count += 1
+        self._xs[slot] = x
+        self._ys[slot] = y
+
+        p = 1.0
+        for k in range(5):
+            sx[k] += p
+            if k < 3:
+                sxy[k] += p * y
+            p *= x
+
+        self._since_resync += 1
+        if self._since_resync >= self.window:
+            self._resync()
+
+    def _resync(self) -> None:
+        sx = [0.0] * 5
+        sxy = [0.0] * 3
+        w = 1.0
+        for i in range(self._count - 1, -1, -1):
+            slot = (self._head + i) % self.window
+            x = self._xs[slot]
+            y = self._ys[slot]
+            p = w
+            for k in range(5):
+                sx[k] += p
+                if k < 3:
+                    sxy[k] += p * y
+                p *= x
+            w *= self.decay
+        self._sx = sx
+        self._sxy = sxy
+        self._since_resync = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def coeffs(self) -> Optional[Tuple[float, float, float]]:
+        """(a, b, c), highest power first like np.polyfit; None if the points can't pin a parabola."""
+        s0, s1, s2, s3, s4 = self._sx
+        t0, t1, t2 = self._sxy
+        # Cramer's rule on [[s4, s3, s2], [s3, s2, s1], [s2, s1, s0]] @ [a, b, c] = [t2, t1, t0]
+        m00 = s2 * s0 - s1 * s1
+        m01 = s3 * s0 - s1 * s2
+        m02 = s3 * s1 - s2 * s2
+        det = s4 * m00 - s3 * m01 + s2 * m02
+        if self._count < 3 or abs(det) <= 1e-12 * abs(s4 * s2 * s0):
+            return None
+        a = (t2 * m00 - s3 * (t1 * s0 - s1 * t0) + s2 * (t1 * s1 - s2 * t0)) / det
+        b = (s4 * (t1 * s0 - s1 * t0) - t2 * m01 + s2 * (s3 * t0 - t1 * s2)) / det
+        c = (s4 * (s2 * t0 - t1 * s1) - s3 * (s3 * t0 - t1 * s2) + t2 * m02) / det
+        return a, b, c
+
+    def predict(self, x):
+        """Fitted y at x (scalar or array); None while coeffs() is None."""
+        coeffs = self.coeffs()
+        if coeffs is None:
+            return None
+        a, b, c = coeffs
+        return (a * x + b) * x + c
+
+
+class RollingLinearFit:
+    """Least-squares line through the last `window` values against their index.
+
+    Equivalent to `np.polyfit(np.arange(n), window_values, 1)` plus R^2, in O(1)
+    per push: the index sums are closed-form and sum(y), sum(x*y), sum(y^2) are
+    slid along with the window.  Values are stored relative to the first one
+    pushed so the sums of squares don't lose precision at price level, and the
+    sums are rebuilt once per window like the other rolling objects.
+    """
+
+    __slots__ = ("window", "_buf", "_head", "_count", "_offset", "_sy", "_sxy", "_syy",
+                 "_since_resync")
+
+    def __init__(self, window: int):
+        if window < 2:
+            raise ValueError("window must be >= 2")
+        self.window = window
+        self._buf: List[float] = [0.0] * window
+        self._head = 0
+        self._count = 0
+        self._offset: Optional[float] = None
+        self._sy = 0.0
+        self._sxy = 0.0
+        self._syy = 0.0
+        self._since_resync = 0
+
+    def push(self, value: float) -> None:
+        if self._offset is None:
+            self._offset = float(value)
+        y = float(value) - self._offset
+        if self._count < self.window:
+            self._buf[self._count] = y
+            self._sxy += self._count * y
+            self._count += 1
+            self._sy += y
+            self._syy += y * y
+            return
+
+        old = self._buf[self._head]
+        self._buf[self._head] = y
+        self._head = (self._head + 1) % self.window
+        # Drop the oldest (x = 0), shift every other x down by one, append at x = n - 1
+        self._sy -= old
+        self._sxy -= self._sy
+        self._sxy += (self.window - 1) * y
+        self._sy += y
+        self._syy += y * y - old * old
+
+        self._since_resync += 1
+        if self._since_resync >= self.window:
+            self._resync()
+
+    def _resync(self) -> None:
+        values = self._ordered()
+        self._sy = math.fsum(values)
+        self._sxy = math.fsum(i * v for i, v in enumerate(values))
+        self._syy = math.fsum(v * v for v in values)
+        self._since_resync = 0
+
+    def _ordered(self) -> List[float]:
+        if self._count < self.window:
+            return self._buf[:self._count]
+        return self._buf[self._head:] + self._buf[:self._head]
+
+    def values(self) -> List[float]:
+        """Window contents, oldest first."""
+        return [v + self._offset for v in self._ordered()]
+
+    def clear(self) -> None:
+        self._head = 0
+        self._count = 0
+        self._offset = None
+        self._sy = self._sxy = self._syy = 0.0
+        self._since_resync = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _centered(self) -> Tuple[float, float, float]:
+        n = self._count
+        sx = n * (n - 1) / 2.0
+        sxx = (n - 1) * n * (2 * n - 1) / 6.0
+        return (sxx - sx * sx / n,
+                self._sxy - sx * self._sy / n,
+                self._syy - self._sy * self._sy / n)
+
+    @property
+    def mean(self) -> float:
+        if not self._count:
+            return 0.0
+        return self._sy / self._count + self._offset
+
+    @property
+    def slope(self) -> float:
+        if self._count < 2:
+            return 0.0
+        cxx, cxy, _ = self._centered()
+        return cxy / cxx
+
+    @property
+    def intercept(self) -> float:
+        """Fitted value at the oldest point in the window (x = 0)."""
+        if not self._count:
+            return 0.0
+        return self.mean - self.slope * (self._count - 1) / 2.0
+
+    @property
+    def r2(self) -> float:
+        if self._count < 2:
+            return 0.0
+        cxx, cxy, cyy = self._centered()
+        if cyy <= 0.0:
+            return 0.0
+        return min(1.0, cxy * cxy / (cxx * cyy))
+
+    @property
+    def mean_diff(self) -> float:
+        """np.mean(np.diff(window)): the diffs telescope to (last - first) / (n - 1)."""
+        if self._count < 2:
+            return 0.0
+        first = self._buf[self._head if self._count == self.window else 0]
+        last = self._buf[(self._head - 1) % self.window if self._count == self.window else self._count - 1]
+        return (last - first) / (self._count - 1)
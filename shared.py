@@ -0,0 +1,123 @@
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tickstore import DayColumns
+
+# A day's columns broadcast to worker processes through shared memory.  The
+# parent copies each column into its own SharedMemory block once; workers
+# attach by name and wrap the blocks in NumPy arrays without copying, so N
+# workers replaying the same day hold one copy of it between them.  Books are
+# handed to the trader as tickstore.LazyDepths, which only turn the products a
+# trader actually looks up into OrderDepth objects.
+#
+#     with SharedDay.create(TickStore("data/r4d1"), products=ROCK_AND_VOUCHERS) as day:
+#         pool = ProcessPoolExecutor(initializer=init, initargs=(day.handle(),))
+#         ...
+#     # in the worker
+#     day = SharedDay.attach(handle)
+#     Backtest(trader, day.ticks(lazy=True), day.trades(), day.observations()).run()
+
+
+class SharedDay(DayColumns):
+    def __init__(self, meta: dict, columns: Dict[str, np.ndarray],
+                 blocks: Dict[str, shared_memory.SharedMemory], owner: bool):
+        super().__init__(meta, columns)
+        self._blocks = blocks
+        self._owner = owner
+
+    @classmethod
+    def create(cls, day: DayColumns, products: Optional[List[str]] = None) -> "SharedDay":
+        """Copy `day` (optionally only some products) into new shared memory blocks.
+
+        The creating process owns the blocks and unlinks them on close().
+        """
+        meta, columns = _subset(day, products)
+        blocks = {}
+        shared = {}
+        try:
+            for name, values in columns.items():
+                values = np.ascontiguousarray(values)
+                block = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+                blocks[name] = block
+                shared[name] = np.ndarray(values.shape, values.dtype, buffer=block.buf)
+                shared[name][...] = values
+        except BaseException:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+            raise
+        return cls(meta, shared, blocks, owner=True)
+
+    def handle(self) -> dict:
+        """What a worker needs to attach; small and picklable."""
+        return {"meta": self.meta,
+                "columns": {name: (self._blocks[name].name, values.shape, values.dtype.str)
+                            for name, values in self.columns().items()}}
+
+    @classmethod
+    def attach(cls, handle: dict) -> "SharedDay":
+        """Read-only views over blocks created by another process."""
+        blocks = {}
+        columns = {}
+        for name, (block_name, shape, dtype) in handle["columns"].items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks[name] = block
+            values = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+            values.flags.writeable = False
+            columns[name] = values
+        return cls(handle["meta"], columns, blocks, owner=False)
+
+    def close(self) -> None:
+        # drop the array views first; a block can't close while they export its buffer
+        self.timestamps = self.bid_price = self.bid_volume = None
+        self.ask_price = self.ask_volume = self.mid_price = None
+        self.trade = {}
+        self.obs = {}
+        for block in self._blocks.values():
+            block.close()
+            if self._owner:
+                block.unlink()
+        self._blocks = {}
+
+    def __enter__(self) -> "SharedDay":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _subset(day: DayColumns, products: Optional[List[str]]) -> Tuple[dict, Dict[str, np.ndarray]]:
+    columns = day.columns()
+    if products is None:
+        return day.meta, columns
+    missing = [p for p in products if p not in day.product_index]
+    if missing:
+        raise KeyError("not in this day: " + ", ".join(missing))
+
+    book = [p for p in day.book_products if p in products]
+    others = [p for p in day.products if p in products and p not in book]
+    kept = book + others
+    book_index = [day.product_index[p] for p in book]
+    out = {"timestamps": columns["timestamps"]}
+    for name in ("bid_price", "bid_volume", "ask_price", "ask_volume", "mid_price"):
+        out[name] = columns[name][:, book_index]
+
+    if "trade_product" in columns:
+        # product codes index the product list, which shrinks: remap, and drop other products' trades
+        remap = np.full(len(day.products), -1, np.int16)
+        for i, p in enumerate(kept):
+            remap[day.product_index[p]] = i
+        codes = remap[np.asarray(columns["trade_product"])]
+        keep = codes >= 0
+        for name, values in columns.items():
+            if name.startswith("trade_"):
+                out[name] = np.asarray(values)[keep]
+        out["trade_product"] = codes[keep]
+    for name, values in columns.items():
+        if name.startswith("obs_"):
+            out[name] = values
+
+    meta = dict(day.meta, products=kept, book_products=len(book))
+    return meta, out
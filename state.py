@@ -0,0 +1,103 @@
+import base64
+from typing import Any, Dict, Optional
+
+from codec import VERSION, Bytes, Str
+
+# One traderData string shared by several strategies.  Each strategy owns a
+# namespace with its own codec; the string holds every namespace's packed
+# payload side by side.  Per tick the string is base64-decoded once and split
+# into raw payloads, and a namespace is only unpacked when its strategy asks for
+# it.  On the way out, namespaces that weren't written are copied through as
+# the bytes they arrived as, so the cost of dump() follows what changed this
+# tick rather than how many strategies share the submission:
+#
+#     STATE = StateManager({"kelp": Codec({...}), "macarons": Codec({...})})
+#     STATE.load(state.traderData)
+#     kelp = STATE.namespace("kelp")        # mutable, will be re-encoded
+#     book = STATE.view("macarons")         # read-only, copied through
+#     ...
+#     return result, conversions, STATE.dump()
+
+_NAME = Str()
+_PAYLOAD = Bytes()
+
+
+class StateManager:
+    def __init__(self, codecs: Dict[str, Any]):
+        """`codecs` maps namespace name to a codec.Codec (or JsonCodec)."""
+        self.codecs = codecs
+        self._text = ""
+        self._raw: Dict[str, bytes] = {}
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._dirty = set()
+
+    def load(self, trader_data: str) -> None:
+        """Start a tick.  Anything that isn't a StateManager payload (an empty
+        string, or traderData written by an older jsonpickle trader) loads as
+        every namespace at its defaults."""
+        self._text = trader_data
+        self._data = {}
+        self._dirty = set()
+        try:
+            self._raw = self._split(trader_data)
+        except (ValueError, IndexError, UnicodeDecodeError):
+            self._text = ""
+            self._raw = {}
+
+    @staticmethod
+    def _split(text: str) -> Dict[str, bytes]:
+        if not text:
+            return {}
+        buf = base64.b64decode(text, validate=True)
+        if not buf or buf[0] != VERSION:
+            raise ValueError("not a state payload")
+        raw = {}
+        pos = 1
+        while pos < len(buf):
+            name, pos = _NAME.unpack(buf, pos)
+            raw[name], pos = _PAYLOAD.unpack(buf, pos)
+        return raw
+
+    def view(self, name: str) -> Dict[str, Any]:
+        """Namespace contents for reading.  Changes made through a view are not
+        saved unless the namespace is also requested with namespace()."""
+        data = self._data.get(name)
+        if data is None:
+            codec = self.codecs[name]
+            raw = self._raw.get(name)
+            data = codec.defaults()
+            if raw is not None:
+                try:
+                    data = codec.unpack(raw)
+                except ValueError:
+                    # a namespace whose schema changed between submissions starts over
+                    self._raw.pop(name)
+            self._data[name] = data
+        return data
+
+    def namespace(self, name: str) -> Dict[str, Any]:
+        """Namespace contents for writing; it is re-encoded by the next dump()."""
+        data = self.view(name)
+        self._dirty.add(name)
+        return data
+
+    def clear(self, name: str) -> Dict[str, Any]:
+        """Reset a namespace to its codec's defaults; it is re-encoded by the next dump()."""
+        data = self.codecs[name].defaults()
+        self._data[name] = data
+        self._dirty.add(name)
+        return data
+
+    def dump(self) -> str:
+        if not self._dirty and self._text:
+            return self._text
+        out = bytearray((VERSION,))
+        for name, codec in self.codecs.items():
+            if name in self._dirty:
+                payload: Optional[bytes] = codec.pack(self._data[name])
+            else:
+                payload = self._raw.get(name)
+            if payload is not None:
+                _NAME.pack(out, name)
+                _PAYLOAD.pack(out, payload)
+        return base64.b64encode(out).decode("ascii")
@@ -0,0 +1,281 @@
+"""Parameter sweeps: backtest one strategy file across many parameter sets in parallel.
+
+    python sweep.py TotalRound4.py prices_day_1.csv,trades_day_1.csv,obs_day_1.csv \\
+        --param bollinger_alpha=2,2.5,3 --param cooldown_ticks=1000,2000 --workers 8
+
+    python sweep.py "April 15/Round3Final.py" prices_day_1.csv,trades_day_1.csv \\
+        --param MIN_CONFIDENCE=0.02:0.12 --param MAX_HISTORY=30:90 --random 64
+
+A parameter is either a module-level constant (upper case, e.g. MIN_CONFIDENCE)
+or an attribute the Trader sets in __init__ (e.g. bollinger_alpha).  Constants
+are patched on a fresh copy of the module before the Trader is built, so values
+the module derives at import time keep their defaults; a constant that no
+function or method in the file reads is rejected rather than swept for nothing.
+Attributes are substituted as __init__ assigns them, so objects __init__ builds
+from them (a RollingMoments(self.vol_window_size), say) see the swept value.
+
+Each worker process parses the market data once in its initializer and replays
+it for every parameter set it is given; a day imported with tickstore.py is
+memory-mapped instead, so all workers read the same pages.  With --shared the
+parent decodes every day once and the workers attach to it in shared memory.
+"""
+import argparse
+import functools
+import inspect
+import itertools
+import random
+import sys
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+from backtest import Backtest, load_module, read_observations, read_prices, read_trades
+from shared import SharedDay
+from tickstore import DayColumns, TickStore, read_day
+
+Day = Tuple[str, Optional[str], Optional[str]]  # prices, trades, observations CSVs (or a tickstore dir)
+
+
+class SweepResult(NamedTuple):
+    params: Dict[str, Any]
+    pnl: float
+    day_pnl: List[float]
+    fills: int
+    rejected: int
+    run_time: float
+
+
+def grid(**values: Sequence) -> List[Dict[str, Any]]:
+    """Every combination: grid(alpha=[2, 3], window=[10, 20]) gives 4 parameter sets."""
+    names = list(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values[n] for n in names))]
+
+
+def uniform(lo: float, hi: float) -> Callable[[random.Random], float]:
+    return lambda rng: rng.uniform(lo, hi)
+
+
+def randint(lo: int, hi: int) -> Callable[[random.Random], int]:
+    return lambda rng: rng.randint(lo, hi)
+
+
+def choice(*options) -> Callable[[random.Random], Any]:
+    return lambda rng: rng.choice(options)
+
+
+def sample(n: int, seed: int = 0, **dists: Callable[[random.Random], Any]) -> List[Dict[str, Any]]:
+    """n random parameter sets: sample(50, alpha=uniform(1.5, 3.5), window=randint(10, 40))."""
+    rng = random.Random(seed)
+    return [{name: dist(rng) for name, dist in dists.items()} for _ in range(n)]
+
+
+@functools.lru_cache(maxsize=None)
+def _runtime_names(path: str) -> FrozenSet[str]:
+    """Names read by the functions and methods of a strategy file, i.e. after import."""
+    names = set()
+    stack = [compile(Path(path).read_text(), path, "exec")]
+    while stack:
+        code = stack.pop()
+        if code.co_flags & inspect.CO_OPTIMIZED:   # function bodies, not module or class bodies
+            names.update(code.co_names)
+        stack.extend(c for c in code.co_consts if isinstance(c, types.CodeType))
+    return frozenset(names)
+
+
+def build_trader(path: str, params: Dict[str, Any]):
+    """A Trader from `path` with `params` applied (see the module docstring)."""
+    module = load_module(path)
+    attrs = {}
+    for name, value in params.items():
+        if name.isupper() and hasattr(module, name):
+            if name not in _runtime_names(str(path)):
+                raise ValueError("%s: %s is only read at import, so setting it has no effect" % (path, name))
+            setattr(module, name, value)
+        else:
+            attrs[name] = value
+    cls = module.Trader
+    if not attrs:
+        return cls()
+
+    class Tuned(cls):
+        def __setattr__(self, name, value):
+            object.__setattr__(self, name, attrs.get(name, value))
+
+    trader = Tuned.__new__(Tuned)
+    cls.__init__(trader)
+    # back to the plain class: no override cost inside run(), and the attributes
+    # can change freely from here on
+    trader.__class__ = cls
+    unknown = [name for name in attrs if name not in vars(trader)]
+    if unknown:
+        raise ValueError("%s: unknown parameter(s) %s" % (path, ", ".join(unknown)))
+    return trader
+
+
+_DAYS: List[Callable[[], tuple]] = []
+
+
+def load_day(day: Day) -> Callable[[], tuple]:
+    """A callable returning fresh (prices, trades, observations) streams for a day.
+
+    CSV days are parsed once and kept in memory.  A tickstore directory given
+    as the prices path is memory-mapped instead, so workers share its pages.
+    """
+    prices, trades, observations = day
+    if Path(prices).is_dir():
+        store = TickStore(prices)
+        return lambda: (store.ticks(), store.trades(), store.observations())
+    parsed = (list(read_prices(prices)),
+              list(read_trades(trades)) if trades else [],
+              list(read_observations(observations)) if observations else [])
+    return lambda: parsed
+
+
+def open_day(day: Day) -> DayColumns:
+    """A day as columns: memory-mapped for a tickstore directory, parsed into memory for CSVs."""
+    prices, trades, observations = day
+    if Path(prices).is_dir():
+        return TickStore(prices)
+    return DayColumns(*read_day(prices, trades, observations))
+
+
+_SHARED: List[SharedDay] = []
+
+
+def _init_worker(days: List[Day], handles: Optional[List[dict]] = None) -> None:
+    if handles is None:
+        _DAYS[:] = [load_day(day) for day in days]
+        return
+    _SHARED[:] = [SharedDay.attach(handle) for handle in handles]
+    _DAYS[:] = [_shared_streams(day) for day in _SHARED]
+
+
+def _shared_streams(day: SharedDay) -> Callable[[], tuple]:
+    return lambda: (day.ticks(lazy=True), day.trades(), day.observations())
+
+
+def run_one(path: str, params: Dict[str, Any]) -> SweepResult:
+    """Backtest one parameter set over every loaded day, a fresh Trader per day."""
+    day_pnl = []
+    fills = rejected = 0
+    run_time = 0.0
+    for streams in _DAYS:
+        prices, trades, observations = streams()
+        result = Backtest(build_trader(path, params), prices, trades, observations).run()
+        day_pnl.append(result.final_pnl)
+        fills += len(result.fills)
+        rejected += sum(result.rejected.values())
+        run_time += result.run_time
+    return SweepResult(params, sum(day_pnl), day_pnl, fills, rejected, run_time)
+
+
+def _run_task(task: Tuple[str, Dict[str, Any]]) -> SweepResult:
+    return run_one(*task)
+
+
+def sweep(path: str, param_sets: List[Dict[str, Any]], days: List[Day], workers: Optional[int] = None,
+          shared: bool = False, products: Optional[List[str]] = None) -> List[SweepResult]:
+    """Backtest every parameter set over `days`, best total PnL first.
+
+    With `shared`, the days are decoded once here and broadcast to the workers
+    through shared memory (see shared.py), optionally cut down to `products`.
+    `workers=1` runs in this process, which is handy under a debugger.
+    """
+    if products is not None and not shared:
+        raise ValueError("products= needs shared=True")
+    shared_days: List[SharedDay] = []
+    try:
+        # created inside the try so a day that fails to load still unlinks the ones before it
+        for day in days if shared else []:
+            shared_days.append(SharedDay.create(open_day(day), products))
+        initargs = (days, [day.handle() for day in shared_days] if shared else None)
+        if workers == 1:
+            _init_worker(*initargs)
+            results = [run_one(path, params) for params in param_sets]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=initargs) as pool:
+                results = list(pool.map(_run_task, [(path, p) for p in param_sets]))
+    finally:
+        for day in _SHARED:
+            day.close()
+        _SHARED.clear()
+        _DAYS.clear()
+        for day in shared_days:
+            day.close()
+    return sorted(results, key=lambda r: r.pnl, reverse=True)
+
+
+def format_table(results: List[SweepResult], top: Optional[int] = 20) -> str:
+    if not results:
+        return "no results"
+    names = list(results[0].params)
+    header = ["rank"] + names + ["pnl"] + ["day%d" % i for i in range(len(results[0].day_pnl))] + \
+             ["fills", "rejected", "run_s"]
+    rows = []
+    for rank, r in enumerate(results[:top], 1):
+        rows.append([str(rank)] + [_fmt(r.params[n]) for n in names] + ["%.1f" % r.pnl] +
+                    ["%.1f" % p for p in r.day_pnl] + [str(r.fills), str(r.rejected), "%.2f" % r.run_time])
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+    return "\n".join("  ".join(cell.rjust(w) for cell, w in zip(row, widths)) for row in [header] + rows)
+
+
+def _fmt(value) -> str:
+    return "%.4g" % value if isinstance(value, float) else str(value)
+
+
+def _parse_value(text: str):
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep over backtests.")
+    parser.add_argument("trader")
+    parser.add_argument("days", nargs="+",
+                        help="prices.csv[,trades.csv[,observations.csv]] or a tickstore directory, per day")
+    parser.add_argument("--param", action="append", default=[],
+                        help="name=v1,v2,... for a grid, or name=lo:hi with --random")
+    parser.add_argument("--random", type=int, default=0, help="sample this many random sets instead of a grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--shared", action="store_true", help="broadcast the days through shared memory")
+    parser.add_argument("--products", help="comma-separated products to keep (with --shared)")
+    args = parser.parse_args(argv)
+
+    days = []
+    for spec in args.days:
+        parts = spec.split(",") + [None, None]
+        days.append((parts[0], parts[1] or None, parts[2] or None))
+
+    specs = dict(p.split("=", 1) for p in args.param)
+    if args.random:
+        dists = {}
+        for name, spec in specs.items():
+            if ":" in spec:
+                lo, hi = (_parse_value(v) for v in spec.split(":"))
+                both_int = isinstance(lo, int) and isinstance(hi, int)
+                dists[name] = randint(lo, hi) if both_int else uniform(lo, hi)
+            else:
+                dists[name] = choice(*(_parse_value(v) for v in spec.split(",")))
+        param_sets = sample(args.random, args.seed, **dists)
+    else:
+        param_sets = grid(**{name: [_parse_value(v) for v in spec.split(",")] for name, spec in specs.items()})
+
+    start = time.perf_counter()
+    products = args.products.split(",") if args.products else None
+    results = sweep(args.trader, param_sets, days, args.workers, args.shared, products)
+    elapsed = time.perf_counter() - start
+    print(format_table(results, args.top))
+    print("%d backtests x %d days in %.1fs" % (len(param_sets), len(days), elapsed))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
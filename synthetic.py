@@ -0,0 +1,424 @@
+"""Synthetic market days for load and stress testing strategies.
+
+    python synthetic.py --ticks 1000000 --out data/synth_1m            # write a tickstore day
+    python synthetic.py --ticks 200000 --trader TotalRound4.py \\
+        --spikes 0.0002,2000,4 --depth 5                              # backtest it directly
+
+Every product's fair value follows a process: geometric Brownian motion for
+VOLCANIC_ROCK and the basket constituents, Ornstein-Uhlenbeck mean reversion
+for KELP and SQUID_INK, a fixed fair for RAINFOREST_RESIN, baskets as their
+weighted constituents plus a mean-reverting premium, and vouchers priced off
+the rock with Black-Scholes.  Shocks are correlated across products, and
+volatility spikes scale shocks and spreads together.  Books are quoted around
+the fair values with three levels.
+
+Everything is generated with NumPy a chunk of ticks at a time, as DayColumns,
+so a day of millions of ticks streams into the backtester in constant memory:
+
+    day = SyntheticMarket(seed=1, spikes=Spikes(2e-4, 2000, 4.0)).day(1_000_000)
+    Backtest(trader, *day.streams()).run()
+
+A day is reproducible from its seed and chunk size; each streams() call
+starts it over.
+"""
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backtest import Backtest, Tick, load_trader
+from datamodel import ConversionObservation, Trade
+from options import bs_call
+from tickstore import BOOK_COLUMNS, LEVELS, TRADE_FIELDS, DayColumns
+
+TICK = 100             # timestamp step
+TICKS_PER_DAY = 10000  # for voucher expiry
+
+
+class GBM(NamedTuple):
+    """Geometric Brownian motion; sigma and mu are per tick."""
+    s0: float
+    sigma: float
+    mu: float = 0.0
+
+
+class OU(NamedTuple):
+    """Mean reversion: x += theta * (mean - x) + sigma * z every tick, starting at the mean."""
+    mean: float
+    theta: float
+    sigma: float
+
+
+class Fixed(NamedTuple):
+    fair: float
+
+
+class Basket(NamedTuple):
+    """sum(weight * constituent fair) plus a premium that mean-reverts around `premium`."""
+    weights: Dict[str, float]
+    premium: float
+    theta: float
+    sigma: float
+
+
+class Voucher(NamedTuple):
+    """A call on `underlying` at a flat per-day `iv`, expiring `days` after the first tick."""
+    underlying: str
+    strike: float
+    iv: float
+    days: float
+
+
+class Quotes(NamedTuple):
+    half_spread: float  # typical distance from the fair to the best bid and ask
+    volume: int         # typical volume per level
+
+
+class Spikes(NamedTuple):
+    """Each tick starts a spike with probability `rate`; for `length` ticks
+    shocks and spreads are scaled by `multiplier`."""
+    rate: float
+    length: int
+    multiplier: float
+
+
+PROCESSES = {
+    "RAINFOREST_RESIN": Fixed(10000.0),
+    "KELP": OU(2030.0, 0.002, 0.5),
+    "SQUID_INK": OU(1900.0, 0.0005, 1.5),
+    "CROISSANTS": GBM(4300.0, 1.2e-4),
+    "JAMS": GBM(6600.0, 1.2e-4),
+    "DJEMBES": GBM(13400.0, 1.0e-4),
+    "PICNIC_BASKET1": Basket({"CROISSANTS": 6, "JAMS": 3, "DJEMBES": 1}, 50.0, 0.005, 4.0),
+    "PICNIC_BASKET2": Basket({"CROISSANTS": 4, "JAMS": 2}, 30.0, 0.005, 2.5),
+    "VOLCANIC_ROCK": GBM(10000.0, 1.2e-4),
+    **{"VOLCANIC_ROCK_VOUCHER_%d" % k: Voucher("VOLCANIC_ROCK", k, 0.012, 7.0)
+       for k in (9500, 9750, 10000, 10250, 10500)},
+}
+
+CORRELATION = {
+    ("CROISSANTS", "JAMS"): 0.5,
+    ("CROISSANTS", "DJEMBES"): 0.3,
+    ("JAMS", "DJEMBES"): 0.3,
+}
+
+QUOTES = {
+    "RAINFOREST_RESIN": Quotes(3.5, 25),
+    "KELP": Quotes(1.5, 20),
+    "SQUID_INK": Quotes(1.5, 20),
+    "CROISSANTS": Quotes(0.5, 80),
+    "JAMS": Quotes(0.5, 80),
+    "DJEMBES": Quotes(0.5, 40),
+    "PICNIC_BASKET1": Quotes(4.0, 15),
+    "PICNIC_BASKET2": Quotes(3.0, 20),
+    "VOLCANIC_ROCK": Quotes(0.5, 80),
+}
+DEFAULT_QUOTES = Quotes(0.5, 20)
+LEVEL_PRESENT = (1.0, 0.7, 0.4)  # chance each level is quoted
+
+
+def _ar1(x0: float, a: float, shocks: np.ndarray, block: int = 256) -> np.ndarray:
+    """x[t] = a * x[t-1] + shocks[t] with x[-1] = x0, vectorized by blocks.
+
+    Inside a block it is a cumulative sum of shocks scaled by a**-k; the
+    block length keeps a**-k finite, and only the block boundaries are
+    carried in Python.
+    """
+    n = len(shocks)
+    if n == 0:
+        return shocks.copy()
+    if a == 0.0:
+        return shocks.copy()
+    if a < 1.0:
+        block = max(1, min(block, int(600 / -math.log(a))))
+    rows = -(-n // block)
+    padded = np.zeros(rows * block)
+    padded[:n] = shocks
+    padded = padded.reshape(rows, block)
+    powers = a ** np.arange(block)
+    local = np.cumsum(padded / powers, axis=1) * powers  # each block started from zero
+    carry = np.empty(rows)
+    prev = x0
+    ends = local[:, -1]
+    a_block = a ** block
+    for r in range(rows):
+        carry[r] = prev
+        prev = a_block * prev + ends[r]
+    return (local + (a * powers)[None, :] * carry[:, None]).ravel()[:n]
+
+
+class SyntheticMarket:
+    """Processes, quoting and noise settings; day() makes a stream of ticks from them.
+
+    `correlation` holds pairwise correlations of the GBM and OU shocks,
+    `depth` scales every level's volume and `trade_rate` is the chance per
+    product per tick of a market trade at the touch.
+    """
+
+    def __init__(self, processes: Optional[Dict[str, object]] = None,
+                 quotes: Optional[Dict[str, Quotes]] = None,
+                 correlation: Optional[Dict[Tuple[str, str], float]] = None,
+                 spikes: Optional[Spikes] = None, depth: float = 1.0, trade_rate: float = 0.05,
+                 seed: int = 0):
+        self.processes = PROCESSES if processes is None else processes
+        self.quotes = QUOTES if quotes is None else quotes
+        self.spikes = spikes
+        self.depth = depth
+        self.trade_rate = trade_rate
+        self.seed = seed
+        self.products = list(self.processes)
+        for product, process in self.processes.items():
+            refs = process.weights if isinstance(process, Basket) else \
+                [process.underlying] if isinstance(process, Voucher) else []
+            for ref in refs:
+                if not isinstance(self.processes.get(ref), (GBM, OU, Fixed)):
+                    raise ValueError("%s: %s must be a GBM, OU or Fixed product" % (product, ref))
+
+        self._stochastic = [p for p, proc in self.processes.items() if isinstance(proc, (GBM, OU))]
+        corr = np.eye(len(self._stochastic))
+        index = {p: i for i, p in enumerate(self._stochastic)}
+        for (a, b), rho in (CORRELATION if correlation is None else correlation).items():
+            if a in index and b in index:
+                corr[index[a], index[b]] = corr[index[b], index[a]] = rho
+        self._cholesky = np.linalg.cholesky(corr)
+
+    def day(self, ticks: int, chunk: int = 10000, day: int = 0) -> "SyntheticDay":
+        return SyntheticDay(self, ticks, chunk, day)
+
+    def generate(self, ticks: int, chunk: int = 10000, day: int = 0) -> Iterator[DayColumns]:
+        """The day's ticks as DayColumns of up to `chunk` rows each, in order."""
+        rng = np.random.default_rng(self.seed)
+        meta = {"day": day, "products": self.products, "book_products": len(self.products),
+                "traders": [""], "has_trades": True, "has_observations": False}
+        last = {p: proc.s0 for p, proc in self.processes.items() if isinstance(proc, GBM)}
+        dev = {p: 0.0 for p, proc in self.processes.items() if isinstance(proc, (OU, Basket))}
+        spike_tail = np.zeros(0, bool)
+        for start in range(0, ticks, chunk):
+            n = min(chunk, ticks - start)
+            scale, spike_tail = self._spike_scale(rng, n, spike_tail)
+            fair = self._fair_values(rng, start, n, scale, last, dev)
+            columns = self._book(rng, fair, scale)
+            columns["timestamps"] = (start + np.arange(n, dtype=np.int64)) * TICK
+            columns.update(self._trades(rng, columns))
+            yield DayColumns(meta, columns)
+
+    def _spike_scale(self, rng, n: int, tail: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.spikes is None:
+            return np.ones(n), tail
+        length = self.spikes.length
+        starts = np.concatenate([tail, rng.random(n) < self.spikes.rate])
+        counts = np.concatenate([[0], np.cumsum(starts)])
+        # a tick is in a spike if one started within the last `length` ticks
+        end = np.arange(len(tail), len(starts)) + 1
+        active = counts[end] - counts[np.maximum(end - length, 0)] > 0
+        return np.where(active, self.spikes.multiplier, 1.0), starts[-(length - 1):] if length > 1 else tail[:0]
+
+    def _fair_values(self, rng, start: int, n: int, scale: np.ndarray, last: Dict[str, float],
+                     dev: Dict[str, float]) -> Dict[str, np.ndarray]:
+        z = rng.standard_normal((n, len(self._stochastic))) @ self._cholesky.T
+        fair = {}
+        for i, product in enumerate(self._stochastic):
+            proc = self.processes[product]
+            if isinstance(proc, GBM):
+                vol = proc.sigma * scale
+                path = math.log(last[product]) + np.cumsum(proc.mu - 0.5 * vol * vol + vol * z[:, i])
+                fair[product] = np.exp(path)
+                last[product] = float(fair[product][-1])
+            else:
+                x = _ar1(dev[product], 1.0 - proc.theta, proc.sigma * scale * z[:, i])
+                dev[product] = float(x[-1])
+                fair[product] = proc.mean + x
+        for product, proc in self.processes.items():
+            if isinstance(proc, Fixed):
+                fair[product] = np.full(n, proc.fair)
+        for product, proc in self.processes.items():
+            if isinstance(proc, Basket):
+                x = _ar1(dev[product], 1.0 - proc.theta, proc.sigma * scale * rng.standard_normal(n))
+                dev[product] = float(x[-1])
+                fair[product] = sum(w * fair[c] for c, w in proc.weights.items()) + proc.premium + x
+            elif isinstance(proc, Voucher):
+                T = np.maximum(proc.days - (start + np.arange(n)) / TICKS_PER_DAY, 0.0)
+                fair[product] = bs_call(fair[proc.underlying], proc.strike, T, proc.iv)
+        return fair
+
+    def _book(self, rng, fair: Dict[str, np.ndarray], scale: np.ndarray) -> Dict[str, np.ndarray]:
+        n, P = len(scale), len(self.products)
+        columns = {name: np.zeros((n, P, LEVELS), np.int32) for name in BOOK_COLUMNS}
+        mid = np.full((n, P), np.nan)
+        for p, product in enumerate(self.products):
+            quotes = self.quotes.get(product, DEFAULT_QUOTES)
+            f = fair[product]
+            half = np.maximum(0.5, quotes.half_spread * scale * rng.uniform(0.5, 1.5, n))
+            # levels behind the best are 1 or 2 ticks apart
+            gaps = np.cumsum(rng.integers(1, 3, (2, n, LEVELS)), axis=2) - 1
+            gaps -= gaps[:, :, :1]
+            bid = np.floor(f - half).astype(np.int64)[:, None] - gaps[0]
+            ask = np.maximum(np.ceil(f + half).astype(np.int64), 1)[:, None] + gaps[1]
+            present = rng.random((n, 2, LEVELS)) < np.array(LEVEL_PRESENT)
+            high = max(2, int(2 * quotes.volume * self.depth))
+            bid_vol = rng.integers(1, high, (n, LEVELS)) * present[:, 0] * (bid > 0)
+            ask_vol = rng.integers(1, high, (n, LEVELS)) * present[:, 1]
+            columns["bid_price"][:, p] = np.where(bid_vol > 0, bid, 0)
+            columns["bid_volume"][:, p] = bid_vol
+            columns["ask_price"][:, p] = ask
+            columns["ask_volume"][:, p] = ask_vol
+            mid[:, p] = np.where(bid_vol[:, 0] > 0, (bid[:, 0] + ask[:, 0]) / 2, np.nan)
+        columns["mid_price"] = mid
+        return columns
+
+    def _trades(self, rng, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Market trades at the touch: a buyer lifting the ask or a seller hitting the bid."""
+        n, P = columns["mid_price"].shape
+        hit = rng.random((n, P)) < self.trade_rate
+        buy = rng.random((n, P)) < 0.5
+        buy |= columns["bid_volume"][:, :, 0] == 0
+        t, p = np.nonzero(hit)
+        buy = buy[t, p]
+        price = np.where(buy, columns["ask_price"][t, p, 0], columns["bid_price"][t, p, 0])
+        available = np.where(buy, columns["ask_volume"][t, p, 0], columns["bid_volume"][t, p, 0])
+        quantity = np.maximum(1, rng.integers(1, 6, len(t)) * self.depth).astype(np.int32)
+        quantity = np.minimum(quantity, np.maximum(available, 1))
+        return {
+            "trade_timestamp": columns["timestamps"][t],
+            "trade_product": p.astype(np.int16),
+            "trade_price": price.astype(float),
+            "trade_quantity": quantity,
+            "trade_buyer": np.zeros(len(t), np.int16),
+            "trade_seller": np.zeros(len(t), np.int16),
+        }
+
+
+class _Chunks:
+    """One pass over a day, shared by its tick and trade streams.
+
+    A chunk is kept until every stream that has started has moved past it,
+    however far one stream runs ahead of the other.
+    """
+
+    def __init__(self, day: "SyntheticDay"):
+        self._source = day.market.generate(day.n_ticks, day.chunk, day.day)
+        self._cache: Dict[int, DayColumns] = {}
+        self._next = 0
+        self._reading: Dict[int, int] = {}   # the chunk each started stream is on
+
+    def get(self, k: int) -> Optional[DayColumns]:
+        while k >= self._next:
+            columns = next(self._source, None)
+            if columns is None:
+                return None
+            self._cache[self._next] = columns
+            self._next += 1
+        if k not in self._cache:
+            raise RuntimeError("chunk %d was already dropped; start every stream before reading far into one" % k)
+        return self._cache[k]
+
+    def each(self, stream: int) -> Iterator[DayColumns]:
+        k = 0
+        while True:
+            self._reading[stream] = k
+            for done in [j for j in self._cache if j < min(self._reading.values())]:
+                del self._cache[done]
+            columns = self.get(k)
+            if columns is None:
+                return
+            yield columns
+            k += 1
+
+
+def _chunk_trades(columns: DayColumns) -> Iterator[Tuple[int, List[Trade]]]:
+    """A chunk's trade batches, closed by an empty batch at its last tick.
+
+    The empty batch keeps a reader like backtest._Feed, which looks one item
+    ahead, from generating chunks past a stretch with no trades.
+    """
+    yield from columns.trades()
+    if len(columns):
+        yield int(columns.timestamps[-1]), []
+
+
+class SyntheticDay:
+    """`n_ticks` ticks of a SyntheticMarket, generated `chunk` ticks at a time as they are read."""
+
+    def __init__(self, market: SyntheticMarket, n_ticks: int, chunk: int = 10000, day: int = 0):
+        self.market = market
+        self.n_ticks = n_ticks
+        self.chunk = chunk
+        self.day = day
+
+    def __len__(self) -> int:
+        return self.n_ticks
+
+    def chunks(self) -> Iterator[DayColumns]:
+        """The columns themselves, for vectorized consumers."""
+        return self.market.generate(self.n_ticks, self.chunk, self.day)
+
+    def streams(self, products: Optional[List[str]] = None, lazy: bool = False) -> Tuple[
+            Iterator[Tick], Iterator[Tuple[int, List[Trade]]], Iterator[Tuple[int, ConversionObservation]]]:
+        """Fresh (ticks, trades, observations) for Backtest; the day has no observations."""
+        chunks = _Chunks(self)
+        ticks = (tick for columns in chunks.each(0) for tick in columns.ticks(products=products, lazy=lazy))
+        trades = (batch for columns in chunks.each(1) for batch in _chunk_trades(columns))
+        return ticks, trades, iter(())
+
+    def write_store(self, out) -> Path:
+        """Write the day as a tickstore directory, one chunk at a time."""
+        out = Path(out)
+        out.mkdir(parents=True, exist_ok=True)
+        n, P = self.n_ticks, len(self.market.products)
+        files = {"timestamps": ((n,), np.int64), "mid_price": ((n, P), np.float64)}
+        files.update((name, ((n, P, LEVELS), np.int32)) for name in BOOK_COLUMNS)
+        arrays = {name: np.lib.format.open_memmap(out / (name + ".npy"), mode="w+", dtype=dtype, shape=shape)
+                  for name, (shape, dtype) in files.items()}
+        trades: Dict[str, List[np.ndarray]] = {name: [] for name in TRADE_FIELDS}
+        start = 0
+        meta = None
+        for columns in self.chunks():
+            stop = start + len(columns)
+            for name, values in columns.columns().items():
+                if name in arrays:
+                    arrays[name][start:stop] = values
+            for name, values in columns.trade.items():
+                trades[name].append(values)
+            meta = columns.meta
+            start = stop
+        for values in arrays.values():
+            values.flush()
+        del arrays
+        for name, parts in trades.items():
+            np.save(out / ("trade_" + name + ".npy"), np.concatenate(parts))
+        (out / "meta.json").write_text(json.dumps(meta, indent=1))
+        return out
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic market day.")
+    parser.add_argument("--ticks", type=int, default=TICKS_PER_DAY)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk", type=int, default=10000)
+    parser.add_argument("--depth", type=float, default=1.0, help="scale every level's volume")
+    parser.add_argument("--trade-rate", type=float, default=0.05)
+    parser.add_argument("--spikes", help="rate,length,multiplier, e.g. 0.0002,2000,4")
+    parser.add_argument("--out", help="write a tickstore directory")
+    parser.add_argument("--trader", help="backtest this strategy file on the day")
+    args = parser.parse_args(argv)
+    if not args.out and not args.trader:
+        parser.error("give --out and/or --trader")
+
+    spikes = None
+    if args.spikes:
+        rate, length, multiplier = args.spikes.split(",")
+        spikes = Spikes(float(rate), int(length), float(multiplier))
+    market = SyntheticMarket(spikes=spikes, depth=args.depth, trade_rate=args.trade_rate, seed=args.seed)
+    day = market.day(args.ticks, args.chunk)
+    if args.out:
+        print("wrote %s" % day.write_store(args.out))
+    if args.trader:
+        print(Backtest(load_trader(args.trader), *day.streams()).run().summary())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,310 @@
+"""Columnar, memory-mapped store for one day of round data.
+
+    python tickstore.py prices_round_4_day_1.csv [trades_round_4_day_1.csv]
+                        [observations_round_4_day_1.csv] --out data/r4d1
+
+`import_day` parses the CSVs once and writes one .npy file per column plus a
+meta.json index.  The book columns are dense [tick, product(, level)] grids,
+so a product is a column index and a tick is a row; missing levels have
+volume 0 and missing mids are NaN.  `TickStore(path)` opens every column with
+np.load(mmap_mode="r"): nothing is read until it is touched, and processes
+that open the same day share the page cache instead of holding copies.
+
+Layout:
+    timestamps            (T,)       int64
+    bid_price, bid_volume (T, P, 3)  int32   level 0 is the best
+    ask_price, ask_volume (T, P, 3)  int32   volumes positive, as in the CSV
+    mid_price             (T, P)     float64
+    trade_*               (N,)       timestamp int64, product int16, price float64,
+                                     quantity int32, buyer / seller int16 (into meta["traders"])
+    obs_*                 (M,)       timestamp int64 and one float64 column per field
+"""
+import argparse
+import csv
+import json
+import sys
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from backtest import Tick
+from datamodel import ConversionObservation, OrderDepth, Trade
+
+LEVELS = 3
+BOOK_COLUMNS = ("bid_price", "bid_volume", "ask_price", "ask_volume")
+TRADE_FIELDS = ("timestamp", "product", "price", "quantity", "buyer", "seller")
+OBS_FIELDS = ("bidPrice", "askPrice", "transportFees", "exportTariff", "importTariff",
+              "sugarPrice", "sunlightIndex")
+
+
+def _read_csv(path, delimiter=";") -> List[List[str]]:
+    with open(path, newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        next(reader, None)
+        return [row for row in reader if row]
+
+
+def _num(s: str) -> float:
+    return float(s) if s else 0.0
+
+
+def read_day(prices, trades=None, observations=None) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """Parse one day's CSVs into (meta, columns), the in-memory form of a store."""
+    rows = _read_csv(prices)
+    products = sorted({r[2] for r in rows})
+    product_index = {p: i for i, p in enumerate(products)}
+    timestamps = sorted({int(r[1]) for r in rows})
+    tick_index = {ts: i for i, ts in enumerate(timestamps)}
+    T, P = len(timestamps), len(products)
+
+    columns = {name: np.zeros((T, P, LEVELS), np.int32) for name in BOOK_COLUMNS}
+    mid = np.full((T, P), np.nan)
+    for r in rows:
+        t = tick_index[int(r[1])]
+        p = product_index[r[2]]
+        for level in range(LEVELS):
+            columns["bid_price"][t, p, level] = _num(r[3 + 2 * level])
+            columns["bid_volume"][t, p, level] = _num(r[4 + 2 * level])
+            columns["ask_price"][t, p, level] = _num(r[9 + 2 * level])
+            columns["ask_volume"][t, p, level] = _num(r[10 + 2 * level])
+        if r[15] and float(r[15]):
+            mid[t, p] = float(r[15])
+    columns["timestamps"] = np.array(timestamps, np.int64)
+    columns["mid_price"] = mid
+
+    traders = [""]
+    if trades:
+        trade_rows = sorted(_read_csv(trades), key=lambda r: int(r[0]))
+        trader_index = {"": 0}
+        for r in trade_rows:
+            for name in (r[1], r[2]):
+                if name not in trader_index:
+                    trader_index[name] = len(traders)
+                    traders.append(name)
+            if r[3] not in product_index:
+                product_index[r[3]] = len(products)
+                products.append(r[3])
+        columns["trade_timestamp"] = np.array([int(r[0]) for r in trade_rows], np.int64)
+        columns["trade_product"] = np.array([product_index[r[3]] for r in trade_rows], np.int16)
+        columns["trade_price"] = np.array([float(r[5]) for r in trade_rows])
+        columns["trade_quantity"] = np.array([int(r[6]) for r in trade_rows], np.int32)
+        columns["trade_buyer"] = np.array([trader_index[r[1]] for r in trade_rows], np.int16)
+        columns["trade_seller"] = np.array([trader_index[r[2]] for r in trade_rows], np.int16)
+
+    if observations:
+        with open(observations, newline="") as f:
+            obs_rows = sorted(csv.DictReader(f), key=lambda r: int(r["timestamp"]))
+        columns["obs_timestamp"] = np.array([int(r["timestamp"]) for r in obs_rows], np.int64)
+        for field in OBS_FIELDS:
+            columns["obs_" + field] = np.array([float(r[field]) for r in obs_rows])
+
+    meta = {"day": int(rows[0][0]) if rows else 0, "products": products, "book_products": P,
+            "traders": traders, "has_trades": bool(trades), "has_observations": bool(observations)}
+    return meta, columns
+
+
+def import_day(out, prices, trades=None, observations=None) -> Path:
+    """Convert one day's CSVs into a store directory at `out`."""
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    meta, columns = read_day(prices, trades, observations)
+    for name, values in columns.items():
+        np.save(out / (name + ".npy"), values)
+    (out / "meta.json").write_text(json.dumps(meta, indent=1))
+    return out
+
+
+def _depth(bid_prices: List[int], bid_volumes: List[int], ask_prices: List[int],
+           ask_volumes: List[int]) -> OrderDepth:
+    # the grids hold plain ints and always three levels, so skip from_levels' NaN handling
+    depth = OrderDepth()
+    book = depth.buy_orders
+    if bid_volumes[0]:
+        book[bid_prices[0]] = bid_volumes[0]
+    if bid_volumes[1]:
+        book[bid_prices[1]] = bid_volumes[1]
+    if bid_volumes[2]:
+        book[bid_prices[2]] = bid_volumes[2]
+    book = depth.sell_orders
+    if ask_volumes[0]:
+        book[ask_prices[0]] = -ask_volumes[0]
+    if ask_volumes[1]:
+        book[ask_prices[1]] = -ask_volumes[1]
+    if ask_volumes[2]:
+        book[ask_prices[2]] = -ask_volumes[2]
+    return depth
+
+
+class LazyDepths(Mapping):
+    """order_depths for one tick that builds each OrderDepth on first lookup.
+
+    Iterating, `in` and len() never touch the book columns, so a trader that
+    only reads a few products only pays for those.
+    """
+
+    __slots__ = ("_day", "_tick", "_products", "_built")
+
+    def __init__(self, day: "DayColumns", tick: int, products: List[str]):
+        self._day = day
+        self._tick = tick
+        self._products = products
+        self._built: Dict[str, OrderDepth] = {}
+
+    def __getitem__(self, product: str) -> OrderDepth:
+        depth = self._built.get(product)
+        if depth is None:
+            if product not in self._day.product_index or product not in self._products:
+                raise KeyError(product)
+            depth = self._built[product] = self._day.depth(self._tick, product)
+        return depth
+
+    def __contains__(self, product) -> bool:
+        return product in self._products
+
+    def __iter__(self):
+        return iter(self._products)
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def copy(self) -> "LazyDepths":
+        """Same tick, nothing built yet: each copy hands out its own OrderDepths."""
+        return LazyDepths(self._day, self._tick, self._products)
+
+
+def column_names(meta: dict) -> List[str]:
+    names = ["timestamps", *BOOK_COLUMNS, "mid_price"]
+    if meta["has_trades"]:
+        names += ["trade_" + name for name in TRADE_FIELDS]
+    if meta["has_observations"]:
+        names += ["obs_" + name for name in ("timestamp",) + OBS_FIELDS]
+    return names
+
+
+class DayColumns:
+    """A day's columns (see the module docstring) and the streams built from them.
+
+    The arrays may be anything array-like: memory maps (TickStore), shared
+    memory (shared.SharedDay) or plain arrays from read_day.
+    """
+
+    def __init__(self, meta: dict, columns: Dict[str, np.ndarray]):
+        self.meta = meta
+        self.day: int = meta["day"]
+        self.products: List[str] = meta["products"]
+        self.book_products: List[str] = self.products[:meta["book_products"]]
+        self.product_index: Dict[str, int] = {p: i for i, p in enumerate(self.products)}
+        self.traders: List[str] = meta["traders"]
+        self.timestamps = columns["timestamps"]
+        self.bid_price = columns["bid_price"]
+        self.bid_volume = columns["bid_volume"]
+        self.ask_price = columns["ask_price"]
+        self.ask_volume = columns["ask_volume"]
+        self.mid_price = columns["mid_price"]
+        self.trade: Dict[str, np.ndarray] = {name: columns["trade_" + name] for name in TRADE_FIELDS
+                                             if meta["has_trades"]}
+        self.obs: Dict[str, np.ndarray] = {name: columns["obs_" + name] for name in ("timestamp",) + OBS_FIELDS
+                                           if meta["has_observations"]}
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Every column by its file name, the inverse of __init__."""
+        columns = {"timestamps": self.timestamps, "bid_price": self.bid_price, "bid_volume": self.bid_volume,
+                   "ask_price": self.ask_price, "ask_volume": self.ask_volume, "mid_price": self.mid_price}
+        columns.update(("trade_" + name, values) for name, values in self.trade.items())
+        columns.update(("obs_" + name, values) for name, values in self.obs.items())
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def column(self, name: str, product: str) -> np.ndarray:
+        """One product's slice of a book column, e.g. column("mid_price", "KELP"), without a copy."""
+        return getattr(self, name)[:, self.product_index[product]]
+
+    def depth(self, tick: int, product: str) -> OrderDepth:
+        p = self.product_index[product]
+        return _depth(self.bid_price[tick, p].tolist(), self.bid_volume[tick, p].tolist(),
+                      self.ask_price[tick, p].tolist(), self.ask_volume[tick, p].tolist())
+
+    def ticks(self, start: int = 0, stop: Optional[int] = None, products: Optional[List[str]] = None,
+              chunk: int = 1000, lazy: bool = False) -> Iterator[Tick]:
+        """Ticks in backtest.read_prices form, converted from the columns `chunk` rows at a time.
+
+        `products` limits the books built to those products, which skips the
+        rest of the day's data entirely.  With `lazy`, order_depths is a
+        LazyDepths and a product's book is only built when it is looked up.
+        """
+        stop = len(self) if stop is None else stop
+        products = self.book_products if products is None else products
+        columns = [self.product_index[p] for p in products]
+        for lo in range(start, stop, chunk):
+            hi = min(stop, lo + chunk)
+            ts = self.timestamps[lo:hi].tolist()
+            if not lazy:
+                bp = self.bid_price[lo:hi, columns].tolist()
+                bv = self.bid_volume[lo:hi, columns].tolist()
+                ap = self.ask_price[lo:hi, columns].tolist()
+                av = self.ask_volume[lo:hi, columns].tolist()
+            mids = self.mid_price[lo:hi, columns].tolist()
+            for i in range(hi - lo):
+                tick_mids = {product: m for product, m in zip(products, mids[i]) if m == m}
+                if lazy:
+                    depths = LazyDepths(self, lo + i, products)
+                else:
+                    bpi, bvi, api, avi = bp[i], bv[i], ap[i], av[i]
+                    depths = {product: _depth(bpi[p], bvi[p], api[p], avi[p]) for p, product in enumerate(products)}
+                yield Tick(self.day, ts[i], depths, tick_mids)
+
+    def trades(self) -> Iterator[Tuple[int, List[Trade]]]:
+        """Market trades grouped by timestamp, as backtest.read_trades yields them."""
+        if not self.trade:
+            return
+        cols = {name: values.tolist() for name, values in self.trade.items()}
+        products, traders = self.products, self.traders
+        batch: List[Trade] = []
+        current = None
+        for i, ts in enumerate(cols["timestamp"]):
+            if ts != current and batch:
+                yield current, batch
+                batch = []
+            current = ts
+            batch.append(Trade(products[cols["product"][i]], int(cols["price"][i]), cols["quantity"][i],
+                               traders[cols["buyer"][i]] or None, traders[cols["seller"][i]] or None, ts))
+        if batch:
+            yield current, batch
+
+    def observations(self) -> Iterator[Tuple[int, ConversionObservation]]:
+        if not self.obs:
+            return
+        cols = [self.obs[name].tolist() for name in OBS_FIELDS]
+        for i, ts in enumerate(self.obs["timestamp"].tolist()):
+            yield ts, ConversionObservation(*(col[i] for col in cols))
+
+
+class TickStore(DayColumns):
+    """A day written by import_day, opened as read-only memory maps."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        meta = json.loads((self.path / "meta.json").read_text())
+        super().__init__(meta, {name: np.load(self.path / (name + ".npy"), mmap_mode="r")
+                                for name in column_names(meta)})
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Import a day of round CSVs into a tick store.")
+    parser.add_argument("prices")
+    parser.add_argument("trades", nargs="?")
+    parser.add_argument("observations", nargs="?")
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args(argv)
+    out = import_day(args.out, args.prices, args.trades, args.observations)
+    store = TickStore(out)
+    print("%s: %d ticks, %d products, %d trades" % (out, len(store), len(store.book_products),
+                                                   len(store.trade.get("timestamp", ()))))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])